@@ -0,0 +1,56 @@
+'''Measures how long the mangadl cli takes to start, by running 'mangadl list-ids' in a new Python process (the same as a job runner spawning it per task)
+It also shows how long starting takes when every scraper and formatter is imported up front, which is what main.py used to do
+
+Run it from the root of the repo with:
+python -m benchmarks.import_time
+'''
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# this runs the cli the same way the mangadl console script does
+lazy_command = 'import sys; sys.argv = ["mangadl", "list-ids"]; from mangadl.main import run; run()'
+
+# this does the same, but imports every scraper and formatter first
+eager_command = 'import sys; sys.argv = ["mangadl", "list-ids"]; from mangadl import registry; [scraper.load() for scraper in registry.get_scrapers().values()]; [formatter.get_formatting_class(True) for formatter in registry.get_formatters()]; from mangadl.main import run; run()'
+
+
+def time_command(command: str, repeat: int) -> list[float]:
+    '''Runs command in a new Python process repeat times, and returns how long each run took in seconds'''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-W', 'ignore', '-c', command], check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run():
+    parser = argparse.ArgumentParser(description='Benchmarks how long the mangadl cli takes to start')
+    parser.add_argument('--repeat', type=int, default=10, help='How many times to start the cli for each benchmark')
+    parser.add_argument('--importtime', action='store_true', default=False, help='If the slowest imports should be shown too (from python -X importtime)')
+    args = parser.parse_args()
+
+    # the first run is thrown away, so every measured run has it's .pyc files already made
+    time_command(lazy_command, 1)
+
+    for name, command in [('lazy (what the cli does)', lazy_command), ('eager (everything imported)', eager_command)]:
+        times = time_command(command, args.repeat)
+        print(f'{name}: median {statistics.median(times) * 1000:.0f}ms, min {min(times) * 1000:.0f}ms')
+
+    if args.importtime:
+        # -X importtime prints every import and how long it took (in microseconds) to stderr
+        output = subprocess.run([sys.executable, '-W', 'ignore', '-X', 'importtime', '-c', lazy_command], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True).stderr
+        imports = []
+        for line in output.splitlines()[1:]:
+            self_time, cumulative_time, module_name = line.removeprefix('import time:').split('|')
+            imports.append((int(cumulative_time), module_name.strip()))
+        print('\nslowest imports (cumulative):')
+        for cumulative_time, module_name in sorted(imports, reverse=True)[:15]:
+            print(f'{cumulative_time / 1000:>8.1f}ms {module_name}')
+
+
+if __name__ == '__main__':
+    run()
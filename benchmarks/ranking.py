@@ -0,0 +1,70 @@
+'''Compares how long ranking search results takes with the old difflib based sort_search_results, and with ranking.get_top_matches
+
+Run it from the root of the repo with:
+python -m benchmarks.ranking
+'''
+import argparse
+import difflib
+import random
+import string
+import time
+from mangadl import ranking
+from mangadl.common import SearchResult
+
+
+def difflib_sort_search_results(search_results: list[SearchResult], query: str) -> list[SearchResult]:
+    '''This is how common.sort_search_results used to work, it's here to compare against'''
+    similarity_list = []
+    for obj in search_results:
+        score = difflib.SequenceMatcher(None, obj.name, query).ratio()
+        similarity_list.append((obj, score))
+    similarity_list.sort(key=lambda x: x[1], reverse=True)
+    return [obj for obj, score in similarity_list]
+
+
+def make_search_results(count: int, query: str) -> list[SearchResult]:
+    '''Makes a list of fake search results, some of which are close to the query (like what bato_v4 returns)'''
+    words = query.split()
+    search_results = []
+    for i in range(count):
+        # every 10th result is a variation of the query, the rest are random titles
+        if i % 10 == 0:
+            name = ' '.join(random.sample(words, len(words))) + f' {random.choice(["", "Season 2", "(Official)", "Side Story"])}'
+        else:
+            name = ' '.join(''.join(random.choices(string.ascii_letters, k=random.randint(3, 9))) for _ in range(random.randint(2, 8)))
+        search_results.append(SearchResult(name, f'https://example.com/series/{i}', 'example'))
+    return search_results
+
+
+def time_function(function: callable, repeat: int) -> float:
+    '''Returns the fastest time (in seconds) out of repeat runs of function'''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run():
+    parser = argparse.ArgumentParser(description='Benchmarks ranking search results')
+    parser.add_argument('--query', type=str, default='The Beginning After the End', help='The query to rank results against')
+    parser.add_argument('--count', type=int, nargs='+', default=[100, 1000, 10000], help='How many search results to rank')
+    parser.add_argument('--limit', type=int, default=3, help='How many results to keep')
+    parser.add_argument('--repeat', type=int, default=5, help='How many times to run each benchmark (the fastest is shown)')
+    args = parser.parse_args()
+
+    random.seed(0)
+    print(f'rapidfuzz is {"" if ranking.rapidfuzz_fuzz is not None else "not "}installed')
+    print(f'{"results":>8} {"difflib":>12} {"ranking":>12} {"ranking top " + str(args.limit):>16}')
+
+    for count in args.count:
+        search_results = make_search_results(count, args.query)
+        difflib_time = time_function(lambda: difflib_sort_search_results(search_results, args.query), args.repeat)
+        ranking_time = time_function(lambda: ranking.get_top_matches(search_results, args.query), args.repeat)
+        top_time = time_function(lambda: ranking.get_top_matches(search_results, args.query, args.limit), args.repeat)
+        print(f'{count:>8} {difflib_time * 1000:>10.2f}ms {ranking_time * 1000:>10.2f}ms {top_time * 1000:>14.2f}ms')
+
+
+if __name__ == '__main__':
+    run()
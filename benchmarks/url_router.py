@@ -0,0 +1,64 @@
+'''Compares how long finding the scraper for a url takes with the old way (compiling and trying every scraper's regexes), and with router.UrlRouter
+
+Run it from the root of the repo with:
+python -m benchmarks.url_router
+'''
+import argparse
+import random
+import re
+import time
+from mangadl import main
+
+
+# these are example urls of every type from a few scrapers, and some that don't match any
+example_urls = [
+    'https://bato.to/series/72315/one-piece',
+    'https://xbato.org/chapter/3274914',
+    'https://bato.si/title/83510-one-piece-official/3184935-ch_1146',
+    'https://mangadex.org/title/a1c7c817-4e59-43b7-9365-09675a149a6f/one-piece',
+    'https://mangadex.org/chapter/a1d761a5-cfdf-4a50-a203-9be3cb4b930f',
+    'https://www.webtoons.com/en/action/hero-killer/episode-1/viewer?title_no=2745&episode_no=1',
+    'https://mangabuddy.com/the-beginning-after-the-end/chapter-225',
+    'https://comix.to/title/pvry-one-piece',
+    'https://tapas.io/series/tbate-comic',
+    'https://example.com/not/a/manga',
+]
+
+
+def old_get_scraper_name_by_url(url: str) -> str or None:
+    '''This is how main.get_scraper_name_by_url used to work, it's here to compare against'''
+    for scraper_name, scraper_functions in main.get_scraper_mappings().items():
+        chapter_regex = re.compile(scraper_functions.get('chapter_class_reference').regex)
+        series_regex = re.compile(scraper_functions.get('series_class_reference').regex)
+        if chapter_regex.fullmatch(url) or series_regex.fullmatch(url):
+            return scraper_name
+    return None
+
+
+def run():
+    parser = argparse.ArgumentParser(description='Benchmarks finding the scraper for urls')
+    parser.add_argument('--count', type=int, default=20000, help='How many urls to classify')
+    args = parser.parse_args()
+
+    random.seed(0)
+    urls = [random.choice(example_urls) for _ in range(args.count)]
+
+    # making sure they give the same answers first
+    for url in example_urls:
+        assert old_get_scraper_name_by_url(url) == main.get_scraper_name_by_url(url), url
+
+    start = time.perf_counter()
+    for url in urls:
+        old_get_scraper_name_by_url(url)
+    old_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for url in urls:
+        main.get_scraper_name_by_url(url)
+    router_time = time.perf_counter() - start
+
+    print(f'{args.count} urls: {old_time * 1000:.1f}ms with regexes, {router_time * 1000:.1f}ms with the router ({old_time / router_time:.0f}x faster)')
+
+
+if __name__ == '__main__':
+    run()
@@ -1,4 +1,14 @@
 __all__ = [
+    'cache',
     'common',
-    'main'
+    'daemon',
+    'index',
+    'journal',
+    'main',
+    'ranking',
+    'ratelimit',
+    'registry',
+    'retry',
+    'router',
+    'store',
 ]
\ No newline at end of file
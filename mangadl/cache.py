@@ -0,0 +1,339 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import requests
+from mangadl import ranking
+
+# this is the name of the cache's database file, it's put in the cache directory (see get_default_cache_directory)
+cache_filename = 'responses.sqlite3'
+
+# entries that haven't been stored again in this many seconds are removed when the cache is opened, so it doesn't grow forever
+cache_max_age = 30 * 24 * 60 * 60
+
+# these headers aren't stored, since they describe how the body was sent, and the body is stored already decoded
+unstored_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie']
+
+# these are the response headers that say which version of a page it is, and the request headers they're sent back in to ask if it's changed (see get_validator_headers)
+validator_headers = {'ETag': 'If-None-Match', 'Last-Modified': 'If-Modified-Since'}
+
+# this is the name of the search result cache's database file, it's put in the cache directory next to the response cache
+search_cache_filename = 'search_results.sqlite3'
+
+# search results are fresh for this many seconds, since sites don't add new series often
+search_cache_ttl = 24 * 60 * 60
+
+# this is the most searches the search result cache keeps. When there's more, the ones that were used the longest ago are removed
+search_cache_max_entries = 1000
+
+# this is the cache used by common.request when a request passes a cache_ttl. It's None (no caching) until configure_default_cache is called
+default_response_cache = None
+
+# this is the cache used by common.cached_search. It's None (no caching) until configure_default_search_cache is called
+default_search_cache = None
+
+
+class ResponseCache:
+    '''Caches responses to metadata requests (series pages, chapter pages, and api responses) in an SQLite database, so running the same command again doesn't request them all again
+    Every entry has a TTL (how many seconds it's fresh for) set by whoever requested it, which is what the cache_ttls in every scraper are for
+    Each scraper's cache_ttls has a TTL for it's series pages and one for it's chapter pages. Series pages are usually only cached for an hour, so new chapters still show up, and chapter pages for a day, since they don't change once they're up. Scrapers only explain theirs if they're different for a reason (like mangadex's image urls expiring)
+    Entries are kept after they expire, so if the host gave an ETag or Last-Modified header, we can ask it if the page changed (a conditional request) and only get the body again if it did
+
+    Example Code:
+    from cache import ResponseCache
+
+    response_cache = ResponseCache('/put/your/path/here/responses.sqlite3')
+
+    response = response_cache.get('GET', 'https://mangadex.org/')
+    if response is None:
+        response = requests.get('https://mangadex.org/')
+        response_cache.set('GET', 'https://mangadex.org/', response, ttl=60 * 60)
+    '''
+
+    def __init__(self, path: str, refresh: bool = False):
+        ''':param path: The path to the cache's database file. It's made (along with it's directory) if it doesn't exist yet
+        :param refresh: If every cached response should be treated as expired, so they're all checked with the host again (with a conditional request if they can be). This is what --refresh does'''
+        self.path = path
+        self.refresh = refresh
+        # with refresh on, responses stored before this are treated as expired (so each one is only checked once per run)
+        self.opened_at = time.time()
+
+        # the connection is shared by every thread, so we only let one use it at a time
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+
+        with self.lock, self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, url TEXT NOT NULL, status_code INTEGER NOT NULL, headers TEXT NOT NULL, body BLOB NOT NULL, stored_at REAL NOT NULL, expires_at REAL NOT NULL)')
+            # this stores values scrapers worked out from their responses (like how many images a chapter has), so they don't have to be worked out again (see get_value)
+            self.connection.execute('CREATE TABLE IF NOT EXISTS scraper_values (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, expires_at REAL NOT NULL)')
+            # removing old entries
+            self.connection.execute('DELETE FROM responses WHERE stored_at < ?', (time.time() - cache_max_age,))
+            self.connection.execute('DELETE FROM scraper_values WHERE expires_at < ?', (time.time(),))
+
+    def close(self):
+        '''Closes the cache's database connection'''
+        with self.lock:
+            self.connection.close()
+
+    def get(self, method: str, url: str, body: bytes or str or None = None) -> requests.Response or None:
+        '''Returns the cached response for a request if there's one that's still fresh, otherwise returns None
+        The response is rebuilt as a requests.Response, with from_cache set to True
+        :param method: The request's HTTP method
+        :param url: The request's url, including it's query string
+        :param body: The request's body, if it had one (like a POST to a graphql api)'''
+        with self.lock:
+            entry = self.connection.execute('SELECT url, status_code, headers, body, stored_at, expires_at FROM responses WHERE key = ?', (get_cache_key(method, url, body),)).fetchone()
+
+        if entry is None or entry[5] < time.time() or (self.refresh and entry[4] < self.opened_at):
+            return None
+
+        return build_response(entry[0], entry[1], json.loads(entry[2]), entry[3])
+
+    def get_stale(self, method: str, url: str, body: bytes or str or None = None) -> requests.Response or None:
+        '''Returns the cached response for a request even if it's expired, or None if there isn't one. This is for revalidating it with a conditional request (see get_validator_headers)
+        :param method: The request's HTTP method
+        :param url: The request's url, including it's query string
+        :param body: The request's body, if it had one'''
+        with self.lock:
+            entry = self.connection.execute('SELECT url, status_code, headers, body FROM responses WHERE key = ?', (get_cache_key(method, url, body),)).fetchone()
+
+        if entry is None:
+            return None
+
+        return build_response(entry[0], entry[1], json.loads(entry[2]), entry[3])
+
+    def refresh_entry(self, method: str, url: str, not_modified_response: requests.Response, ttl: float, body: bytes or str or None = None) -> requests.Response or None:
+        '''Marks a cached response as fresh again for ttl seconds, after the host said it hasn't changed (a 304 response). Returns the cached response, or None if there isn't one anymore
+        The 304's headers (like a new ETag or Cache-Control) replace the stored ones, the same as a browser would do
+        :param method: The request's HTTP method
+        :param url: The request's url, including it's query string
+        :param not_modified_response: The 304 response
+        :param ttl: How many seconds the response is fresh for from now
+        :param body: The request's body, if it had one'''
+        key = get_cache_key(method, url, body)
+        now = time.time()
+
+        with self.lock, self.connection:
+            entry = self.connection.execute('SELECT url, status_code, headers, body FROM responses WHERE key = ?', (key,)).fetchone()
+            if entry is None:
+                return None
+
+            headers = requests.structures.CaseInsensitiveDict(json.loads(entry[2]))
+            headers.update({name: value for name, value in not_modified_response.headers.items() if name.lower() not in unstored_headers})
+            headers = dict(headers)
+            self.connection.execute('UPDATE responses SET headers = ?, stored_at = ?, expires_at = ? WHERE key = ?', (json.dumps(headers), now, now + ttl, key))
+
+        return build_response(entry[0], entry[1], headers, entry[3])
+
+    def set(self, method: str, url: str, response: requests.Response, ttl: float, body: bytes or str or None = None):
+        '''Stores a response for a request, fresh for ttl seconds
+        :param method: The request's HTTP method
+        :param url: The request's url, including it's query string
+        :param response: The response to store. It's whole body is read
+        :param ttl: How many seconds the response is fresh for
+        :param body: The request's body, if it had one'''
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in unstored_headers}
+        now = time.time()
+
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO responses (key, url, status_code, headers, body, stored_at, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?)', (get_cache_key(method, url, body), response.url, response.status_code, json.dumps(headers), response.content, now, now + ttl))
+
+    def get_value(self, key: str):
+        '''Returns a value stored with set_value if it's still fresh, otherwise returns None
+        :param key: The value's key, which should start with the scraper's website ID so scrapers don't use each other's keys'''
+        with self.lock:
+            entry = self.connection.execute('SELECT value, stored_at, expires_at FROM scraper_values WHERE key = ?', (key,)).fetchone()
+
+        if entry is None or entry[2] < time.time() or (self.refresh and entry[1] < self.opened_at):
+            return None
+
+        return json.loads(entry[0])
+
+    def set_value(self, key: str, value, ttl: float):
+        '''Stores a value a scraper worked out from it's responses (like how many images a chapter has), fresh for ttl seconds, so next time it doesn't have to send the requests to work it out again
+        :param key: The value's key, which should start with the scraper's website ID so scrapers don't use each other's keys
+        :param value: The value to store. It has to be able to be turned into json
+        :param ttl: How many seconds the value is fresh for'''
+        now = time.time()
+
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO scraper_values (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)', (key, json.dumps(value), now, now + ttl))
+
+    def clear(self):
+        '''Removes every cached response and value'''
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM responses')
+            self.connection.execute('DELETE FROM scraper_values')
+
+
+class SearchResultCache:
+    '''Caches every site's search results in an SQLite database, so searching the same thing again returns instantly and doesn't send any requests
+    Searches are stored by site, normalized query (see ranking.normalize_title), and adult, so 'One Piece' and 'one piece!' share an entry
+    Entries expire after ttl seconds, and when there's more than max_entries the least recently used ones are removed
+
+    Example Code:
+    from cache import SearchResultCache
+
+    search_cache = SearchResultCache('/put/your/path/here/search_results.sqlite3')
+
+    search_results = search_cache.get('mangadex', 'One Piece', None, 3)
+    if search_results is None:
+        search_results = [(search_result.name, search_result.url, search_result.website_id) for search_result in search('One Piece', None, limit=3)]
+        search_cache.set('mangadex', 'One Piece', None, 3, search_results)
+    '''
+
+    def __init__(self, path: str, ttl: float = search_cache_ttl, max_entries: int = search_cache_max_entries, refresh: bool = False):
+        ''':param path: The path to the cache's database file. It's made (along with it's directory) if it doesn't exist yet
+        :param ttl: How many seconds search results are fresh for
+        :param max_entries: The most searches to keep
+        :param refresh: If every cached search should be treated as expired, so every site is searched again. This is what --refresh does'''
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.refresh = refresh
+
+        # the connection is shared by every search thread, so we only let one use it at a time
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+
+        with self.lock, self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            # result_limit is the limit the site was searched with (NULL if there wasn't one), so we know if the entry has enough results for a later search
+            self.connection.execute('CREATE TABLE IF NOT EXISTS search_results (key TEXT PRIMARY KEY, website_id TEXT NOT NULL, query TEXT NOT NULL, adult INTEGER, result_limit INTEGER, results TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)')
+            self.connection.execute('DELETE FROM search_results WHERE expires_at < ?', (time.time(),))
+
+    def close(self):
+        '''Closes the cache's database connection'''
+        with self.lock:
+            self.connection.close()
+
+    def get(self, website_id: str, query: str, adult: bool or None, limit: int or None = None) -> list[tuple[str, str, str]] or None:
+        '''Returns the cached search results for a search as a list of (name, url, website_id) tuples, or None if there isn't a fresh entry with enough results
+        :param website_id: The id of the site that was searched
+        :param query: The string that was searched
+        :param adult: If the search included only adult (True), only non-adult (False), or both (None)
+        :param limit: The most results the search should return. If None, the entry is only used if it wasn't limited either'''
+        if self.refresh:
+            return None
+
+        key = get_search_cache_key(website_id, query, adult)
+        with self.lock, self.connection:
+            entry = self.connection.execute('SELECT result_limit, results, expires_at FROM search_results WHERE key = ?', (key,)).fetchone()
+            if entry is None or entry[2] < time.time():
+                return None
+
+            # if the site was searched with a smaller limit, we don't have all the results this search needs
+            if entry[0] is not None and (limit is None or limit > entry[0]):
+                return None
+
+            # we mark the entry as used, so it's kept over ones that haven't been used in a while
+            self.connection.execute('UPDATE search_results SET used_at = ? WHERE key = ?', (time.time(), key))
+
+        return [tuple(search_result) for search_result in json.loads(entry[1])][:limit]
+
+    def set(self, website_id: str, query: str, adult: bool or None, limit: int or None, search_results: list[tuple[str, str, str]]):
+        '''Stores the results of a search, then removes the least recently used entries if there's more than max_entries
+        :param website_id: The id of the site that was searched
+        :param query: The string that was searched
+        :param adult: If the search included only adult (True), only non-adult (False), or both (None)
+        :param limit: The limit the site was searched with
+        :param search_results: The search results as a list of (name, url, website_id) tuples'''
+        now = time.time()
+
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO search_results (key, website_id, query, adult, result_limit, results, expires_at, used_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (get_search_cache_key(website_id, query, adult), website_id, ranking.normalize_title(query), adult, limit, json.dumps(search_results), now + self.ttl, now))
+            self.connection.execute('DELETE FROM search_results WHERE key IN (SELECT key FROM search_results ORDER BY used_at DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+
+    def clear(self):
+        '''Removes every cached search'''
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM search_results')
+
+
+def get_cache_key(method: str, url: str, body: bytes or str or None = None) -> str:
+    '''Returns the key a request is cached under, which is a hash of it's method, url, and body'''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return hashlib.sha256(method.upper().encode('utf-8') + b'\n' + url.encode('utf-8') + b'\n' + (body or b'')).hexdigest()
+
+
+def get_search_cache_key(website_id: str, query: str, adult: bool or None) -> str:
+    '''Returns the key a search is cached under, which is the site, the normalized query, and adult'''
+    return json.dumps([website_id, ranking.normalize_title(query), adult])
+
+
+def get_validator_headers(response: requests.Response) -> dict:
+    '''Returns the headers for a conditional request that asks the host if a cached response has changed (If-None-Match with it's ETag, and If-Modified-Since with it's Last-Modified)
+    If the response doesn't have either, it returns {}, since it can't be revalidated
+    :param response: The cached response'''
+    return {request_header: response.headers[response_header] for response_header, request_header in validator_headers.items() if response.headers.get(response_header)}
+
+
+def build_response(url: str, status_code: int, headers: dict, body: bytes) -> requests.Response:
+    '''Rebuilds a requests.Response from a cached one, so scrapers can use it the same as one they requested themselves'''
+    response = requests.Response()
+    response.url = url
+    response.status_code = status_code
+    response.headers = requests.structures.CaseInsensitiveDict(headers)
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.reason = 'OK'
+    # requests doesn't have a public way to set the body, so we set it the same way requests does
+    response._content = body
+    response.from_cache = True
+    return response
+
+
+def get_default_cache_directory() -> str:
+    '''Returns the directory the cache is kept in by default. That's $XDG_CACHE_HOME/mangadl, or ~/.cache/mangadl if XDG_CACHE_HOME isn't set'''
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'mangadl')
+
+
+def configure_default_cache(path: str or None = None, refresh: bool = False):
+    '''Opens the cache used by common.request. Until this is called, nothing is cached
+
+    Example Code:
+    from cache import configure_default_cache
+
+    configure_default_cache()
+    :param path: The path to the cache's database file. Defaults to responses.sqlite3 in get_default_cache_directory
+    :param refresh: If cached responses should be ignored (they're still stored again)'''
+    global default_response_cache
+    disable_default_cache()
+    default_response_cache = ResponseCache(path or os.path.join(get_default_cache_directory(), cache_filename), refresh=refresh)
+
+
+def disable_default_cache():
+    '''Closes the cache used by common.request (if there is one), so nothing is cached'''
+    global default_response_cache
+    if default_response_cache is not None:
+        default_response_cache.close()
+    default_response_cache = None
+
+
+def configure_default_search_cache(path: str or None = None, refresh: bool = False):
+    '''Opens the cache used by common.cached_search. Until this is called, search results aren't cached
+
+    Example Code:
+    from cache import configure_default_search_cache
+
+    configure_default_search_cache()
+    :param path: The path to the cache's database file. Defaults to search_results.sqlite3 in get_default_cache_directory
+    :param refresh: If cached search results should be ignored (new ones are still stored)'''
+    global default_search_cache
+    disable_default_search_cache()
+    default_search_cache = SearchResultCache(path or os.path.join(get_default_cache_directory(), search_cache_filename), refresh=refresh)
+
+
+def disable_default_search_cache():
+    '''Closes the cache used by common.cached_search (if there is one), so search results aren't cached'''
+    global default_search_cache
+    if default_search_cache is not None:
+        default_search_cache.close()
+    default_search_cache = None
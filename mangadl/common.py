@@ -1,4 +1,6 @@
-import difflib
+import asyncio
+import contextvars
+import json
 import os
 from urllib import parse
 import requests
@@ -6,11 +8,55 @@ import random
 import string
 import re
 import shutil
+import itertools
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from mangadl import cache
+from mangadl import ranking
+from mangadl import ratelimit
+from mangadl import retry
+from mangadl.journal import DownloadJournal
+from mangadl.store import ContentStore
 
 # just general variables for image filetypes
 image_file_extensions_with_periods = ['.png', '.jpeg', '.jpg', '.gif', '.webp', '.heif', '.avif', '.heic', '.jxl', '.tiff', '.tif']
 image_file_extensions_without_periods = [filetype[1:] for filetype in image_file_extensions_with_periods]
 
+# images are written to disk in chunks of this many bytes, so only one chunk of an image is in memory at a time
+image_chunk_size = 64 * 1024
+# while an image is being written, it's saved with this added to the end of it's filename, then renamed once it's done
+# since it's not an image file extension, unfinished images aren't counted by get_if_chapter_already_downloaded or the formatters
+temp_file_extension = '.part'
+# this is added to the end of a temp file's name for the file keeping track of how to resume it (see PartialDownload)
+partial_download_sidecar_extension = '.json'
+# a partial download's sidecar file is updated every time this many more bytes have been written
+partial_download_sidecar_interval = 1024 * 1024
+
+# this is the timeout used for requests that don't pass their own, as (connect timeout, read timeout) in seconds
+# without one, a request to a host that stopped responding would wait forever instead of being retried
+request_timeout = (10, 60)
+
+# this stores the deadline for the current thread's requests, if it has one (see set_request_deadline)
+request_deadlines = threading.local()
+
+# these are the connection pool sizes used for every host's session (see get_session)
+# pool_connections is how many connection pools are cached, pool_maxsize is how many connections are kept alive per pool
+# pool_maxsize should be at least as big as the amount of threads requesting the same host at once, otherwise connections get thrown away instead of reused
+session_pool_connections = 10
+session_pool_maxsize = 10
+
+# every hostname gets it's own session, these are stored here so they're shared by every scraper and the image downloader
+sessions: dict[str, requests.Session] = {}
+sessions_lock = threading.Lock()
+
+# when a site's search api lets us ask for a set amount of results, search functions ask for this many times their limit (but at least min_search_candidates, see get_search_candidate_count)
+# the apis' own order isn't very good, so sort_search_results ranking more results than we need gives better results than ranking just the first few
+search_candidates_per_result = 5
+min_search_candidates = 20
+
 
 class SearchResult:
     '''This is the class for search results from manga websites
@@ -49,6 +95,59 @@ class SearchResult:
     def __repr__(self) -> str:
         return self.__str__()
 
+
+class CatalogEntry(SearchResult):
+    '''This is the class for series found when crawling a website's catalog (see index.py). It's a SearchResult with the series' alternative names, if it's adult, and when it was last updated
+
+    Example Code:
+    from common import CatalogEntry
+
+    catalog_entry = CatalogEntry('One Piece', 'https://mangadex.org/title/a1c7c817-4e59-43b7-9365-09675a149a6f', 'mangadex', alt_names=['ワンピース'], adult=False)
+    :param alt_names: The series' other names (like translated titles)
+    :param adult: If the series is adult (True), not adult (False), or unknown (None)
+    :param updated_at: When the series was last updated on the website, as a unix timestamp. None if the website doesn't say'''
+
+    def __init__(self, name: str, url: str, website_id: str, alt_names: list[str] or None = None, adult: bool or None = None, updated_at: float or None = None):
+        super().__init__(name, url, website_id)
+        self.alt_names = alt_names or []
+        self.adult = adult
+        self.updated_at = updated_at
+
+
+class ChapterInfo:
+    '''This is the class for chapters from a series' chapter listing (see SharedSeriesClass.get_chapters). It has what the listing already says about the chapter, so it can be picked, skipped, and named without requesting the chapter
+    Everything but the url is None if the website's listing doesn't say
+
+    Example Code:
+    from common import ChapterInfo
+
+    chapter_info = ChapterInfo('https://comix.to/title/pvry-one-piece/7217327', number=1169, title='Romance Dawn', is_official=True)
+    print(chapter_info.number) # outputs 1169
+    print(chapter_info) # outputs 'Chapter 1169: Romance Dawn (https://comix.to/title/pvry-one-piece/7217327)'
+    :param url: The chapter's url
+    :param number: The chapter's number (like 145.5)
+    :param title: The chapter's title
+    :param language: The language the chapter is in, as a language code (like 'en')
+    :param published_at: When the chapter was published, as a unix timestamp
+    :param is_official: If the chapter is an official translation (True) or a scanlation (False)'''
+
+    def __init__(self, url: str, number: float or None = None, title: str or None = None, language: str or None = None, published_at: float or None = None, is_official: bool or None = None):
+        self.url = url
+        self.number = number
+        self.title = title
+        self.language = language
+        self.published_at = published_at
+        self.is_official = is_official
+
+    def __str__(self) -> str:
+        '''This function turns the chapter info into a string, like 'Chapter 12: Title (url)'. The parts the listing didn't have are left out'''
+        if self.number is None and not self.title:
+            return self.url
+        number = '' if self.number is None else f'Chapter {float(self.number):g}'
+        separator = ': ' if number and self.title else ''
+        return f'{number}{separator}{self.title or ''} ({self.url})'
+
+
 class SharedSeriesClass:
     '''This is a base class for all series classes for scrapers.
     SharedSeriesClass already has a download method, so you just need to write a get_chapter_url method to get chapter urls.
@@ -69,8 +168,8 @@ class SharedSeriesClass:
     def __init__(self, url: str):
         self.url = url
 
-    def download(self, output_path: str, show_updates_in_terminal: bool = True, redownload: bool = False):
-        '''This is the generic shared series class download function. It will call self.get_chapter_urls, then download them. If headers are passed in, it will use those when requesting the chapters
+    def download(self, output_path: str, show_updates_in_terminal: bool = True, redownload: bool = False, max_workers: int = 1, chapters_in_flight: int = 0, journal: DownloadJournal or None = None, store: ContentStore or None = None):
+        '''This is the generic shared series class download function. It will call self.get_chapters (which uses get_chapter_urls by default), then download them. If headers are passed in, it will use those when requesting the chapters
         This function is mainly for organizing where chapters should go, so it doesn't do any requests on it's own. It just gets the paths to where the chapters should saves them
 
         Example Code:
@@ -97,23 +196,95 @@ class SharedSeriesClass:
         :param output_path: The path where the images will be saved to
         :param chapter_object_reference: The reference to the Chapter object for this scraper
         :param headers: The headers used when requesting chapters
-        :param redownload: If a chapter should be redownloaded, even if already downloaded'''
+        :param redownload: If a chapter should be redownloaded, even if already downloaded
+        :param max_workers: How many images of a chapter can be downloaded at the same time
+        :param chapters_in_flight: How many upcoming chapters get their image urls fetched while the current chapter's images are downloading
+        :param journal: The journal keeping track of what's been downloaded. Chapters it says are finished are skipped without requesting anything
+        :param store: The content store to keep the images in, so images that are the same are only saved once (see store.ContentStore)'''
         # first we make sure we have a chapter class reference
         # since it's required for downloading
         if self.chapter_object_reference == None:
             raise Exception('A reference to the chapter object is required when downloading a series. If you are a developer, make sure to specify one by making a class variable named chapter_object_reference with a reference to the class. Otherwise, if you are a user, please open a bug report.')
 
-        # then we get all the urls for the chapters in the series
-        chapter_urls = self.get_chapter_urls()
+        # then we get all the chapters in the series
+        chapters = self.get_chapters()
 
-        # next we go through and download every chapter
-        for i, chapter_url in enumerate(chapter_urls):
-            # the first step is making a chapter object for the chapter
-            chapter_object = self.chapter_object_reference(chapter_url)
+        # then we make a chapter object for every chapter
+        chapter_objects = [self.make_chapter_object(chapter) for chapter in chapters]
+
+        # after that we skip the chapters the journal says are already downloaded, before any of their image urls are requested
+        chapters_to_download = get_chapters_to_download(chapter_objects, redownload, journal, show_updates_in_terminal)
 
+        # next we go through and download every chapter
+        # iterate_chapters_with_img_urls gets the image urls for the next chapters in the background, so we don't have to wait on them after every chapter
+        for (i, _), (chapter_object, img_urls) in zip(chapters_to_download, iterate_chapters_with_img_urls([chapter_object for i, chapter_object in chapters_to_download], chapters_in_flight)):
             # then we download it and add it to downloaded_chapters
             # we also pass the output path
-            chapter_object.download(os.path.join(output_path, chapter_object.get_name()), show_updates_in_terminal=show_updates_in_terminal, chapter_number = i + 1, chapter_count = len(chapter_urls), redownload=redownload)
+            chapter_object.download(os.path.join(output_path, chapter_object.get_name()), show_updates_in_terminal=show_updates_in_terminal, chapter_number = i + 1, chapter_count = len(chapters), redownload=redownload, max_workers=max_workers, img_urls=img_urls, journal=journal, store=store)
+
+    async def async_download(self, output_path: str, show_updates_in_terminal: bool = True, redownload: bool = False, max_concurrency: int = 64, chapters_in_flight: int = 0, http_session = None, journal: DownloadJournal or None = None, store: ContentStore or None = None):
+        '''The asyncio version of SharedSeriesClass.download. Every chapter's images are requested with one aiohttp session, so lots of images can be downloaded at once without a thread per connection
+        Requires aiohttp to be installed (pip install mangadl[async])
+
+        Example Code:
+        import asyncio
+        from scrapers.mangabuddy import Series
+
+        series = Series('https://mangabuddy.com/the-beginning-after-the-end')
+
+        # downloading with up to 200 images being requested at once
+        asyncio.run(series.async_download('put/your/path/here', max_concurrency=200))
+        :param output_path: The path where the images will be saved to
+        :param show_updates_in_terminal: If updates should be shown in terminal when downloading
+        :param redownload: If a chapter should be redownloaded, even if already downloaded
+        :param max_concurrency: How many images can be requested at the same time, across every chapter being downloaded
+        :param chapters_in_flight: How many chapters after the first one can be downloading at the same time
+        :param http_session: An aiohttp.ClientSession to use. If None, one is made (and closed) for this download
+        :param journal: The journal keeping track of what's been downloaded. Chapters it says are finished are skipped without requesting anything
+        :param store: The content store to keep the images in, so images that are the same are only saved once (see store.ContentStore)'''
+        # first we make sure we have a chapter class reference, the same as download
+        if self.chapter_object_reference == None:
+            raise Exception('A reference to the chapter object is required when downloading a series. If you are a developer, make sure to specify one by making a class variable named chapter_object_reference with a reference to the class. Otherwise, if you are a user, please open a bug report.')
+
+        # then we get all the chapters in the series
+        chapters = await self.async_get_chapters()
+
+        # then we skip the chapters the journal says are already downloaded, the same as download
+        chapters_to_download = get_chapters_to_download([self.make_chapter_object(chapter) for chapter in chapters], redownload, journal, show_updates_in_terminal)
+
+        # making the session if we weren't given one
+        aiohttp = get_aiohttp()
+        owns_http_session = http_session is None
+        if owns_http_session:
+            http_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=max_concurrency))
+
+        try:
+            # this limits how many images can be requested at once, and it's shared by every chapter
+            image_semaphore = asyncio.Semaphore(max_concurrency)
+            # this limits how many chapters are downloading at once
+            chapter_semaphore = asyncio.Semaphore(chapters_in_flight + 1)
+
+            async def download_chapter(i: int, chapter_object: SharedChapterClass):
+                async with chapter_semaphore:
+                    chapter_name = await asyncio.to_thread(chapter_object.get_name)
+                    await chapter_object.async_download(os.path.join(output_path, chapter_name), show_updates_in_terminal=show_updates_in_terminal, chapter_number=i + 1, chapter_count=len(chapters), redownload=redownload, http_session=http_session, image_semaphore=image_semaphore, journal=journal, store=store)
+
+            # now we download every chapter
+            await asyncio.gather(*[download_chapter(i, chapter_object) for i, chapter_object in chapters_to_download])
+        finally:
+            if owns_http_session:
+                await http_session.close()
+
+    async def async_get_chapter_urls(self) -> list[str]:
+        '''The awaitable version of get_chapter_urls. By default this just runs get_chapter_urls in a thread, so it doesn't block the event loop
+        Scrapers can override this if they have a native asyncio way of getting their chapter urls
+        :returns: A list of chapter urls as strings'''
+        return await asyncio.to_thread(self.get_chapter_urls)
+
+    async def async_get_chapters(self) -> list[ChapterInfo]:
+        '''The awaitable version of get_chapters. By default this just runs get_chapters in a thread, so it doesn't block the event loop
+        :returns: A list of ChapterInfo objects'''
+        return await asyncio.to_thread(self.get_chapters)
 
     def get_chapter_urls(self, *args):
         '''Fetches a series' url and extracts the urls to that series' chapters
@@ -128,6 +299,25 @@ class SharedSeriesClass:
         chapter_urls = Series.get_chapter_urls()
         :returns: A list of chapter urls as strings'''
         raise Exception(f'You need to make your own get_chapter_urls method!')
+
+    def get_chapters(self) -> list[ChapterInfo]:
+        '''Returns the series' chapters as ChapterInfo objects, in the same order as get_chapter_urls
+        By default this just makes a ChapterInfo with only the url for every chapter url. Scrapers whose chapter listing already has the chapters' numbers, titles, etc. can override this to fill them in (and have get_chapter_urls return their urls), so picking, skipping, and naming chapters doesn't need any more requests
+
+        Example Code:
+        from scrapers.mangadex import Series
+
+        series = Series('https://mangadex.org/title/a1c7c817-4e59-43b7-9365-09675a149a6f/one-piece')
+        for chapter in series.get_chapters():
+            print(chapter.number, chapter.title, chapter.url)
+        :returns: A list of ChapterInfo objects'''
+        return [ChapterInfo(chapter_url) for chapter_url in self.get_chapter_urls()]
+
+    def make_chapter_object(self, chapter: str or ChapterInfo):
+        '''Makes the chapter object for one of this series' chapters. By default this is just chapter_object_reference(url)
+        Scrapers can override this to give their chapter objects what get_chapters already found out about them (like their chapter number), so the chapter doesn't have to request it again
+        :param chapter: One of the ChapterInfo objects get_chapters returned, or one of the urls get_chapter_urls returned'''
+        return self.chapter_object_reference(get_chapter_url(chapter))
     
     
     def get_name(self) -> str:
@@ -187,7 +377,24 @@ class SharedChapterClass:
         :returns: A list of the urls to the images as strings'''
         raise Exception(f'You need to make your own get_img_urls method!')
 
-    def download(self, output_path: str, show_updates_in_terminal: bool = True, chapter_number: int = 1, chapter_count: int = 1, redownload: bool = False):
+    def iter_img_urls(self):
+        '''Yields the chapter's image urls as they're found, as tuples of (index, image url, image count), so download can start downloading the first images while the rest are still being found
+        They can be yielded in any order, but the image count has to be the same in every tuple. By default this just gets every image url with get_img_urls first
+        Scrapers that have to request a page per image (like mangatown) can override this to yield each image url as soon as it's page has been requested
+
+        Example Code:
+        from scrapers.<your_scraper_here> import Chapter
+
+        chapter = Chapter('https://put.the/url/to/your/chapter/here/')
+
+        for image_index, img_url, image_count in chapter.iter_img_urls():
+            print(f'{image_index + 1}/{image_count}: {img_url}')
+        '''
+        img_urls = self.get_img_urls()
+        for i, img_url in enumerate(img_urls):
+            yield i, img_url, len(img_urls)
+
+    def download(self, output_path: str, show_updates_in_terminal: bool = True, chapter_number: int = 1, chapter_count: int = 1, redownload: bool = False, max_workers: int = 1, img_urls: list[str] or None = None, journal: DownloadJournal or None = None, store: ContentStore or None = None):
         '''# The default download function for Chapters. It gets all the image urls for a chapter, then requests those images and saves them
         If the output paths's directory is the name of the chapter, it will save all it's images there, otherwise it will make a directory with the name of the chapter and save the images there
 
@@ -202,8 +409,8 @@ class SharedChapterClass:
         \# make sure to include the scheme for the url\n
         chapter = Chapter('https://put.your/url/to/your/chapter/here')
 
-        \# downloading the images\n
-        chapter.download(path_to_save_images_to)
+        \# downloading the images, with up to 8 images being downloaded at once\n
+        chapter.download(path_to_save_images_to, max_workers=8)
         
         :param output_path: The path the images will be saved to
         :param show_updates_in_terminal: If updates should be shown in terminal when downloading
@@ -213,16 +420,45 @@ class SharedChapterClass:
         :param chapter_number: The chapter number for giving updates when downloading as a series. the [chapter_num] part of (chapter [chapter_num]/[chapter_count])
         :param chapter_count: The chapter count for giving updates when downloading as a series. the [chapter_count] part of (chapter [chapter_num]/[chapter_count])
         :param redownload: If this chapter should be downloaded again, even if already downloaded       ``
+        :param max_workers: How many images can be downloaded at the same time. 1 downloads them one after another
+        :param img_urls: The chapter's image urls, if they were already fetched (like by iterate_chapters_with_img_urls). If None, they're fetched with self.iter_img_urls, and images start downloading as soon as their urls are found
+        :param journal: The journal keeping track of what's been downloaded. If it says this chapter's finished, it's skipped without requesting anything, otherwise only the images that are missing or cut off are downloaded
+        :param store: The content store to keep the images in, so images that are the same are only saved once (see store.ContentStore). With a journal, images that were already downloaded from the same url are linked from the store instead of being downloaded again
         '''
-        
-        # first we get all the img urls
-        img_urls = self.get_img_urls()
+        # first (if enabled) we check if the journal says this chapter's already been downloaded, so we can skip it before requesting anything
+        if not redownload and journal is not None and journal.is_chapter_complete(self.url):
+            if show_updates_in_terminal:
+                print_chapter_already_downloaded_message(chapter_number)
+            return
+
+        # then we start getting the img urls (if we weren't given them already)
+        # they come from a stream, so images can start downloading before every url has been found (see iter_img_urls)
+        if img_urls is None:
+            img_url_stream = self.iter_img_urls()
+        else:
+            img_url_stream = ((i, img_url, len(img_urls)) for i, img_url in enumerate(img_urls))
+
+        # we need the image count before anything can be downloaded, which comes with the first url
+        first_img_url = next(img_url_stream, None)
+        image_count = first_img_url[2] if first_img_url is not None else 0
+        img_url_stream = itertools.chain([first_img_url], img_url_stream) if first_img_url is not None else iter([])
+        # the urls are put in here as they're found, by their index
+        img_urls = [None] * image_count
 
         # next we make a directory for the chapter (if we're not in it already, or it already exists)
         output_path = get_correct_output_path(output_path, self.get_name())
+        image_paths = [os.path.join(output_path, f'{i:03d}.png') for i in range(image_count)]
 
         # then (if enabled) we check if the chapter's already been downloaded to see if we should skip it
-        if not redownload and self.get_if_chapter_already_downloaded(output_path, len(img_urls)):
+        # this is for chapters the journal doesn't know about (or if there's no journal), so we go by how many images are in the chapter's directory
+        if not redownload and (journal is None or not journal.has_chapter(self.url)) and self.get_if_chapter_already_downloaded(output_path, image_count):
+            # if there's a journal, we add the chapter to it, so next time it's skipped without requesting anything
+            # that needs every image url, so only then do we finish getting them
+            if journal is not None:
+                for i, img_url, _ in img_url_stream:
+                    img_urls[i] = img_url
+                journal.record_existing_chapter(self.url, output_path, img_urls, image_paths)
+
             # giving an update to the user we skipped the chapter (if enabled)
             if show_updates_in_terminal:
                 print_chapter_already_downloaded_message(chapter_number)
@@ -230,49 +466,328 @@ class SharedChapterClass:
             # ending the function
             return
 
+        # if there's a journal, we record the chapter as started, so only the images that aren't already there get downloaded
+        if journal is not None:
+            journal.start_chapter(self.url, output_path, image_count)
+
         # if enabled we print an update in terminal showing we've started the download
         if show_updates_in_terminal:
-            print_image_download_start(self.url, len(img_urls), chapter_number, chapter_count)
-
-        for i, img_url in enumerate(img_urls):
-            # first we add the hostname to headers under 'Host' if enabled
-            if self.add_host_to_image_headers:
-                self.image_headers['Host'] = parse.urlparse(img_url).hostname
-
-            if self.add_host_but_call_it_something_else:
-                self.image_headers[self.add_host_but_call_it_something_else] = parse.urlparse(img_url).hostname
-
-            # secondly we request the img
-            img_response = requests.get(img_url, headers=self.image_headers)
-
-            # next we make sure the request went through
-            if img_response.status_code != 200:
-                # we also store the status code in case we need to use it for an error message
-                status_code_one = img_response.status_code
-                # if it didn't, we request it one more time
-                img_response = requests.get(img_url, headers=self.image_headers)
-
-                # and if that still doesn't work, we raise an error unless replace_image_vailed_error_with_warning is toggled, then we print a warning instead
-                if self.replace_image_failed_error_with_warning and show_updates_in_terminal and img_response.status_code != 200:
-                    print(f'\033[91m Got status codes {status_code_one} and {img_response.status_code} when requesting \'{img_url}\'. It is highly recommended that you use another source, since downloading here may not get you all the images. This scraper has opted to replace errors with warnings, meaning this is expected behavior.\033[00m')
-                # the elif is here because the first condition needs show updates in terminal, and replace image failed error with warning to be true, but if show updates in terminal isn't, it'll still raise an error even though told not to
-                elif not self.replace_image_failed_error_with_warning and img_response.status_code != 200:
-                    if img_response.status_code != 200:
-                        raise Exception(f'Got status codes {status_code_one} when requesting \'{img_url}\'. Then we retried getting the image, got status code {img_response.status_code}')
-
-            # if we did get the image, we save it
-            with open(os.path.join(output_path, f'{i:03d}.png'), 'wb') as f:
-                f.write(img_response.content)
+            print_image_download_start(self.url, image_count, chapter_number, chapter_count)
+
+        def download_image(i: int):
+            # if the store already has this image (from another chapter, or an earlier download), we link it into place instead of downloading it again
+            if not redownload and link_image_from_store(self.url, i, img_urls[i], image_paths[i], journal, store):
+                return
+
+            # otherwise we download it, then add it to the store and journal (if there are ones)
+            # it's run by the workers, so the image is hashed in the worker's thread too
+            image_downloaded = self.download_image(img_urls[i], image_paths[i], show_updates_in_terminal)
+            record_downloaded_image(self.url, i, img_urls[i], image_paths[i], image_downloaded, journal, store)
+
+        # the progress updates are printed from here (and not the workers) so they only count images that actually finished
+        finished_image_count = 0
+        def finish_image(future):
+            nonlocal finished_image_count
+            # this raises the error from the worker if there was one
+            if future is not None:
+                future.result()
 
             # we also give an update that we finished an image (if enabled)
             if show_updates_in_terminal:
-                print_image_download_update(self.url, i, len(img_urls), chapter_number, chapter_count)
+                print_image_download_update(self.url, finished_image_count, image_count, chapter_number, chapter_count)
+            finished_image_count += 1
+
+        # now we download the images with a pool of workers, starting each one as soon as it's url is found
+        # every image still gets saved as it's index (000.png, 001.png, etc), so the order they finish in doesn't matter
+        executor = ContextThreadPoolExecutor(max_workers=max(1, max_workers))
+        try:
+            futures = set()
+            for i, img_url, _ in img_url_stream:
+                img_urls[i] = img_url
+
+                # images the journal says are already there count as already finished
+                if not redownload and journal is not None and journal.is_image_complete(self.url, i, img_url, image_paths[i]):
+                    finish_image(None)
+                else:
+                    futures.add(executor.submit(download_image, i))
+
+                # while we wait for the next url, we give updates for the images that have finished so far
+                for future in [future for future in futures if future.done()]:
+                    futures.remove(future)
+                    finish_image(future)
+
+            # then we wait for the rest of the images
+            for future in as_completed(futures):
+                finish_image(future)
+        except BaseException:
+            # if one image failed, we don't bother downloading the rest of the images that haven't started yet
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        executor.shutdown(wait=True)
+
+        # now that every image is done, we mark the chapter as finished in the journal (this doesn't if any of them failed)
+        if journal is not None:
+            journal.finish_chapter(self.url)
 
         # here we print the same text we already printed to show that the chapter's downloaded, but with \n at the end to stop the output becoming all wonky after downloading a chapter
         # if enabled of course
         if show_updates_in_terminal:
             print_image_download_end(self.url, len(img_urls), chapter_number, chapter_count)
 
+    def download_image(self, img_url: str, image_path: str, show_updates_in_terminal: bool = True) -> bool:
+        '''Requests a single image and saves it to image_path. This is what SharedChapterClass.download's workers call for every image, so it can be called from multiple threads at once
+        Returns True if the image was downloaded, or False if it failed but was saved anyway because replace_image_failed_error_with_warning is toggled
+        :param img_url: The url to the image
+        :param image_path: The path where the image will be saved
+        :param show_updates_in_terminal: If warnings should be shown in terminal when an image fails to download'''
+        # first we make a copy of the image headers for this image
+        # we don't edit self.image_headers directly, since it's shared between every worker (and every chapter object)
+        image_headers = dict(self.image_headers)
+
+        # then we add the hostname to headers under 'Host' if enabled
+        if self.add_host_to_image_headers:
+            image_headers['Host'] = parse.urlparse(img_url).hostname
+
+        if self.add_host_but_call_it_something_else:
+            image_headers[self.add_host_but_call_it_something_else] = parse.urlparse(img_url).hostname
+
+        # then we request the img and save it
+        # request already retries connection errors and status codes like 503 (see retry.RetryPolicy), this loop is for when the connection breaks while we're reading the body
+        retry_policy = retry.default_retry_policy
+        retry_budget = retry.get_retry_budget(img_url)
+        # if an earlier download of this image was interrupted, we ask for just the rest of it (see PartialDownload)
+        partial_download = PartialDownload(image_path, img_url)
+        attempt = 0
+        while True:
+            # stream=True means the body isn't read yet, so we can write it to the file bit by bit instead of holding the whole image in memory
+            resume_headers = partial_download.get_resume_headers()
+            img_response = get(img_url, headers={**image_headers, **resume_headers}, stream=True)
+
+            # if the host couldn't give us the range we asked for, we throw away what we had and ask for the whole image
+            if img_response.status_code == 416 and resume_headers:
+                img_response.close()
+                partial_download.discard()
+                continue
+
+            # next we make sure the request went through (206 is the rest of an image we resumed)
+            # if it didn't, we raise an error unless replace_image_failed_error_with_warning is toggled, then we print a warning instead (and save whatever we got)
+            image_downloaded = img_response.status_code in [200, 206]
+            if not image_downloaded:
+                if self.replace_image_failed_error_with_warning:
+                    if show_updates_in_terminal:
+                        print_image_failed_warning(img_url, img_response.status_code)
+                else:
+                    # we're not using this response's body, so we give the connection back to the pool
+                    img_response.close()
+                    raise Exception(f'Got status code {img_response.status_code} when requesting \'{img_url}\'')
+
+            # if we did get the image, we save it
+            try:
+                with img_response:
+                    # this is False if the host sent a range we didn't ask for, in which case the partial download was thrown away and we ask for the whole image
+                    if not save_response_to_file(img_response, image_path, partial_download=partial_download):
+                        if resume_headers:
+                            continue
+                        raise Exception(f'Got a partial response we didn\'t ask for when requesting \'{img_url}\'')
+                return image_downloaded
+            except Exception as e:
+                # if the connection broke partway through, we try again (if we can)
+                if retry_policy.is_retryable_exception(e) and retry_policy.can_retry(attempt, retry_budget):
+                    time.sleep(retry_policy.get_backoff(attempt))
+                    attempt += 1
+                    continue
+                raise
+
+    async def async_get_img_urls(self) -> list[str]:
+        '''The awaitable version of get_img_urls. By default this just runs get_img_urls in a thread, so it doesn't block the event loop
+        Scrapers can override this if they have a native asyncio way of getting their image urls
+        :returns: A list of the urls to the images as strings'''
+        return await asyncio.to_thread(self.get_img_urls)
+
+    async def async_download(self, output_path: str, show_updates_in_terminal: bool = True, chapter_number: int = 1, chapter_count: int = 1, redownload: bool = False, max_concurrency: int = 64, img_urls: list[str] or None = None, http_session = None, image_semaphore: asyncio.Semaphore or None = None, journal: DownloadJournal or None = None, store: ContentStore or None = None):
+        '''The asyncio version of SharedChapterClass.download. The images are requested with aiohttp, so they can all be in flight at once without a thread per connection
+        Requires aiohttp to be installed (pip install mangadl[async])
+
+        Example Code:
+        import asyncio
+        from scrapers.mangabuddy import Chapter
+
+        chapter = Chapter('https://mangabuddy.com/the-beginning-after-the-end/chapter-224')
+        asyncio.run(chapter.async_download('/put/your/path/here'))
+        :param output_path: The path the images will be saved to
+        :param show_updates_in_terminal: If updates should be shown in terminal when downloading
+        :param chapter_number: The chapter number for giving updates when downloading as a series
+        :param chapter_count: The chapter count for giving updates when downloading as a series
+        :param redownload: If this chapter should be downloaded again, even if already downloaded
+        :param max_concurrency: How many images can be requested at the same time. Ignored if image_semaphore is passed
+        :param img_urls: The chapter's image urls, if they were already fetched. If None, they're fetched with self.async_get_img_urls
+        :param http_session: An aiohttp.ClientSession to use. If None, one is made (and closed) for this chapter
+        :param image_semaphore: An asyncio.Semaphore limiting how many images are requested at once, so it can be shared between chapters
+        :param journal: The journal keeping track of what's been downloaded, the same as download
+        :param store: The content store to keep the images in, the same as download'''
+        # first (if enabled) we check if the journal says this chapter's already been downloaded, the same as download
+        if not redownload and journal is not None and journal.is_chapter_complete(self.url):
+            if show_updates_in_terminal:
+                print_chapter_already_downloaded_message(chapter_number)
+            return
+
+        # then we get all the img urls (if we weren't given them already)
+        if img_urls is None:
+            img_urls = await self.async_get_img_urls()
+
+        # next we make a directory for the chapter (if we're not in it already, or it already exists)
+        # get_name can request things for some scrapers, so it's run in a thread
+        output_path = get_correct_output_path(output_path, await asyncio.to_thread(self.get_name))
+        image_paths = [os.path.join(output_path, f'{i:03d}.png') for i in range(len(img_urls))]
+
+        # then (if enabled) we check if the chapter's already been downloaded by counting it's images, for chapters the journal doesn't know about
+        if not redownload and (journal is None or not journal.has_chapter(self.url)) and self.get_if_chapter_already_downloaded(output_path, len(img_urls)):
+            if journal is not None:
+                await asyncio.to_thread(journal.record_existing_chapter, self.url, output_path, img_urls, image_paths)
+            if show_updates_in_terminal:
+                print_chapter_already_downloaded_message(chapter_number)
+            return
+
+        # if there's a journal, we only download the images that aren't already there
+        image_indexes = await asyncio.to_thread(get_image_indexes_to_download, self.url, output_path, img_urls, image_paths, redownload, journal)
+
+        # if enabled we print an update in terminal showing we've started the download
+        if show_updates_in_terminal:
+            print_image_download_start(self.url, len(img_urls), chapter_number, chapter_count)
+
+        # making the session and semaphore if we weren't given them
+        aiohttp = get_aiohttp()
+        owns_http_session = http_session is None
+        if owns_http_session:
+            http_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=max_concurrency))
+        if image_semaphore is None:
+            image_semaphore = asyncio.Semaphore(max_concurrency)
+
+        try:
+            async def download_image(i: int):
+                # linking the image from the store if we can, the same as download
+                if not redownload and await asyncio.to_thread(link_image_from_store, self.url, i, img_urls[i], image_paths[i], journal, store):
+                    return
+
+                async with image_semaphore:
+                    image_downloaded = await self.async_download_image(http_session, img_urls[i], image_paths[i], show_updates_in_terminal)
+                # the image is hashed in a thread, so it doesn't block the event loop
+                await asyncio.to_thread(record_downloaded_image, self.url, i, img_urls[i], image_paths[i], image_downloaded, journal, store)
+
+            # now we request every image at once (limited by the semaphore), and give updates as they finish
+            tasks = [asyncio.ensure_future(download_image(i)) for i in image_indexes]
+            try:
+                # the images we skipped count as already finished
+                for finished_image_count, task in enumerate(asyncio.as_completed(tasks), start=len(img_urls) - len(image_indexes)):
+                    await task
+
+                    if show_updates_in_terminal:
+                        print_image_download_update(self.url, finished_image_count, len(img_urls), chapter_number, chapter_count)
+            except BaseException:
+                # if one image failed, we cancel the rest
+                for task in tasks:
+                    task.cancel()
+                raise
+        finally:
+            if owns_http_session:
+                await http_session.close()
+
+        # now that every image is done, we mark the chapter as finished in the journal, the same as download
+        # this is in a thread like the other journal calls, so the sqlite write doesn't block the event loop
+        if journal is not None:
+            await asyncio.to_thread(journal.finish_chapter, self.url)
+
+        if show_updates_in_terminal:
+            print_image_download_end(self.url, len(img_urls), chapter_number, chapter_count)
+
+    async def async_download_image(self, http_session, img_url: str, image_path: str, show_updates_in_terminal: bool = True) -> bool:
+        '''The asyncio version of SharedChapterClass.download_image. Requests a single image with an aiohttp.ClientSession and saves it to image_path
+        Returns True if the image was downloaded, or False if it failed but was saved anyway because replace_image_failed_error_with_warning is toggled
+        :param http_session: The aiohttp.ClientSession to request the image with
+        :param img_url: The url to the image
+        :param image_path: The path where the image will be saved
+        :param show_updates_in_terminal: If warnings should be shown in terminal when an image fails to download'''
+        # first we make a copy of the image headers for this image, the same as download_image
+        image_headers = dict(self.image_headers)
+        if self.add_host_to_image_headers:
+            image_headers['Host'] = parse.urlparse(img_url).hostname
+        if self.add_host_but_call_it_something_else:
+            image_headers[self.add_host_but_call_it_something_else] = parse.urlparse(img_url).hostname
+
+        # then we request the image, retrying it with the same policy as common.request (see retry.RetryPolicy)
+        limiter = ratelimit.get_rate_limiter(img_url)
+        retry_policy = retry.default_retry_policy
+        retry_budget = retry.get_retry_budget(img_url)
+        retry_budget.record_request()
+        # if an earlier download of this image was interrupted, we ask for just the rest of it, the same as download_image
+        partial_download = PartialDownload(image_path, img_url)
+        attempt = 0
+        while True:
+            # waiting for the host's rate limiter, the same as common.request
+            await limiter.async_acquire()
+            resume_headers = partial_download.get_resume_headers()
+            try:
+                img_response = await http_session.get(img_url, headers={**image_headers, **resume_headers})
+            except BaseException as e:
+                limiter.release()
+                if retry_policy.is_retryable_exception(e) and retry_policy.can_retry(attempt, retry_budget):
+                    await asyncio.sleep(retry_policy.get_backoff(attempt))
+                    attempt += 1
+                    continue
+                raise
+            retry_after = ratelimit.get_retry_after(img_response.headers)
+
+            # the slot is held until we're done with the body, so max_concurrency limits how many images are being transferred, not just requested (the same as common.send_request with stream=True)
+            # it's given back before waiting to retry, so a backoff doesn't take up a slot
+            # this is how long to wait before trying again, if we should
+            retry_backoff = None
+            try:
+                async with img_response:
+                    # trying again if it's a status code that's worth retrying
+                    if retry_policy.is_retryable_status(img_response.status) and retry_policy.can_retry(attempt, retry_budget):
+                        retry_backoff = retry_policy.get_backoff(attempt, retry_after)
+
+                    # if the host couldn't give us the range we asked for, we throw away what we had and ask for the whole image
+                    elif img_response.status == 416 and resume_headers:
+                        partial_download.discard()
+                        continue
+
+                    else:
+                        # if it didn't go through, we raise an error unless replace_image_failed_error_with_warning is toggled, then we print a warning instead (and save whatever we got)
+                        image_downloaded = img_response.status in [200, 206]
+                        if not image_downloaded:
+                            if not self.replace_image_failed_error_with_warning:
+                                raise Exception(f'Got status code {img_response.status} when requesting \'{img_url}\'')
+                            if show_updates_in_terminal:
+                                print_image_failed_warning(img_url, img_response.status)
+
+                        # this is False if the host sent a range we didn't ask for, in which case the partial download was thrown away and we ask for the whole image
+                        if not partial_download.open(img_response.status, img_response.headers):
+                            if resume_headers:
+                                continue
+                            raise Exception(f'Got a partial response we didn\'t ask for when requesting \'{img_url}\'')
+
+                        # we write the body to a temp file as it comes in, then rename it, the same as save_response_to_file
+                        try:
+                            async for chunk in img_response.content.iter_chunked(image_chunk_size):
+                                partial_download.write(chunk)
+                            partial_download.finish()
+                        except BaseException as e:
+                            # keeping what we got (if it can be resumed), so the next attempt only asks for the rest
+                            partial_download.abort()
+                            # if the connection broke partway through, we try again (if we can)
+                            if not (retry_policy.is_retryable_exception(e) and retry_policy.can_retry(attempt, retry_budget)):
+                                raise
+                            retry_backoff = retry_policy.get_backoff(attempt)
+                        else:
+                            return image_downloaded
+            finally:
+                # the status code and Retry-After are passed along, so the limiter still slows down for 429s and 503s
+                limiter.release(img_response.status, retry_after)
+
+            await asyncio.sleep(retry_backoff)
+            attempt += 1
+
     def get_if_chapter_already_downloaded(self, output_path: str, image_count: int) -> bool:
         '''Returns a boolean based off if this function believes the images have already been downloaded
         The way it detects this is by getting all the images in the output path, and if their count is equal to the amount of images we're gonna download, we count this chapter as downloaded
@@ -337,6 +852,139 @@ class SharedChapterClass:
             return parse.urlparse(self.url).path.strip('/').split('/')[-1].replace('_', '-')
         
 
+class PartialDownload:
+    '''Keeps track of an image being written to it's temp file (path + temp_file_extension), so that if the download is interrupted it can be resumed with a Range request
+    Next to the temp file there's a small json sidecar file with the url, the validator (ETag or Last-Modified) and how many bytes have been written
+    A download can only be resumed if the sidecar's url matches, and the server gave a validator, so we know the image hasn't changed since (the server checks that with If-Range)
+
+    Example Code:
+    from common import PartialDownload, get
+
+    partial_download = PartialDownload('/put/your/path/here/000.png', 'https://put.your/image/url/here.png')
+
+    # this is {} if there's nothing to resume, otherwise it's the Range and If-Range headers
+    resume_headers = partial_download.get_resume_headers()
+    with get('https://put.your/image/url/here.png', headers=resume_headers, stream=True) as response:
+        if partial_download.open(response.status_code, response.headers):
+            try:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    partial_download.write(chunk)
+                partial_download.finish()
+            except BaseException:
+                partial_download.abort()
+                raise
+    '''
+
+    def __init__(self, path: str, url: str):
+        ''':param path: The path where the finished image will be saved
+        :param url: The url the image is being downloaded from'''
+        self.path = path
+        self.url = url
+        self.temp_path = path + temp_file_extension
+        self.sidecar_path = self.temp_path + partial_download_sidecar_extension
+        self.validator = None
+        self.bytes_received = 0
+        self.bytes_received_at_last_save = 0
+        self.file = None
+
+    def get_resume_headers(self) -> dict:
+        '''Returns the headers to request the rest of the image with (Range and If-Range) if there's a partial download that can be resumed
+        Otherwise it removes any leftover temp file and returns {}'''
+        # reading the sidecar
+        try:
+            with open(self.sidecar_path) as f:
+                sidecar = json.load(f)
+            temp_file_size = os.path.getsize(self.temp_path)
+        except (OSError, ValueError):
+            sidecar = None
+
+        # making sure it's for the same url, and that we have something to resume
+        if sidecar is None or sidecar.get('url') != self.url or not sidecar.get('validator') or not sidecar.get('bytes_received'):
+            self.discard()
+            return {}
+
+        # we only trust the bytes that were written before the sidecar was last saved, anything after that gets cut off
+        # (the sidecar is only saved after the file's been flushed)
+        self.bytes_received = min(temp_file_size, int(sidecar.get('bytes_received')))
+        with open(self.temp_path, 'r+b') as f:
+            f.truncate(self.bytes_received)
+
+        self.validator = sidecar.get('validator')
+        return {'Range': f'bytes={self.bytes_received}-', 'If-Range': self.validator}
+
+    def open(self, status_code: int, headers) -> bool:
+        '''Opens the temp file to write a response into. If it's a 206 (partial content) response that starts where we left off, it appends to the temp file, otherwise it starts over
+        Returns False if it's a 206 response that doesn't start where we left off, in which case the partial download is discarded and it should be requested again without resume headers
+        :param status_code: The response's status code
+        :param headers: The response's headers'''
+        if status_code == 206:
+            # checking the range starts where we left off (Content-Range looks like 'bytes 1000-99999/100000')
+            content_range = headers.get('Content-Range', '')
+            try:
+                range_start = int(content_range.split(' ')[1].split('-')[0])
+            except (IndexError, ValueError):
+                range_start = None
+
+            if range_start != self.bytes_received:
+                self.discard()
+                return False
+
+            self.file = open(self.temp_path, 'ab')
+        else:
+            # the server sent the whole image (either we didn't ask to resume, or the image changed), so we start from the beginning
+            self.bytes_received = 0
+            self.validator = get_response_validator(headers)
+            self.file = open(self.temp_path, 'wb')
+
+        self.bytes_received_at_last_save = self.bytes_received
+        self.save_sidecar()
+        return True
+
+    def write(self, chunk: bytes):
+        '''Writes a chunk of the image to the temp file, and updates the sidecar every partial_download_sidecar_interval bytes'''
+        self.file.write(chunk)
+        self.bytes_received += len(chunk)
+
+        if self.bytes_received - self.bytes_received_at_last_save >= partial_download_sidecar_interval:
+            self.file.flush()
+            self.save_sidecar()
+
+    def finish(self):
+        '''Closes the temp file and renames it to the image's path, then removes the sidecar'''
+        self.file.close()
+        # renaming is atomic, so path either doesn't exist yet, or is the whole image
+        os.replace(self.temp_path, self.path)
+        remove_file_if_exists(self.sidecar_path)
+
+    def abort(self):
+        '''Closes the temp file after the download was interrupted. If it can be resumed later, the temp file and sidecar are kept, otherwise they're removed'''
+        if self.file is not None:
+            self.file.close()
+
+        if self.validator:
+            self.save_sidecar()
+        else:
+            self.discard()
+
+    def discard(self):
+        '''Removes the temp file and sidecar'''
+        remove_file_if_exists(self.temp_path)
+        remove_file_if_exists(self.sidecar_path)
+        self.bytes_received = 0
+        self.validator = None
+
+    def save_sidecar(self):
+        '''Saves the url, validator, and how many bytes have been written to the sidecar file. Nothing is saved if the download can't be resumed (no validator)'''
+        if not self.validator:
+            return
+
+        # the sidecar is also written to a temp file and renamed, so it's never half written
+        with open(self.sidecar_path + temp_file_extension, 'w') as f:
+            json.dump({'url': self.url, 'validator': self.validator, 'bytes_received': self.bytes_received}, f)
+        os.replace(self.sidecar_path + temp_file_extension, self.sidecar_path)
+        self.bytes_received_at_last_save = self.bytes_received
+
+
 class SharedChapterFormatterClass:
     '''A class for saving a chapter as a PDF'''
     def __init__(self, content_path: str):
@@ -384,7 +1032,8 @@ class SharedSeriesFormatterClass:
     
     def get_chapters(self) -> list[str]:
         '''Returns all the directories in the content_path directory'''
-        return sorted([d for d in os.listdir(self.content_path) if os.path.isdir(os.path.join(self.content_path, d))])
+        # directories starting with . (like the content store) are skipped, since they're not chapters
+        return sorted([d for d in os.listdir(self.content_path) if os.path.isdir(os.path.join(self.content_path, d)) and not d.startswith('.')])
 
 
     def format(self, output_path: str, chapters_per_pdf: int = None, pdf_chapter_naming_scheme: str = '[series_name] chapter [chapter_start]-[chapter_end]', series_name: str = ''):
@@ -396,6 +1045,317 @@ class SharedSeriesFormatterClass:
     
 
 
+def configure_sessions(pool_connections: int or None = None, pool_maxsize: int or None = None):
+    '''Changes the connection pool sizes used by get_session. Any sessions that already exist are closed, so the next request to their host makes a new session with the new sizes
+
+    Example Code:
+    from common import configure_sessions
+
+    # keeping up to 16 connections alive per host, for when 16 images are being downloaded at once
+    configure_sessions(pool_maxsize=16)
+    :param pool_connections: How many connection pools each session caches. Left as is if None
+    :param pool_maxsize: How many connections are kept alive per connection pool. Left as is if None'''
+    global session_pool_connections, session_pool_maxsize
+
+    with sessions_lock:
+        # updating the sizes
+        if pool_connections is not None:
+            session_pool_connections = pool_connections
+        if pool_maxsize is not None:
+            session_pool_maxsize = pool_maxsize
+
+        # then closing the old sessions, since their adapters were made with the old sizes
+        for session in sessions.values():
+            session.close()
+        sessions.clear()
+
+
+def get_session(url: str) -> requests.Session:
+    '''Returns the shared requests.Session for a url's hostname, making it if it doesn't exist yet
+    Requests made with the same session reuse their connections (keep-alive), so they don't need a new TCP connection and TLS handshake every time
+
+    Example Code:
+    from common import get_session
+
+    session = get_session('https://mangadex.org/title/a1c7c817-4e59-43b7-9365-09675a149a6f/one-piece')
+    response = session.get('https://mangadex.org/')
+    :param url: The url (or just the hostname) the session is for'''
+    # getting the hostname, and falling back to the url itself for things like 'mangadex.org' that don't have a scheme
+    hostname = parse.urlparse(url).hostname or url
+
+    with sessions_lock:
+        # making the session if this is the first request to this host
+        if sessions.get(hostname) is None:
+            session = requests.Session()
+
+            # the adapter is what holds the connection pool, so we mount one with our pool sizes for both schemes
+            adapter = requests.adapters.HTTPAdapter(pool_connections=session_pool_connections, pool_maxsize=session_pool_maxsize)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+
+            sessions[hostname] = session
+
+        return sessions[hostname]
+
+
+def request(method: str, url: str, retry_policy: retry.RetryPolicy or None = None, cache_ttl: float or None = None, **kwargs) -> requests.Response:
+    '''Sends a request with the shared session for the url's host (see get_session). This takes the same arguments as requests.request
+    All the scrapers and the image downloader request things through this (or get, post, and head), instead of requests.get and such
+    If cache_ttl is passed and the response cache is on (see cache.configure_default_cache), a cached response is returned if there's a fresh one, and successful responses are cached for cache_ttl seconds
+    If the cached response expired but has an ETag or Last-Modified header, it's revalidated with a conditional request, so if it hasn't changed the host only sends back headers (a 304) instead of the whole page
+
+    Example Code:
+    from common import request
+
+    # this is cached for an hour
+    response = request('GET', 'https://mangadex.org/', cache_ttl=60 * 60)
+    :param method: The HTTP method to use ('GET', 'POST', etc)
+    :param url: The url to request
+    :param retry_policy: The retry.RetryPolicy to use. Defaults to retry.default_retry_policy
+    :param cache_ttl: How many seconds the response can be cached for. If None, it isn't cached (this is for metadata requests like series and chapter pages, not images)'''
+    # streamed responses (like images) are never cached, since we don't want their whole body in memory
+    response_cache = cache.default_response_cache
+    if cache_ttl is None or response_cache is None or kwargs.get('stream'):
+        return send_request_with_retries(method, url, retry_policy, **kwargs)
+
+    # the cache key needs the full url (with it's query string) and body, so we build them the same way requests will
+    prepared_request = requests.Request(method, url, params=kwargs.get('params'), data=kwargs.get('data'), json=kwargs.get('json')).prepare()
+
+    # if we have a fresh response cached, we don't request anything
+    response = response_cache.get(method, prepared_request.url, prepared_request.body)
+    if response is not None:
+        return response
+
+    # if we have an expired one, we ask the host if it's changed since then (if we can)
+    stale_response = response_cache.get_stale(method, prepared_request.url, prepared_request.body)
+    validator_headers = cache.get_validator_headers(stale_response) if stale_response is not None else {}
+    if validator_headers:
+        kwargs['headers'] = {**(kwargs.get('headers') or {}), **validator_headers}
+
+    response = send_request_with_retries(method, url, retry_policy, **kwargs)
+
+    # if it hasn't changed, we use the cached one, and mark it as fresh again
+    if response.status_code == 304 and validator_headers:
+        response.close()
+        refreshed_response = response_cache.refresh_entry(method, prepared_request.url, response, cache_ttl, prepared_request.body)
+        return refreshed_response if refreshed_response is not None else stale_response
+
+    # otherwise we cache it if it went through
+    if response.status_code == 200:
+        response_cache.set(method, prepared_request.url, response, cache_ttl, prepared_request.body)
+    return response
+
+
+def set_request_deadline(deadline: float or None):
+    '''Sets a deadline for every request sent from the current thread, as a time.monotonic() time. Requests' timeouts are shortened so they can't go past it, and once it's passed requests raise a timeout instead of being sent (or retried)
+    This is so things like searches can give a site a set amount of time, and the thread searching it actually stops once that time is up
+
+    Example Code:
+    import time
+    from common import set_request_deadline, get
+
+    # every request from this thread has to be done within 5 seconds from now
+    set_request_deadline(time.monotonic() + 5)
+    response = get('https://put.your/url/here')
+    :param deadline: The time.monotonic() time requests have to be done by, or None to remove the deadline'''
+    request_deadlines.deadline = deadline
+
+
+def limit_timeout_to_deadline(timeout: float or tuple or None) -> float or tuple or None:
+    '''Returns the timeout shortened so it doesn't go past the current thread's request deadline (see set_request_deadline). If the deadline has already passed, a timeout is raised
+    :param timeout: The request's timeout, as a number of seconds, (connect timeout, read timeout), or None'''
+    deadline = getattr(request_deadlines, 'deadline', None)
+    if deadline is None:
+        return timeout
+
+    remaining_time = deadline - time.monotonic()
+    if remaining_time <= 0:
+        raise requests.exceptions.Timeout('Ran out of time before the request could be sent')
+    if timeout is None:
+        return remaining_time
+    elif isinstance(timeout, tuple):
+        return tuple(remaining_time if part is None else min(part, remaining_time) for part in timeout)
+    return min(timeout, remaining_time)
+
+
+def send_request_with_retries(method: str, url: str, retry_policy: retry.RetryPolicy or None = None, **kwargs) -> requests.Response:
+    '''Sends a request, retrying it if it fails with a connection error, timeout, or a status code like 429 or 503 (see retry.RetryPolicy). This takes the same arguments as requests.request
+    Use common.request instead unless you want to skip the response cache
+    :param method: The HTTP method to use ('GET', 'POST', etc)
+    :param url: The url to request
+    :param retry_policy: The retry.RetryPolicy to use. Defaults to retry.default_retry_policy'''
+    # requests that don't say how long to wait get the default timeout
+    kwargs.setdefault('timeout', request_timeout)
+    timeout = kwargs.pop('timeout')
+
+    # connection errors, timeouts, and status codes like 429 and 503 are retried with exponential backoff (see retry.RetryPolicy)
+    # every host also has a retry budget, so if a host is down we don't keep retrying everything sent to it
+    retry_policy = retry_policy or retry.default_retry_policy
+    retry_budget = retry.get_retry_budget(url)
+    retry_budget.record_request()
+    attempt = 0
+    while True:
+        # if the thread has a deadline, the timeout is shortened to fit in it. This is outside the try, since running out of time isn't retried
+        attempt_timeout = limit_timeout_to_deadline(timeout)
+        try:
+            response = send_request(method, url, timeout=attempt_timeout, **kwargs)
+        except Exception as e:
+            if retry_policy.is_retryable_exception(e) and retry_policy.can_retry(attempt, retry_budget):
+                time.sleep(retry_policy.get_backoff(attempt))
+                attempt += 1
+                continue
+            raise
+
+        # if it's a status code worth retrying (and we still can) we wait and try again, otherwise we return it, even if it's an error
+        if retry_policy.is_retryable_status(response.status_code) and retry_policy.can_retry(attempt, retry_budget):
+            response.close()
+            time.sleep(retry_policy.get_backoff(attempt, ratelimit.get_retry_after(response.headers)))
+            attempt += 1
+            continue
+
+        return response
+
+
+def send_request(method: str, url: str, **kwargs) -> requests.Response:
+    '''Sends a request once (no retrying) with the shared session for the url's host, after waiting for the host's rate limiter. This takes the same arguments as requests.request
+    Use common.request instead unless you're handling retrying yourself
+    Streamed responses (stream=True) keep their slot in the rate limiter until they're closed, so they have to be closed (like with a with block) once their body has been read
+    :param method: The HTTP method to use ('GET', 'POST', etc)
+    :param url: The url to request'''
+    # every request waits for the host's rate limiter first (see ratelimit.HostRateLimiter)
+    limiter = ratelimit.get_rate_limiter(url)
+    limiter.acquire()
+    try:
+        response = get_session(url).request(method, url, **kwargs)
+    except Exception:
+        limiter.release()
+        raise
+
+    # the slot is given back along with the status code, so the limiter can slow down if the host is telling us to
+    # normally that's as soon as we have the response, but streamed responses (like images) haven't read their body yet, so they keep the slot until they're closed
+    # otherwise max_concurrency wouldn't limit image downloads at all, since nearly all of their time is spent reading the body
+    status_code = response.status_code
+    retry_after = ratelimit.get_retry_after(response.headers)
+    if kwargs.get('stream'):
+        release_rate_limiter_slot_on_close(response, limiter, status_code, retry_after)
+    else:
+        limiter.release(status_code, retry_after)
+    return response
+
+
+def release_rate_limiter_slot_on_close(response: requests.Response, limiter: ratelimit.HostRateLimiter, status_code: int, retry_after: float or None):
+    '''Makes a streamed response give back it's rate limiter slot when it's closed, instead of right away. The slot is only given back once, even if the response is closed more than once
+    If the response is never closed, the slot is given back when the response is garbage collected, so a forgotten response can't take up a slot forever
+    :param response: The streamed response
+    :param limiter: The rate limiter the response took a slot from
+    :param status_code: The response's status code
+    :param retry_after: How many seconds the host said to wait (from the Retry-After header), if it did'''
+    release_lock = threading.Lock()
+    released = False
+
+    def release_slot():
+        nonlocal released
+        with release_lock:
+            if released:
+                return
+            released = True
+        limiter.release(status_code, retry_after)
+
+    close = response.close
+
+    def close_and_release_slot():
+        try:
+            close()
+        finally:
+            release_slot()
+
+    response.close = close_and_release_slot
+    weakref.finalize(response, release_slot)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    '''Sends a GET request with the shared session for the url's host. This takes the same arguments as requests.get, plus cache_ttl (see common.request)'''
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    '''Sends a POST request with the shared session for the url's host. This takes the same arguments as requests.post, plus cache_ttl (see common.request)'''
+    return request('POST', url, **kwargs)
+
+
+def head(url: str, **kwargs) -> requests.Response:
+    '''Sends a HEAD request with the shared session for the url's host. This takes the same arguments as requests.head'''
+    # requests.head doesn't follow redirects by default, so we keep it that way
+    kwargs.setdefault('allow_redirects', False)
+    return request('HEAD', url, **kwargs)
+
+
+def save_response_to_file(response: requests.Response, path: str, chunk_size: int = image_chunk_size, partial_download: PartialDownload or None = None) -> bool:
+    '''Writes a response's body to path in chunks, so the whole body is never in memory at once. The response should be requested with stream=True
+    The body is written to a temp file (path + temp_file_extension) first, then renamed to path once it's all written, so if the download is interrupted there's never a half written file at path
+    If the download is interrupted and the server gave an ETag or Last-Modified header, the temp file is kept so it can be resumed (see PartialDownload)
+    Returns False if the response was a 206 that didn't line up with the partial download, meaning nothing was saved and it should be requested again
+
+    Example Code:
+    from common import get, save_response_to_file
+
+    with get('https://put.your/image/url/here.png', stream=True) as response:
+        save_response_to_file(response, '/put/your/path/here/000.png')
+    :param response: The response to save
+    :param path: The path where the body will be saved
+    :param chunk_size: How many bytes to read and write at a time
+    :param partial_download: The PartialDownload the response's request was resumed with (see PartialDownload.get_resume_headers). If None, one is made for the response's url'''
+    if partial_download is None:
+        partial_download = PartialDownload(path, response.url)
+
+    if not partial_download.open(response.status_code, response.headers):
+        return False
+
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            partial_download.write(chunk)
+        partial_download.finish()
+    except BaseException:
+        # keeping what we got (if it can be resumed) before passing on the error
+        partial_download.abort()
+        raise
+
+    return True
+
+
+def get_response_validator(headers) -> str or None:
+    '''Returns the header value a partial download of a response can be resumed with (with If-Range), or None if it can't be resumed
+    That's the ETag (if it's not a weak one) or Last-Modified. Responses that are compressed (Content-Encoding) or say they don't support ranges can't be resumed'''
+    # if it's compressed, the bytes we write aren't the bytes the server counts ranges in
+    if headers.get('Content-Encoding', 'identity').lower() != 'identity' or headers.get('Accept-Ranges', '').lower() == 'none':
+        return None
+
+    # weak ETags (W/"...") can't be used with If-Range
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+
+    return headers.get('Last-Modified')
+
+
+def remove_file_if_exists(path: str):
+    '''Removes the file at path, and does nothing if there's no file there'''
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def get_aiohttp():
+    '''Imports and returns aiohttp, which is only needed for the asyncio download engine (async_download)
+    It's imported here instead of at the top of the file since it's an optional dependency'''
+    try:
+        import aiohttp
+    except ImportError:
+        raise Exception('Downloading with asyncio requires aiohttp, which isn\'t installed. To install it run:\npip install mangadl[async]')
+    return aiohttp
+
+
 def get_correct_output_path(output_path: str, name: str) -> str:
     '''If the output path's base name name equals name, then it returns output_path. Otherwise, it creates a directory inside the output_path directory with it's name being the name parameter, and returns that path'''
     if os.path.basename(output_path) == name:
@@ -412,6 +1372,168 @@ def get_correct_output_path(output_path: str, name: str) -> str:
         return os.path.join(output_path, name)
 
 
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    '''A ThreadPoolExecutor that runs everything submitted to it in a copy of the submitting thread's context (see contextvars), the same way asyncio.to_thread does
+    This is so things kept in context variables follow the work into the pool's threads. For example, the daemon uses one to send what a job prints to that job's output (see daemon.ThreadOutputRouter), including what's printed by the threads downloading it's images
+
+    Example Code:
+    from common import ContextThreadPoolExecutor
+
+    with ContextThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(str.upper, ['a', 'b', 'c']))
+    '''
+
+    def submit(self, fn, /, *args, **kwargs):
+        # every task gets it's own copy, since one context can't be used by two threads at once
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def iterate_chapters_with_img_urls(chapter_objects: list[SharedChapterClass], chapters_in_flight: int = 0):
+    '''Yields (chapter_object, img_urls) for every chapter object in order, while getting the image urls for the next chapters_in_flight chapters in the background
+    This is so the html/api requests for upcoming chapters happen while the current chapter's images are being downloaded, instead of in between chapters
+    img_urls is None for chapters that weren't gotten ahead of time (the first chapter, or every chapter if chapters_in_flight is 0), so download streams them with iter_img_urls, and starts downloading images while the rest of the urls are still being found
+    If getting a chapter's image urls raises an error, it's raised when that chapter is reached, the same as if it had been requested right then
+
+    Example Code:
+    from common import iterate_chapters_with_img_urls
+    from scrapers.mangaread import Chapter
+
+    chapter_objects = [Chapter(url) for url in chapter_urls]
+
+    # this gets the image urls for up to 3 chapters ahead of the one being downloaded
+    for chapter_object, img_urls in iterate_chapters_with_img_urls(chapter_objects, 3):
+        chapter_object.download('/put/your/path/here', img_urls=img_urls)
+    :param chapter_objects: The chapter objects to get the image urls for
+    :param chapters_in_flight: How many upcoming chapters to get the image urls for ahead of time. 0 gets them one at a time when they're reached'''
+    # if there's nothing to get ahead of time, every chapter streams it's image urls when it's downloaded
+    if chapters_in_flight <= 0:
+        for chapter_object in chapter_objects:
+            yield chapter_object, None
+        return
+
+    # this stores the chapters that are getting their image urls, along with their future, in order
+    pending_chapters = deque()
+    chapter_objects_iterator = iter(chapter_objects)
+    executor = ContextThreadPoolExecutor(max_workers=chapters_in_flight)
+
+    def fill_pending_chapters():
+        # this starts getting the image urls for chapters until there's chapters_in_flight chapters waiting
+        while len(pending_chapters) < chapters_in_flight:
+            chapter_object = next(chapter_objects_iterator, None)
+            if chapter_object is None:
+                break
+            pending_chapters.append((chapter_object, executor.submit(collect_img_urls, chapter_object)))
+
+    try:
+        # the first chapter would just be waited on right away, so it isn't gotten ahead of time. It streams it's image urls instead, while the next chapters get theirs
+        first_chapter_object = next(chapter_objects_iterator, None)
+        if first_chapter_object is None:
+            return
+        fill_pending_chapters()
+        yield first_chapter_object, None
+
+        while pending_chapters:
+            # waiting on the next chapter's image urls
+            chapter_object, future = pending_chapters.popleft()
+            img_urls = future.result()
+
+            # now that there's room, we start on another chapter before handing this one over to be downloaded
+            fill_pending_chapters()
+            yield chapter_object, img_urls
+    finally:
+        # if we stopped early (from an error or a break), we don't get the image urls for the chapters that haven't started yet
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def collect_img_urls(chapter_object: SharedChapterClass) -> list[str]:
+    '''Gets every one of a chapter's image urls with it's iter_img_urls, and returns them in order. This is how iterate_chapters_with_img_urls gets chapters' image urls ahead of time, so scrapers that find them a page at a time (like mangatown) still find them concurrently
+    :param chapter_object: The chapter to get the image urls for'''
+    img_urls = []
+    for i, img_url, image_count in chapter_object.iter_img_urls():
+        if not img_urls:
+            img_urls = [None] * image_count
+        img_urls[i] = img_url
+    return img_urls
+
+
+def get_chapters_to_download(chapter_objects: list[SharedChapterClass], redownload: bool = False, journal: DownloadJournal or None = None, show_updates_in_terminal: bool = True) -> list[tuple[int, SharedChapterClass]]:
+    '''Returns (index, chapter_object) for every chapter object that the journal doesn't say is already downloaded. The index is the chapter's index in chapter_objects, for progress updates
+    This doesn't request anything, so finished chapters are skipped without fetching their image urls
+
+    Example Code:
+    from common import get_chapters_to_download
+    from journal import open_journal
+
+    for i, chapter_object in get_chapters_to_download(chapter_objects, journal=open_journal('/put/your/path/here')):
+        chapter_object.download('/put/your/path/here')
+    :param chapter_objects: The chapter objects that would be downloaded
+    :param redownload: If chapters should be redownloaded, even if already downloaded. If True, every chapter is returned
+    :param journal: The journal keeping track of what's been downloaded. If None, every chapter is returned
+    :param show_updates_in_terminal: If a message should be printed for every chapter that's skipped'''
+    chapters_to_download = []
+    for i, chapter_object in enumerate(chapter_objects):
+        if not redownload and journal is not None and journal.is_chapter_complete(chapter_object.url):
+            if show_updates_in_terminal:
+                print_chapter_already_downloaded_message(i + 1)
+            continue
+        chapters_to_download.append((i, chapter_object))
+    return chapters_to_download
+
+
+def get_image_indexes_to_download(chapter_url: str, output_path: str, img_urls: list[str], image_paths: list[str], redownload: bool = False, journal: DownloadJournal or None = None) -> list[int]:
+    '''Returns the indexes of the images in a chapter that need to be downloaded. Without a journal (or if redownload is True) that's all of them, otherwise it's the ones the journal doesn't have, or that are missing or cut off on disk
+    This also records the chapter as started in the journal
+    :param chapter_url: The url of the chapter
+    :param output_path: The directory the chapter's images are saved in
+    :param img_urls: The urls to the chapter's images
+    :param image_paths: The paths the chapter's images are saved to, in the same order as img_urls
+    :param redownload: If every image should be downloaded, even if already downloaded
+    :param journal: The journal keeping track of what's been downloaded'''
+    if journal is None:
+        return list(range(len(img_urls)))
+
+    image_indexes = [i for i in range(len(img_urls)) if redownload or not journal.is_image_complete(chapter_url, i, img_urls[i], image_paths[i])]
+    journal.start_chapter(chapter_url, output_path, len(img_urls))
+    return image_indexes
+
+
+def link_image_from_store(chapter_url: str, image_index: int, img_url: str, image_path: str, journal: DownloadJournal or None = None, store: ContentStore or None = None) -> bool:
+    '''If the journal says the image at img_url was downloaded before, and it's in the store, this links it to image_path (and records it in the journal) so it doesn't have to be downloaded again
+    Returns True if it was linked, otherwise returns False (including if there's no journal or store)
+    :param chapter_url: The url of the chapter the image is from
+    :param image_index: The image's index in the chapter
+    :param img_url: The url to the image
+    :param image_path: The path the image would be saved to
+    :param journal: The journal keeping track of what's been downloaded
+    :param store: The content store the images are kept in'''
+    if journal is None or store is None:
+        return False
+
+    sha256 = journal.get_image_hash(img_url)
+    if sha256 is None or not store.has(sha256):
+        return False
+
+    store.link(sha256, image_path)
+    journal.record_image(chapter_url, image_index, img_url, image_path, sha256=sha256)
+    return True
+
+
+def record_downloaded_image(chapter_url: str, image_index: int, img_url: str, image_path: str, image_downloaded: bool = True, journal: DownloadJournal or None = None, store: ContentStore or None = None):
+    '''Adds a freshly downloaded image to the store and the journal (if there are ones). Images that failed (and were only saved because of replace_image_failed_error_with_warning) aren't added to the store
+    :param chapter_url: The url of the chapter the image is from
+    :param image_index: The image's index in the chapter
+    :param img_url: The url to the image
+    :param image_path: The path the image was saved to
+    :param image_downloaded: If the image was downloaded successfully (what download_image returns)
+    :param journal: The journal keeping track of what's been downloaded
+    :param store: The content store the images are kept in'''
+    # the store hashes the image, so we pass that on to the journal instead of hashing it twice
+    sha256 = store.add(image_path) if store is not None and image_downloaded else None
+
+    if journal is not None:
+        journal.record_image(chapter_url, image_index, img_url, image_path, complete=image_downloaded, sha256=sha256)
+
+
 def generate_text_with_link(uri, label=None) -> str:
     '''Returns a string that when printed in a modern terminal will show text that when clicked leads to a url
     Note: the uri must have a scheme for terminals to interpret it as a link ('http://' or 'https://')
@@ -435,8 +1557,72 @@ def generate_text_with_link(uri, label=None) -> str:
 
     return escape_mask.format(parameters, uri, label)
 
-def sort_search_results(search_results: list[SearchResult], query: str) -> list[SearchResult]:
+def cached_value(key: str, cache_ttl: float, get_value: callable):
+    '''Returns a value a scraper works out from it's responses (like how many images a chapter has) from the response cache, or works it out with get_value and caches it if it isn't there
+    If there's no response cache configured (see cache.configure_default_cache) this just calls get_value
+
+    Example Code:
+    from common import cached_value
+
+    image_count = cached_value(f'1manga image count {chapter_url}', 24 * 60 * 60, lambda: find_image_count(chapter_url))
+    :param key: The value's key, which should start with the scraper's website ID so scrapers don't use each other's keys
+    :param cache_ttl: How many seconds the value can be cached for
+    :param get_value: A function that works the value out. What it returns has to be able to be turned into json'''
+    response_cache = cache.default_response_cache
+
+    # first we check the cache
+    if response_cache is not None:
+        value = response_cache.get_value(key)
+        if value is not None:
+            return value
+
+    # if it wasn't there, we work it out and store it for next time
+    value = get_value()
+    if response_cache is not None and value is not None:
+        response_cache.set_value(key, value, cache_ttl)
+    return value
+
+
+def cached_search(website_id: str, search_function: callable, query: str, adult: bool or None = None, limit: int or None = None) -> list[SearchResult]:
+    '''Searches a site with search_function, unless the same search is in cache.default_search_cache, in which case the cached results are returned without sending any requests
+    If there's no search cache configured (see cache.configure_default_search_cache) this just calls search_function
+
+    Example Code:
+    from scrapers.mangadex import search
+    from common import cached_search
+
+    search_results = cached_search('mangadex', search, 'One Piece', None, 3)
+    :param website_id: The id of the site being searched
+    :param search_function: The site's search function
+    :param query: The string to search
+    :param adult: If it should include only adult (True), only non-adult (False), or both (None).
+    :param limit: The most results to return. If None, every result is returned'''
+    search_cache = cache.default_search_cache
+
+    # first we check the cache
+    if search_cache is not None:
+        cached_search_results = search_cache.get(website_id, query, adult, limit)
+        if cached_search_results is not None:
+            return [SearchResult(name, url, result_website_id) for name, url, result_website_id in cached_search_results]
+
+    # if it wasn't there, we search the site and store the results for next time
+    search_results = search_function(query, adult, limit=limit)
+    if search_cache is not None:
+        search_cache.set(website_id, query, adult, limit, [(search_result.name, search_result.url, search_result.website_id) for search_result in search_results])
+
+    return search_results
+
+
+def get_search_candidate_count(limit: int) -> int:
+    '''Returns how many results a search function should ask a site's api for when it only needs limit of them, so sort_search_results has more than the api's first few results to pick the best limit from
+    :param limit: How many results the search function will return'''
+    return max(limit * search_candidates_per_result, min_search_candidates)
+
+
+def sort_search_results(search_results: list[SearchResult], query: str, limit: int or None = None) -> list[SearchResult]:
     '''Sorts all the passed in search results by how close their title is to the query
+    If limit is passed, only the best limit results are returned, and the rest aren't sorted at all
+    The actual scoring is done by ranking.get_top_matches, see that for how similarity is measured
 
     Example Code:
     from scrapers.mangaread import search
@@ -448,26 +1634,12 @@ def sort_search_results(search_results: list[SearchResult], query: str) -> list[
     # first we search to get a list of SearchResults we can sort
     search_results = search(query)
 
-    # this is sorting them
-    sorted_search_results = sort_search_results(search_results, query)'''
-    # first we define a variable to store our list of sorted results
-    similarity_list = []
-
-    # then we calculate similarity scores using a for loop
-    for obj in search_results:
-        score = difflib.SequenceMatcher(None, obj.name, query).ratio()
-        similarity_list.append((obj, score))
-
-    # Sort the list of tuples based on the similarity score
-    similarity_list.sort(key=lambda x: x[1], reverse=True)
-
-    # then we extract the objects from the sorted list of results, and we've done it!
-    sorted_results = []
-    for object, score in similarity_list:
-        sorted_results.append(object)
-
-    # finally we return the sorted results
-    return sorted_results
+    # this is sorting them, and only keeping the best 3
+    sorted_search_results = sort_search_results(search_results, query, 3)
+    :param search_results: The search results to sort
+    :param query: The query they're sorted by how close they are to
+    :param limit: The most results to return. If None, every result is returned'''
+    return ranking.get_top_matches(search_results, query, limit)
 
 
 def print_image_download_end(url: str, total_images: int, chapter_number: int, chapter_count: int) -> None:
@@ -512,7 +1684,22 @@ def print_image_download_start(url: str, total_images: int, chapter_number: int,
     :param total_images: The second number in the progress indicator (0/total_images)'''
     print(f'\r{url}: 0/{total_images} (chapter {chapter_number}/{chapter_count})', end='')
 
-def construct_chapter_not_found_image(chapter_urls: list[str], input_chapter: int):
+def get_chapter_url(chapter: str or ChapterInfo) -> str:
+    '''Returns the url of a chapter from get_chapters or get_chapter_urls, so code can take either
+    :param chapter: A ChapterInfo object, or a chapter url'''
+    return chapter.url if isinstance(chapter, ChapterInfo) else chapter
+
+
+def parse_chapter_number(chapter_number) -> float or None:
+    '''Turns a chapter number from a website's chapter listing (like 12, '145.5', or None) into a float. Returns None if it isn't a number (like some websites' oneshots, or '10a')
+    :param chapter_number: The chapter number from the listing'''
+    try:
+        return float(chapter_number)
+    except (TypeError, ValueError):
+        return None
+
+
+def construct_chapter_not_found_image(chapter_urls: list[str] or list[ChapterInfo], input_chapter: int):
     '''Returns a string like this:
 
     <inputted chapter here> wasn't a valid chapter. There are only <amount of chapters> chapters, these are the available chapters to download. To download one, type the number before the ':'
@@ -520,16 +1707,18 @@ def construct_chapter_not_found_image(chapter_urls: list[str], input_chapter: in
     1: <url here>
     etc
 
+    If ChapterInfo objects are passed, their numbers and titles are shown too (when the listing had them)
+
     Example Code:
 
     chapter_urls_list = ['google.com', 'duckduckgo.com', 'bing.com', 'yahoo.com']
 
     print(construct_chapter_not_found_image(chapter_urls, 9999999))
-    :param chapter_urls: The list of chapter urls
+    :param chapter_urls: The list of chapter urls or ChapterInfo objects
     :param input_chapter: The invalid input chapter the user gave'''
     url_list_dialog = ''
-    for i, chapter_url in enumerate(chapter_urls):
-        url_list_dialog += f'{i}: {chapter_url}\n'
+    for i, chapter in enumerate(chapter_urls):
+        url_list_dialog += f'{i}: {chapter}\n'
 
     # constructing the full dialog
     full_dialog = f'{url_list_dialog}{input_chapter} wasn\'t a valid chapter. There are only {len(chapter_urls)} chapters. These are the available chapters to download. To download one, type the number before the \':\'.\n'
@@ -538,6 +1727,11 @@ def construct_chapter_not_found_image(chapter_urls: list[str], input_chapter: in
     return full_dialog
 
 
+def print_image_failed_warning(img_url: str, status_code: int):
+    '''Prints a warning that an image couldn't be downloaded. This is for scrapers with replace_image_failed_error_with_warning toggled'''
+    print(f'\033[91m Got status code {status_code} when requesting \'{img_url}\'. It is highly recommended that you use another source, since downloading here may not get you all the images. This scraper has opted to replace errors with warnings, meaning this is expected behavior.\033[00m')
+
+
 def print_chapter_already_downloaded_message(chapter_num: int):
     print(f'Chapter {chapter_num} already downloaded, skipping... (pass --redownload to force redownloading)')
 
@@ -0,0 +1,529 @@
+import collections
+import contextvars
+import hmac
+import itertools
+import json
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from mangadl import cache
+from mangadl import journal as download_journal
+from mangadl import store as download_store
+
+# this is where the daemon listens by default. It's only on localhost, so other computers can't reach it
+default_daemon_host = '127.0.0.1'
+default_daemon_port = 8420
+
+# every request to the daemon has to have the daemon's token in this header, so web pages (and other users) can't send it jobs
+# the token is kept in this file in the cache directory (see get_token), which only the user running the daemon can read
+token_header = 'X-Mangadl-Token'
+token_filename = 'daemon.token'
+
+# these are the addresses that count as localhost. When the daemon is listening on one of them, requests have to be addressed to localhost (by their Host header), so a web page can't reach it with dns rebinding
+loopback_hosts = ['127.0.0.1', 'localhost', '::1']
+
+# this is how many lines of each job's output are kept, for the client to show (older lines are thrown away)
+job_output_lines = 200
+
+# this is how many seconds the client waits between asking the daemon how a job is doing
+job_poll_interval = 0.5
+
+# these are the states a job can be in
+job_statuses = ['queued', 'running', 'finished', 'failed', 'cancelled']
+done_job_statuses = ['finished', 'failed', 'cancelled']
+
+# jobs that are done are forgotten after this many seconds, and only this many of the newest ones are kept, so a daemon that runs for a long time doesn't keep every job it's ever run in memory
+done_job_ttl = 60 * 60
+done_job_limit = 100
+
+
+def get_token_path() -> str:
+    '''Returns the path to the file the daemon's token is kept in'''
+    return os.path.join(cache.get_default_cache_directory(), token_filename)
+
+
+def get_token(path: str or None = None) -> str:
+    '''Returns the daemon's token, making it (and it's file) the first time. The file can only be read by the user who made it, so only they can send jobs to the daemon
+    The same token is used every time the daemon starts, so clients don't need to know when it was restarted
+    :param path: The path to the token's file. Defaults to get_token_path()'''
+    path = path or get_token_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        # O_EXCL makes this fail if the file already exists, so two daemons starting at once can't make different tokens
+        token_file = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # making sure nobody else can read it, in case it's permissions were changed
+        os.chmod(path, 0o600)
+        return read_token(path)
+    with os.fdopen(token_file, 'w') as token_file:
+        token = secrets.token_urlsafe(32)
+        token_file.write(token)
+    return token
+
+
+def read_token(path: str or None = None) -> str or None:
+    '''Returns the daemon's token from it's file, or None if there isn't one (like if the daemon has never been started by this user)
+    :param path: The path to the token's file. Defaults to get_token_path()'''
+    try:
+        with open(path or get_token_path()) as token_file:
+            return token_file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+# this is the output of the job that's running in the current context, if there is one (see ThreadOutputRouter)
+current_job_output: contextvars.ContextVar = contextvars.ContextVar('current_job_output', default=None)
+
+
+class JobOutput:
+    '''Stores everything a job prints, so it can be shown by the client that started it
+    Lines that are rewritten with \\r (like the image download progress) only keep their latest version, so the current line is always the job's latest progress'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lines = collections.deque(maxlen=job_output_lines)
+        # this is how many lines have been finished in total, including ones that were thrown away, so the client knows which ones it hasn't shown yet
+        self.line_count = 0
+        self.current_line = ''
+
+    def write(self, text: str):
+        '''Adds printed text to the output
+        :param text: The text that was printed'''
+        with self.lock:
+            *finished_lines, self.current_line = (self.current_line + text).split('\n')
+            for line in finished_lines:
+                # everything before the last \r was overwritten in a terminal, so we throw it away too
+                self.lines.append(line.rsplit('\r', 1)[-1])
+                self.line_count += 1
+            self.current_line = self.current_line.rsplit('\r', 1)[-1]
+
+    def to_dict(self) -> dict:
+        '''Returns the output as a dict that can be turned into json'''
+        with self.lock:
+            return {'output': list(self.lines), 'output_line_count': self.line_count, 'progress': self.current_line}
+
+
+class ThreadOutputRouter:
+    '''Replaces sys.stdout in the daemon, so whatever a job prints goes to that job's output (see JobOutput) instead of the daemon's terminal
+    The job's output is kept in a context variable (current_job_output), so it follows the job into the threads it starts with common.ContextThreadPoolExecutor (like the ones downloading images, or searching sites), and what they print goes to the job's output too
+    Everything printed outside of a job is written to the original stdout like normal
+    This lets the download functions print their progress the same way they do in the cli, without knowing they're in the daemon'''
+
+    def __init__(self, stream):
+        ''':param stream: The stream everything that isn't from a job is written to, which is usually the original sys.stdout'''
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        output = current_job_output.get()
+        if output is None:
+            return self.stream.write(text)
+        output.write(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name: str):
+        # everything else (like isatty and encoding) comes from the original stream
+        return getattr(self.stream, name)
+
+    def capture(self, output: JobOutput):
+        '''Sends everything printed by the current thread (and the threads it starts with it's context) to output, until release is called
+        :param output: The job's output'''
+        current_job_output.set(output)
+
+    def release(self):
+        '''Stops sending what the current thread prints to a job's output'''
+        current_job_output.set(None)
+
+
+class Job:
+    '''A download, search, or format that was sent to the daemon, along with it's status and output'''
+
+    def __init__(self, job_id: str, job_type: str, parameters: dict):
+        ''':param job_id: The job's ID, which is used to ask for it's status
+        :param job_type: What kind of job it is, like 'download'. There has to be a runner for it in the JobManager
+        :param parameters: The job's parameters, which are passed to it's runner'''
+        self.id = job_id
+        self.type = job_type
+        self.parameters = parameters
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.output = JobOutput()
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self, include_output: bool = True) -> dict:
+        '''Returns the job as a dict that can be turned into json
+        :param include_output: If the job's output should be included. It's left out when listing every job, since it can be long'''
+        job_dict = {
+            'id': self.id,
+            'type': self.type,
+            'parameters': self.parameters,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if include_output:
+            job_dict.update(self.output.to_dict())
+        return job_dict
+
+
+class JobManager:
+    '''Runs the jobs sent to the daemon on a set amount of worker threads, in the order they were sent
+    Journals and content stores are kept open between jobs, so jobs downloading to the same place don't have to open them again
+
+    Example Code:
+    from daemon import JobManager
+
+    def run_echo_job(job_manager, parameters):
+        print(parameters.get('text'))
+        return parameters.get('text')
+
+    job_manager = JobManager({'echo': run_echo_job}, worker_count=2)
+    job_manager.start()
+
+    job = job_manager.submit('echo', {'text': 'hello'})
+    '''
+
+    def __init__(self, job_runners: dict[str, callable], worker_count: int = 2, output_router: ThreadOutputRouter or None = None):
+        ''':param job_runners: The function that runs each type of job, by job type. They're called with the JobManager and the job's parameters, and what they return is the job's result (so it has to be able to be turned into json)
+        :param worker_count: How many jobs can run at the same time
+        :param output_router: The router that sends what jobs print to their output. If None, what jobs print isn't captured'''
+        self.job_runners = job_runners
+        self.worker_count = worker_count
+        self.output_router = output_router
+        self.jobs: dict[str, Job] = {}
+        self.job_queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.job_ids = itertools.count(1)
+        self.journals: dict[tuple[str, bool], download_journal.DownloadJournal] = {}
+        self.stores: dict[str, download_store.ContentStore] = {}
+        self.started_at = time.time()
+
+    def start(self):
+        '''Starts the worker threads. They're daemon threads, so they don't stop the daemon from exiting'''
+        for _ in range(max(1, self.worker_count)):
+            threading.Thread(target=self.run_worker, daemon=True).start()
+
+    def submit(self, job_type: str, parameters: dict) -> Job:
+        '''Adds a job to the queue, and returns it
+        :param job_type: What kind of job it is, like 'download'
+        :param parameters: The job's parameters'''
+        if job_type not in self.job_runners:
+            raise Exception(f'\'{job_type}\' isn\'t a type of job. The types of jobs are: {', '.join(self.job_runners.keys())}')
+
+        with self.lock:
+            self.forget_old_jobs()
+            job = Job(str(next(self.job_ids)), job_type, parameters)
+            self.jobs[job.id] = job
+        self.job_queue.put(job)
+        return job
+
+    def forget_old_jobs(self):
+        '''Forgets jobs that have been done for more than done_job_ttl seconds, and the oldest done jobs past the newest done_job_limit of them. Queued and running jobs are always kept
+        This has to be called with self.lock held'''
+        done_jobs = [job for job in self.jobs.values() if job.status in done_job_statuses and job.finished_at is not None]
+        done_jobs.sort(key=lambda job: job.finished_at)
+        oldest_kept_time = time.time() - done_job_ttl
+        for i, job in enumerate(done_jobs):
+            if job.finished_at < oldest_kept_time or i < len(done_jobs) - done_job_limit:
+                del self.jobs[job.id]
+
+    def get_job(self, job_id: str) -> Job or None:
+        '''Returns a job by it's ID, or None if there isn't one with that ID
+        :param job_id: The job's ID'''
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def get_jobs(self) -> list[Job]:
+        '''Returns every job the daemon still has, oldest first (jobs that have been done for a while are forgotten, see forget_old_jobs)'''
+        with self.lock:
+            self.forget_old_jobs()
+            return list(self.jobs.values())
+
+    def cancel(self, job_id: str) -> bool:
+        '''Cancels a job if it hasn't started yet. Returns True if it was cancelled, and False if it had already started (jobs can't be stopped partway through)
+        :param job_id: The job's ID'''
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status != 'queued':
+                return False
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+            return True
+
+    def get_status(self) -> dict:
+        '''Returns how long the daemon has been running, and how many jobs are in each state, as a dict that can be turned into json'''
+        job_counts = {status: 0 for status in job_statuses}
+        for job in self.get_jobs():
+            job_counts[job.status] += 1
+        return {'started_at': self.started_at, 'uptime': time.time() - self.started_at, 'worker_count': self.worker_count, 'jobs': job_counts}
+
+    def get_journal(self, output_path: str, verify_hashes: bool = False) -> download_journal.DownloadJournal:
+        '''Returns the journal for an output path, opening it the first time it's needed (see journal.open_journal)
+        :param output_path: The directory everything is being downloaded to
+        :param verify_hashes: If images should be hashed again when checking if they're complete'''
+        with self.lock:
+            if (output_path, verify_hashes) not in self.journals:
+                self.journals[(output_path, verify_hashes)] = download_journal.open_journal(output_path, verify_hashes=verify_hashes)
+            return self.journals[(output_path, verify_hashes)]
+
+    def get_store(self, output_path: str) -> download_store.ContentStore:
+        '''Returns the content store for an output path, opening it the first time it's needed (see store.open_store)
+        :param output_path: The directory everything is being downloaded to'''
+        with self.lock:
+            if output_path not in self.stores:
+                self.stores[output_path] = download_store.open_store(output_path)
+            return self.stores[output_path]
+
+    def run_worker(self):
+        '''Runs jobs from the queue one after another, forever'''
+        while True:
+            job = self.job_queue.get()
+
+            # the job may have been cancelled while it was waiting
+            with self.lock:
+                if job.status != 'queued':
+                    continue
+                job.status = 'running'
+                job.started_at = time.time()
+
+            if self.output_router is not None:
+                self.output_router.capture(job.output)
+            try:
+                job.result = self.job_runners[job.type](self, job.parameters)
+                job.status = 'finished'
+            except BaseException as e:
+                # we catch everything (even SystemExit from argparse or sys.exit), so one bad job can't stop a worker
+                job.error = str(e) or type(e).__name__
+                job.status = 'failed'
+            finally:
+                if self.output_router is not None:
+                    self.output_router.release()
+                job.finished_at = time.time()
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    '''Handles the daemon's json api. The endpoints are:
+    GET /status - How long the daemon has been running, and how many jobs are in each state
+    GET /jobs - Every job (without their output). Jobs that are done are only kept for an hour, and only the newest 100 of them (see done_job_ttl and done_job_limit)
+    POST /jobs - Adds a job. The body is like {"type": "download", "parameters": {"url": "..."}}, and the new job is returned
+    GET /jobs/<id> - A job, with it's output and progress
+    DELETE /jobs/<id> - Cancels a job that hasn't started yet
+
+    Every request has to have the daemon's token in the X-Mangadl-Token header (see get_token), and POST bodies have to be sent as application/json
+    This is so a web page open in the user's browser can't send the daemon jobs, since browsers let pages send some requests (like text/plain POSTs) to any address without asking'''
+
+    def check_request(self, has_body: bool = False) -> bool:
+        '''Makes sure the request is allowed (see the class' docstring). If it isn't, an error is sent back and False is returned
+        :param has_body: If the request has a json body that needs to be checked'''
+        # if the daemon is only on localhost, the request has to be addressed to localhost, so a web page can't reach it through a domain that was pointed at 127.0.0.1 (dns rebinding)
+        if self.server.allowed_hosts is not None and self.headers.get('Host', '').lower() not in self.server.allowed_hosts:
+            self.send_json(403, {'error': f'Requests have to be sent to {' or '.join(sorted(self.server.allowed_hosts))}'})
+            return False
+
+        if not hmac.compare_digest(self.headers.get(token_header, '').encode(), self.server.token.encode()):
+            self.send_json(403, {'error': f'Missing or wrong {token_header} header. The token is in {get_token_path()}'})
+            return False
+
+        if has_body and self.headers.get('Content-Type', '').split(';')[0].strip().lower() != 'application/json':
+            self.send_json(415, {'error': 'The body has to be sent as application/json'})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self.check_request():
+            return
+        path = self.path.split('?', 1)[0].rstrip('/')
+        job_manager = self.server.job_manager
+
+        if path == '/status':
+            self.send_json(200, job_manager.get_status())
+        elif path == '/jobs':
+            self.send_json(200, {'jobs': [job.to_dict(include_output=False) for job in job_manager.get_jobs()]})
+        elif path.startswith('/jobs/'):
+            job = job_manager.get_job(path.removeprefix('/jobs/'))
+            if job is None:
+                self.send_json(404, {'error': f'There is no job with the ID \'{path.removeprefix('/jobs/')}\''})
+            else:
+                self.send_json(200, job.to_dict())
+        else:
+            self.send_json(404, {'error': f'\'{path}\' isn\'t an endpoint'})
+
+    def do_POST(self):
+        if not self.check_request(has_body=True):
+            return
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path != '/jobs':
+            self.send_json(404, {'error': f'\'{path}\' isn\'t an endpoint'})
+            return
+
+        # reading the job from the body
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            job = self.server.job_manager.submit(body.get('type'), body.get('parameters') or {})
+        except Exception as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        self.send_json(201, job.to_dict())
+
+    def do_DELETE(self):
+        if not self.check_request():
+            return
+        path = self.path.split('?', 1)[0].rstrip('/')
+        job_manager = self.server.job_manager
+        job = job_manager.get_job(path.removeprefix('/jobs/')) if path.startswith('/jobs/') else None
+
+        if job is None:
+            self.send_json(404, {'error': f'There is no job at \'{path}\''})
+        elif not job_manager.cancel(job.id):
+            self.send_json(409, {'error': f'Job {job.id} is {job.status}, and only queued jobs can be cancelled'})
+        else:
+            self.send_json(200, job.to_dict())
+
+    def send_json(self, status_code: int, data: dict):
+        '''Sends a json response
+        :param status_code: The response's status code
+        :param data: What to send as json'''
+        body = json.dumps(data).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # clients ask for their job's status a couple times a second, so we don't log every request
+        pass
+
+
+def serve(job_runners: dict[str, callable], host: str = default_daemon_host, port: int = default_daemon_port, worker_count: int = 2, token_path: str or None = None):
+    '''Runs the daemon until it's stopped (with ctrl+c). It keeps one process (and everything it has warmed up, like the connection pools, caches, and url router) for every job, instead of starting a new one each time
+
+    Example Code:
+    from daemon import serve
+
+    serve({'echo': lambda job_manager, parameters: parameters}, port=8420)
+    :param job_runners: The function that runs each type of job, by job type (see JobManager)
+    :param host: The address to listen on. Defaults to localhost, so other computers can't reach it (they'd also need the token)
+    :param port: The port to listen on
+    :param worker_count: How many jobs can run at the same time
+    :param token_path: The path to the file the daemon's token is kept in. Defaults to get_token_path()'''
+    # everything jobs print goes to their output, instead of the daemon's terminal
+    output_router = ThreadOutputRouter(sys.stdout)
+    sys.stdout = output_router
+
+    job_manager = JobManager(job_runners, worker_count, output_router)
+    job_manager.start()
+
+    server = ThreadingHTTPServer((host, port), DaemonRequestHandler)
+    server.daemon_threads = True
+    server.job_manager = job_manager
+    server.token = get_token(token_path)
+    # if the daemon is only on localhost, requests have to be addressed to it as localhost (see DaemonRequestHandler.check_request)
+    # if it's listening on other addresses, they can be addressed however, and only the token is checked
+    server.allowed_hosts = {f'{loopback_host if ':' not in loopback_host else f'[{loopback_host}]'}:{server.server_address[1]}' for loopback_host in loopback_hosts} if host in loopback_hosts else None
+
+    print(f'mangadl daemon listening on http://{host}:{server.server_address[1]} with {worker_count} worker{'s' if worker_count != 1 else ''}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sys.stdout = output_router.stream
+
+
+class DaemonClient:
+    '''Sends jobs to a running daemon (see serve), and waits for them to finish
+
+    Example Code:
+    from daemon import DaemonClient
+
+    daemon_client = DaemonClient('http://127.0.0.1:8420')
+
+    job = daemon_client.submit_job('search', {'query': 'One Piece'})
+    job = daemon_client.wait_for_job(job['id'])
+
+    print(job['result'])
+    '''
+
+    def __init__(self, url: str, token: str or None = None):
+        ''':param url: The url of the daemon, like 'http://127.0.0.1:8420'. http:// is added if it isn't there
+        :param token: The daemon's token. If None, it's taken from MANGADL_DAEMON_TOKEN, or the token file the daemon made (see get_token)'''
+        self.url = (url if '://' in url else f'http://{url}').rstrip('/')
+        self.session = requests.Session()
+        token = token or os.environ.get('MANGADL_DAEMON_TOKEN') or read_token()
+        if token is not None:
+            self.session.headers[token_header] = token
+
+    def request(self, method: str, path: str, data: dict or None = None) -> dict:
+        '''Sends a request to the daemon and returns the json it responded with. Raises an exception if the daemon responded with an error
+        :param method: The http method, like 'GET'
+        :param path: The endpoint, like '/jobs'
+        :param data: What to send as the json body'''
+        try:
+            response = self.session.request(method, f'{self.url}{path}', json=data, timeout=10)
+        except requests.exceptions.ConnectionError:
+            raise Exception(f'Couldn\'t connect to the daemon at \'{self.url}\'. It can be started with: mangadl serve')
+
+        if response.status_code >= 400:
+            raise Exception(f'The daemon responded with status code {response.status_code}: {response.json().get('error')}')
+        return response.json()
+
+    def get_status(self) -> dict:
+        '''Returns how long the daemon has been running, and how many jobs are in each state'''
+        return self.request('GET', '/status')
+
+    def submit_job(self, job_type: str, parameters: dict) -> dict:
+        '''Sends a job to the daemon, and returns it
+        :param job_type: What kind of job it is ('download', 'search', or 'format')
+        :param parameters: The job's parameters'''
+        return self.request('POST', '/jobs', {'type': job_type, 'parameters': parameters})
+
+    def get_job(self, job_id: str) -> dict:
+        '''Returns a job, with it's output and progress
+        :param job_id: The job's ID'''
+        return self.request('GET', f'/jobs/{job_id}')
+
+    def wait_for_job(self, job_id: str, show_updates_in_terminal: bool = True) -> dict:
+        '''Waits for a job to finish (or fail), and returns it
+        :param job_id: The job's ID
+        :param show_updates_in_terminal: If the job's output should be printed as it runs, the same as if it was running in this process'''
+        shown_line_count = 0
+        while True:
+            job = self.get_job(job_id)
+
+            if show_updates_in_terminal:
+                # printing the lines we haven't shown yet, then the line the job is currently on (which is usually it's progress)
+                new_line_count = job['output_line_count'] - shown_line_count
+                if new_line_count > 0:
+                    for line in job['output'][-new_line_count:]:
+                        print(f'\r{line}')
+                    shown_line_count = job['output_line_count']
+                print(f'\r{job['progress']}', end='', flush=True)
+
+            if job['status'] not in ('queued', 'running'):
+                return job
+            time.sleep(job_poll_interval)
+
+    def run_job(self, job_type: str, parameters: dict, show_updates_in_terminal: bool = True) -> dict:
+        '''Sends a job to the daemon, waits for it to finish, and returns it. Raises an exception if the job failed
+        :param job_type: What kind of job it is ('download', 'search', or 'format')
+        :param parameters: The job's parameters
+        :param show_updates_in_terminal: If the job's output should be printed as it runs'''
+        job = self.wait_for_job(self.submit_job(job_type, parameters)['id'], show_updates_in_terminal)
+        if job['status'] != 'finished':
+            raise Exception(f'The daemon\'s {job_type} job {'was cancelled' if job['status'] == 'cancelled' else f'failed: {job['error']}'}')
+        return job
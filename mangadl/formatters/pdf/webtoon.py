@@ -82,7 +82,8 @@ class PDFWebtoonSeries:
         :param pdf_chapter_naming_scheme: How to format the file names. You can put [series_name], [chapter_start] and [chapter_end] to sub in as special values. [series_name] is the name of the series, [chapter_start] is the chapter that that pdf started at. If using chapters_per_pdf, it will be that, otherwise it will be 0. [chapter_end] is the same, but in this case the chapter it ended at
         :param output_path: The path to the file where the PDF will be saved. If the path to a directory is passed, it will create a output.pdf file'''
         # getting every chapter in the directory
-        chapter_directory_names = sorted([d for d in os.listdir(self.content_path) if os.path.isdir(os.path.join(self.content_path, d))])
+        # directories starting with . (like the content store) are skipped, since they're not chapters
+        chapter_directory_names = sorted([d for d in os.listdir(self.content_path) if os.path.isdir(os.path.join(self.content_path, d)) and not d.startswith('.')])
 
         # raising an error if there's no directorys in the passed directory
         if len(chapter_directory_names) == 0:
@@ -0,0 +1,181 @@
+import os
+import sqlite3
+import threading
+import time
+from mangadl import cache
+from mangadl import ranking
+from mangadl.common import CatalogEntry, SearchResult
+
+# this is the name of the index's database file, it's put in the cache directory (see cache.get_default_cache_directory)
+index_filename = 'index.sqlite3'
+
+# this is how many titles are found with the full text search before they're ranked with ranking.get_top_matches
+# the full text search is only good at finding titles with the right words, so we take more than we need and let ranking pick the best ones
+search_candidate_count = 200
+
+# incremental crawls ask for everything updated since the last crawl started, minus this many seconds, in case the website's clock is a bit off
+crawl_overlap = 60 * 60
+
+
+class TitleIndex:
+    '''Stores the titles of every series on websites with catalog apis in an SQLite full text search (FTS5) index, so they can be searched without sending any requests
+    The index is filled by crawling each website's catalog with build_index, and after the first crawl only series that were updated since the last one are requested
+
+    Example Code:
+    from index import TitleIndex
+
+    title_index = TitleIndex('/put/your/path/here/index.sqlite3')
+
+    search_results = title_index.search('One Piece', limit=3)
+    '''
+
+    def __init__(self, path: str):
+        ''':param path: The path to the index's database file. It's made (along with it's directory) if it doesn't exist yet'''
+        self.path = path
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+
+        with self.lock, self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            # alt_names are stored as one string with a name per line, since that's what the full text search indexes
+            self.connection.execute('CREATE TABLE IF NOT EXISTS titles (id INTEGER PRIMARY KEY, url TEXT NOT NULL UNIQUE, website_id TEXT NOT NULL, name TEXT NOT NULL, alt_names TEXT NOT NULL, adult INTEGER, updated_at REAL)')
+            # the full text search table only stores the index, the text itself is read from titles (an external content table)
+            # remove_diacritics makes 'pokemon' match 'Pokémon'
+            self.connection.execute('CREATE VIRTUAL TABLE IF NOT EXISTS titles_fts USING fts5(name, alt_names, content=\'titles\', content_rowid=\'id\', tokenize=\'unicode61 remove_diacritics 2\')')
+            # these keep the full text search table up to date with titles
+            self.connection.execute('CREATE TRIGGER IF NOT EXISTS titles_insert AFTER INSERT ON titles BEGIN INSERT INTO titles_fts (rowid, name, alt_names) VALUES (new.id, new.name, new.alt_names); END')
+            self.connection.execute('CREATE TRIGGER IF NOT EXISTS titles_delete AFTER DELETE ON titles BEGIN INSERT INTO titles_fts (titles_fts, rowid, name, alt_names) VALUES (\'delete\', old.id, old.name, old.alt_names); END')
+            self.connection.execute('CREATE TRIGGER IF NOT EXISTS titles_update AFTER UPDATE ON titles BEGIN INSERT INTO titles_fts (titles_fts, rowid, name, alt_names) VALUES (\'delete\', old.id, old.name, old.alt_names); INSERT INTO titles_fts (rowid, name, alt_names) VALUES (new.id, new.name, new.alt_names); END')
+            # this stores when each website was last crawled, for incremental crawls
+            self.connection.execute('CREATE TABLE IF NOT EXISTS crawls (website_id TEXT PRIMARY KEY, started_at REAL NOT NULL, finished_at REAL NOT NULL)')
+
+    def close(self):
+        '''Closes the index's database connection'''
+        with self.lock:
+            self.connection.close()
+
+    def add_entries(self, catalog_entries: list[CatalogEntry]):
+        '''Adds series to the index, or updates them if they're already in it (by url)
+        :param catalog_entries: The series to add, from a scraper's crawl_catalog'''
+        rows = [(entry.url, entry.website_id, entry.name, '\n'.join(entry.alt_names), entry.adult, entry.updated_at) for entry in catalog_entries]
+
+        with self.lock, self.connection:
+            # this is an upsert instead of INSERT OR REPLACE, since a replace doesn't run the delete trigger, which would leave the old row in the full text search
+            self.connection.executemany('INSERT INTO titles (url, website_id, name, alt_names, adult, updated_at) VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET website_id = excluded.website_id, name = excluded.name, alt_names = excluded.alt_names, adult = excluded.adult, updated_at = excluded.updated_at', rows)
+
+    def search(self, query: str, adult: bool or None = None, limit: int or None = None, website_id: str or None = None) -> list[SearchResult]:
+        '''Searches the index, and returns the best results sorted by how close their names (or alternative names) are to the query
+        :param query: The string to search
+        :param adult: If it should include only adult (True), only non-adult (False), or both (None). Series that aren't known to be adult are counted as non-adult
+        :param limit: The most results to return. If None, every result is returned
+        :param website_id: The id of the website to search. If None, every website in the index is searched'''
+        match_query = get_match_query(query)
+        if not match_query:
+            return []
+
+        # first we find the candidates with the full text search, best matches (by bm25) first
+        sql = 'SELECT titles.url, titles.website_id, titles.name, titles.alt_names FROM titles_fts JOIN titles ON titles.id = titles_fts.rowid WHERE titles_fts MATCH ?'
+        parameters = [match_query]
+        if website_id is not None:
+            sql += ' AND titles.website_id = ?'
+            parameters.append(website_id)
+        if adult is True:
+            sql += ' AND titles.adult = 1'
+        elif adult is False:
+            sql += ' AND (titles.adult IS NULL OR titles.adult = 0)'
+        sql += ' ORDER BY bm25(titles_fts) LIMIT ?'
+        parameters.append(max(search_candidate_count, limit or 0))
+
+        with self.lock:
+            rows = self.connection.execute(sql, parameters).fetchall()
+
+        # then we rank them the same way live search results are ranked, using the alternative names too
+        candidates = [CatalogEntry(name, url, row_website_id, alt_names=alt_names.split('\n') if alt_names else []) for url, row_website_id, name, alt_names in rows]
+        return ranking.get_top_matches(candidates, query, limit, key=lambda entry: [entry.name] + entry.alt_names)
+
+    def get_website_ids(self) -> list[str]:
+        '''Returns the ids of every website that has series in the index'''
+        with self.lock:
+            return [row[0] for row in self.connection.execute('SELECT DISTINCT website_id FROM titles ORDER BY website_id')]
+
+    def count(self, website_id: str or None = None) -> int:
+        '''Returns how many series are in the index
+        :param website_id: If passed, only series from this website are counted'''
+        with self.lock:
+            if website_id is None:
+                return self.connection.execute('SELECT COUNT(*) FROM titles').fetchone()[0]
+            return self.connection.execute('SELECT COUNT(*) FROM titles WHERE website_id = ?', (website_id,)).fetchone()[0]
+
+    def get_last_crawl_time(self, website_id: str) -> float or None:
+        '''Returns when the last finished crawl of a website started, as a unix timestamp, or None if it hasn't been crawled
+        :param website_id: The id of the website'''
+        with self.lock:
+            crawl = self.connection.execute('SELECT started_at FROM crawls WHERE website_id = ?', (website_id,)).fetchone()
+        return crawl[0] if crawl is not None else None
+
+    def record_crawl(self, website_id: str, started_at: float):
+        '''Records that a crawl of a website finished, so the next one only has to get series updated since it started
+        :param website_id: The id of the website
+        :param started_at: When the crawl started, as a unix timestamp'''
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO crawls (website_id, started_at, finished_at) VALUES (?, ?, ?)', (website_id, started_at, time.time()))
+
+
+def get_match_query(query: str) -> str:
+    '''Turns a search query into an FTS5 match query, where a title matches if it has any of the query's words (or words starting with them)
+    Each word is quoted, so characters that mean something to FTS5 (like - or *) are searched for normally
+    Accents are left in, since the full text search removes them itself (and ranking.normalize_title would also change letters it doesn't, like ピ into ヒ)
+    :param query: The string that was searched'''
+    return ' OR '.join(f'"{token}"*' for token in ranking.non_alphanumeric_pattern.sub(' ', query).split())
+
+
+def build_index(title_index: TitleIndex, crawl_functions: dict[str, callable], full: bool = False, show_updates_in_terminal: bool = True):
+    '''Crawls the catalog of every website in crawl_functions into the index
+    Websites that were crawled before only have the series updated since then requested, unless full is True
+
+    Example Code:
+    from index import open_index, build_index
+    from scrapers import mangadex
+
+    title_index = open_index()
+    build_index(title_index, {'mangadex': mangadex.crawl_catalog})
+    :param title_index: The index to add the series to
+    :param crawl_functions: The crawl_catalog function of every website to crawl, by website id
+    :param full: If every series should be requested again, instead of only the ones updated since the last crawl
+    :param show_updates_in_terminal: If how many series have been crawled should be printed'''
+    for website_id, crawl_function in crawl_functions.items():
+        last_crawl_time = None if full else title_index.get_last_crawl_time(website_id)
+        updated_since = None if last_crawl_time is None else last_crawl_time - crawl_overlap
+        started_at = time.time()
+
+        # the crawl functions give the series a page at a time, so we add each page as we get it (so a crash partway through doesn't lose everything)
+        crawled_count = 0
+        for catalog_entries in crawl_function(updated_since=updated_since):
+            title_index.add_entries(catalog_entries)
+            crawled_count += len(catalog_entries)
+            if show_updates_in_terminal:
+                print(f'\rCrawled {crawled_count} series from {website_id}', end='')
+
+        # the crawl is only recorded once it's finished, so if it was stopped partway through, the next one starts over
+        title_index.record_crawl(website_id, started_at)
+        if show_updates_in_terminal:
+            print(f'\rCrawled {crawled_count} series from {website_id} ({title_index.count(website_id)} total)')
+
+
+def get_default_index_path() -> str:
+    '''Returns the path the index is kept at by default, which is index.sqlite3 in cache.get_default_cache_directory'''
+    return os.path.join(cache.get_default_cache_directory(), index_filename)
+
+
+def open_index(path: str or None = None) -> TitleIndex:
+    '''Opens (or makes) the index
+
+    Example Code:
+    from index import open_index
+
+    title_index = open_index()
+    :param path: The path to the index's database file. Defaults to get_default_index_path'''
+    return TitleIndex(path or get_default_index_path())
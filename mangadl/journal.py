@@ -0,0 +1,187 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# this is the name of the journal file that's made in the root of the output path (see open_journal)
+journal_filename = '.mangadl-journal.sqlite3'
+
+# files are hashed in chunks of this many bytes, so only one chunk of an image is in memory at a time
+hash_chunk_size = 1024 * 1024
+
+# these are the statuses chapters and images can have in the journal
+# downloading means it was started but not finished (like if the download crashed partway through), complete means it's done
+# failed is for images that were saved with replace_image_failed_error_with_warning, so they're tried again next time
+status_downloading = 'downloading'
+status_complete = 'complete'
+status_failed = 'failed'
+
+
+class DownloadJournal:
+    '''Keeps track of which chapters and images have been downloaded, in an SQLite database
+    Every image is stored with it's url, path, size, and sha256 hash, and every chapter with how many images it has, and if all of them finished
+    This means chapters that are already downloaded can be skipped without requesting anything, and if some images are missing or were cut off (their size doesn't match) only those are downloaded again
+
+    Example Code:
+    from journal import DownloadJournal
+
+    journal = DownloadJournal('/put/your/path/here/.mangadl-journal.sqlite3')
+
+    if not journal.is_chapter_complete('https://put.your/chapter/url/here'):
+        journal.start_chapter('https://put.your/chapter/url/here', '/put/your/path/here/chapter-1', 1)
+        # download the image to /put/your/path/here/chapter-1/000.png here
+        journal.record_image('https://put.your/chapter/url/here', 0, 'https://put.your/image/url/here.png', '/put/your/path/here/chapter-1/000.png')
+        journal.finish_chapter('https://put.your/chapter/url/here')
+    '''
+
+    def __init__(self, path: str, verify_hashes: bool = False):
+        ''':param path: The path to the journal's database file. It's made if it doesn't exist yet
+        :param verify_hashes: If images should be hashed again when checking if they're complete, instead of only checking their size. This catches images that were changed or corrupted on disk, but means reading every image'''
+        self.path = path
+        self.verify_hashes = verify_hashes
+
+        # the connection is shared by every worker thread, so we only let one use it at a time
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+
+        with self.lock, self.connection:
+            # WAL means a crash partway through a write can't corrupt the journal, and is faster for lots of small writes
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS chapters (url TEXT PRIMARY KEY, output_path TEXT NOT NULL, image_count INTEGER NOT NULL, status TEXT NOT NULL, updated_at REAL NOT NULL)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS images (chapter_url TEXT NOT NULL, image_index INTEGER NOT NULL, url TEXT NOT NULL, path TEXT NOT NULL, size INTEGER NOT NULL, sha256 TEXT NOT NULL, status TEXT NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (chapter_url, image_index))')
+            # this is for looking up images by url (see get_image_hash)
+            self.connection.execute('CREATE INDEX IF NOT EXISTS images_url ON images (url)')
+
+    def close(self):
+        '''Closes the journal's database connection'''
+        with self.lock:
+            self.connection.close()
+
+    def is_chapter_complete(self, chapter_url: str) -> bool:
+        '''Returns True if every image of a chapter was downloaded, and they're all still on disk with the right size (and hash, if verify_hashes is on)
+        This doesn't request anything, so it can be used to skip a chapter before it's image urls are fetched
+        :param chapter_url: The url of the chapter'''
+        with self.lock:
+            chapter = self.connection.execute('SELECT image_count, status FROM chapters WHERE url = ?', (chapter_url,)).fetchone()
+            if chapter is None or chapter[1] != status_complete:
+                return False
+            images = self.connection.execute('SELECT path, size, sha256, status FROM images WHERE chapter_url = ?', (chapter_url,)).fetchall()
+
+        # making sure all the images finished, and they're all still there
+        if len(images) != chapter[0] or any(status != status_complete for path, size, sha256, status in images):
+            return False
+        return all(self.is_file_intact(path, size, sha256) for path, size, sha256, status in images)
+
+    def has_chapter(self, chapter_url: str) -> bool:
+        '''Returns True if a chapter is in the journal at all (finished or not)
+        :param chapter_url: The url of the chapter'''
+        with self.lock:
+            return self.connection.execute('SELECT 1 FROM chapters WHERE url = ?', (chapter_url,)).fetchone() is not None
+
+    def is_image_complete(self, chapter_url: str, image_index: int, img_url: str, image_path: str) -> bool:
+        '''Returns True if an image was downloaded from the same url to the same path, and it's still on disk with the right size (and hash, if verify_hashes is on)
+        :param chapter_url: The url of the chapter the image is from
+        :param image_index: The image's index in the chapter
+        :param img_url: The url to the image
+        :param image_path: The path the image would be saved to'''
+        with self.lock:
+            image = self.connection.execute('SELECT url, path, size, sha256, status FROM images WHERE chapter_url = ? AND image_index = ?', (chapter_url, image_index)).fetchone()
+
+        if image is None or image[0] != img_url or image[1] != os.path.abspath(image_path) or image[4] != status_complete:
+            return False
+        return self.is_file_intact(image[1], image[2], image[3])
+
+    def start_chapter(self, chapter_url: str, output_path: str, image_count: int):
+        '''Records that a chapter has started downloading. If it was already in the journal, it's marked as not finished until finish_chapter is called
+        Images from the chapter's last download are kept, so the ones that are still intact can be skipped
+        :param chapter_url: The url of the chapter
+        :param output_path: The directory the chapter's images are saved in
+        :param image_count: How many images the chapter has'''
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO chapters (url, output_path, image_count, status, updated_at) VALUES (?, ?, ?, ?, ?)', (chapter_url, os.path.abspath(output_path), image_count, status_downloading, time.time()))
+            # if the chapter has less images than it did last time, we forget the extra ones
+            self.connection.execute('DELETE FROM images WHERE chapter_url = ? AND image_index >= ?', (chapter_url, image_count))
+
+    def record_image(self, chapter_url: str, image_index: int, img_url: str, image_path: str, complete: bool = True, sha256: str or None = None):
+        '''Records that an image was saved. The image is hashed here (unless sha256 is passed), so this should be called after the image is fully written
+        :param chapter_url: The url of the chapter the image is from
+        :param image_index: The image's index in the chapter
+        :param img_url: The url to the image
+        :param image_path: The path the image was saved to
+        :param complete: If the image was downloaded successfully. If False (like if it was saved with replace_image_failed_error_with_warning) it's downloaded again next time
+        :param sha256: The image's sha256 hash, if it's already known (like from store.ContentStore.add). If None, the image is hashed'''
+        if sha256 is None:
+            size, sha256 = get_file_size_and_hash(image_path)
+        else:
+            size = os.path.getsize(image_path)
+
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO images (chapter_url, image_index, url, path, size, sha256, status, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (chapter_url, image_index, img_url, os.path.abspath(image_path), size, sha256, status_complete if complete else status_failed, time.time()))
+
+    def get_image_hash(self, img_url: str) -> str or None:
+        '''Returns the sha256 hash of an image that was downloaded from img_url before (in any chapter), or None if it hasn't been
+        :param img_url: The url to the image'''
+        with self.lock:
+            image = self.connection.execute('SELECT sha256 FROM images WHERE url = ? AND status = ? LIMIT 1', (img_url, status_complete)).fetchone()
+        return image[0] if image is not None else None
+
+    def finish_chapter(self, chapter_url: str):
+        '''Marks a chapter as finished, if every one of it's images was downloaded successfully
+        :param chapter_url: The url of the chapter'''
+        with self.lock, self.connection:
+            self.connection.execute('UPDATE chapters SET status = ?, updated_at = ? WHERE url = ? AND image_count = (SELECT COUNT(*) FROM images WHERE chapter_url = ? AND status = ?)', (status_complete, time.time(), chapter_url, chapter_url, status_complete))
+
+    def record_existing_chapter(self, chapter_url: str, output_path: str, img_urls: list[str], image_paths: list[str]):
+        '''Adds a chapter that was downloaded before there was a journal, so next time it can be skipped without requesting anything
+        Only the images that are on disk are recorded, so if any are missing the chapter isn't marked as finished
+        :param chapter_url: The url of the chapter
+        :param output_path: The directory the chapter's images are saved in
+        :param img_urls: The urls to the chapter's images
+        :param image_paths: The paths the chapter's images are saved to, in the same order as img_urls'''
+        self.start_chapter(chapter_url, output_path, len(img_urls))
+        for i, (img_url, image_path) in enumerate(zip(img_urls, image_paths)):
+            if os.path.isfile(image_path):
+                self.record_image(chapter_url, i, img_url, image_path)
+        self.finish_chapter(chapter_url)
+
+    def is_file_intact(self, path: str, size: int, sha256: str) -> bool:
+        '''Returns True if the file at path exists and has the given size (and hash, if verify_hashes is on)'''
+        try:
+            if os.path.getsize(path) != size:
+                return False
+        except OSError:
+            return False
+
+        if self.verify_hashes:
+            return get_file_size_and_hash(path)[1] == sha256
+        return True
+
+
+def open_journal(output_path: str, verify_hashes: bool = False) -> DownloadJournal:
+    '''Opens (or makes) the journal in the root of an output path
+
+    Example Code:
+    from journal import open_journal
+
+    journal = open_journal('/put/your/path/here')
+    :param output_path: The directory everything is being downloaded to
+    :param verify_hashes: If images should be hashed again when checking if they're complete (see DownloadJournal)'''
+    os.makedirs(output_path, exist_ok=True)
+    return DownloadJournal(os.path.join(output_path, journal_filename), verify_hashes=verify_hashes)
+
+
+def get_file_size_and_hash(path: str) -> tuple[int, str]:
+    '''Returns a file's size in bytes, and it's sha256 hash as a hex string
+    :param path: The path to the file'''
+    sha256 = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(hash_chunk_size)
+            if not chunk:
+                break
+            sha256.update(chunk)
+            size += len(chunk)
+    return size, sha256.hexdigest()
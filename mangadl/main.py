@@ -1,109 +1,68 @@
 #!/usr/bin/env python3
 import os
-from mangadl.scrapers import bato_v4, bato, mangaread, natomanga, mangabuddy, webtoons, mangatown, onemanga, tapas, comix, mangadex
 from mangadl.common import SearchResult, generate_text_with_link, sort_search_results
 from mangadl.common import construct_chapter_not_found_image
 from mangadl.common import get_correct_output_path
 from mangadl import common
-import re
-import difflib
-from mangadl.formatters.pdf import manga as pdf_manga, webtoon as pdf_webtoon
-from mangadl.formatters.epub import manga as epub_manga
+from mangadl import cache
+from mangadl import daemon
+from mangadl import index as title_index
+from mangadl import registry
+from mangadl import retry
+from mangadl import router
+from mangadl import journal as download_journal
+from mangadl import store as download_store
+import contextvars
+import queue
+import threading
+import time
 import argparse
 
 
-def get_scraper_mappings() -> dict[str, dict[str, str or callable or type]]:
-    '''This returns the mappings of a scraper's name to it's download function, search function, and everything else related to it'''
-    return {
-        'mangaread': {
-            'url': mangaread.urls[0],
-            'series_class_reference': mangaread.Series,
-            'chapter_class_reference': mangaread.Chapter,
-            'search_function': mangaread.search,
-        },
-        'manganato': {
-            'url': natomanga.urls[0],
-            'series_class_reference': natomanga.Series,
-            'chapter_class_reference': natomanga.Chapter,
-            'search_function': natomanga.search,
-
-        },
-        'mangabuddy': {
-            'url': mangabuddy.urls[0],
-            'series_class_reference': mangabuddy.Series,
-            'chapter_class_reference': mangabuddy.Chapter,
-            'search_function': mangabuddy.search,
-        },
-        'webtoons': {
-            'url': webtoons.urls[0],
-            'series_class_reference': webtoons.Series,
-            'chapter_class_reference': webtoons.Chapter,
-            'search_function': webtoons.search,
-        },
-        'mangatown': {
-            'url': mangatown.urls[0],
-            'series_class_reference': mangatown.Series,
-            'chapter_class_reference': mangatown.Chapter,
-            'search_function': mangatown.search,
-        },
-        '1manga': {
-            'url': onemanga.urls[0],
-            'series_class_reference': onemanga.Series,
-            'chapter_class_reference': onemanga.Chapter,
-            'search_function': onemanga.search,
-        },
-        'bato': {
-            'url': bato.urls[0],
-            'series_class_reference': bato.Series,
-            'chapter_class_reference': bato.Chapter,
-            'search_function': bato.search,
-        },
-        'tapas': {
-            'url': tapas.urls[0],
-            'series_class_reference': tapas.Series,
-            'chapter_class_reference': tapas.Chapter,
-            'search_function': tapas.search,
-        },
-        'comix': {
-            'url': comix.urls[0],
-            'series_class_reference': comix.Series,
-            'chapter_class_reference': comix.Chapter,
-            'search_function': comix.search,
-        },
-        'mangadex': {
-            'url': mangadex.urls[0],
-            'series_class_reference': mangadex.Series,
-            'chapter_class_reference': mangadex.Chapter,
-            'search_function': mangadex.search,
-        },
-        'batov4': {
-            'url': bato_v4.urls[0],
-            'series_class_reference': bato_v4.Series,
-            'chapter_class_reference': bato_v4.Chapter,
-            'search_function': bato_v4.search,
-        },
-    }
+# this is the router used to find which scraper a url is for. It's made the first time it's needed (see get_url_router)
+url_router = None
+
+# these are the default arguments for format, which are used for format jobs sent to the daemon (see run_format_job)
+format_job_defaults = {
+    'output': None,
+    'input': None,
+    'is_series': None,
+    'content_format': None,
+    'chapters_per_file': None,
+    'chapter_naming_scheme': '[series_name] chapter [chapter_start]-[chapter_end]',
+    'file_format': None,
+    'series_name': None,
+    'infer_series_name': True,
+    'disable_warnings': False,
+    'daemon': None,
+}
+
+
+def get_scraper_mappings() -> dict[str, registry.ScraperEntry]:
+    '''This returns the mappings of a scraper's name to it's download function, search function, and everything else related to it
+    The scrapers aren't imported until one of their classes or functions is used (see registry.ScraperEntry)'''
+    return registry.get_scrapers()
+
+
+def get_url_router() -> router.UrlRouter:
+    '''Returns the router that finds which scraper a url is for, making it the first time this is called (so every scraper's regexes are only compiled once)'''
+    global url_router
+    if url_router is None:
+        url_router = router.UrlRouter(get_scraper_mappings())
+    return url_router
 
 
 def get_scraper_function_mappings_by_url(url: str) -> dict[str, str or callable] or None:
     '''Gets the scraper for a given url, and returns that scrapers functions'''
-    # looping through every scraper
-    for scraper_name in get_scraper_mappings().keys():
-        # checking if the url works for that scraper
-        if identify_url_type(scraper_name, url) != None:
-            # returning the scraper's functions
-            return get_scraper_mappings().get(scraper_name)
+    scraper_name = get_scraper_name_by_url(url)
+    return get_scraper_mappings().get(scraper_name) if scraper_name is not None else None
 
 def get_scraper_name_by_url(url) -> str or None:
     '''Gets the name of a scraper via a url and returns it
     :param url: The url to get the scraper name by
     :returns: Either the name of the scraper, or None if nothig matched'''
-    # looping through every scraper
-    for scraper_name in get_scraper_mappings().keys():
-        # checking if the url works for that scraper
-        if identify_url_type(scraper_name, url) != None:
-            # returning the scraper's functions
-            return scraper_name
+    # the router looks the url's hostname up, so only the scrapers for that hostname have their regexes checked
+    return get_url_router().route(url)[0]
 
 
 def identify_url_type(scraper_name: str, url: str) -> str or None:
@@ -117,24 +76,11 @@ def identify_url_type(scraper_name: str, url: str) -> str or None:
     :returns: Either 'chapter', 'series', or None depending on if the regex for a specific scraper's chapter or series match
     :param scraper_name: The name of the scraper in get_scraper_mappings
     :param url: The url to be identified'''
-    # first we get the functions and classes for the given scraper
-    scraper_functions = get_scraper_mappings().get(scraper_name)
-
-    # then we get the chapter regex and series regex
-    chapter_regex = re.compile(scraper_functions.get('chapter_class_reference').regex)
-    series_regex = re.compile(scraper_functions.get('series_class_reference').regex)
-
-    # then we try to match our url against those regexs
-    if chapter_regex.fullmatch(url):
-        return 'chapter'
-    elif series_regex.fullmatch(url):
-        return 'series'
-    # since it didn't match either, we return None
-    else:
-        return None
+    # the router has every scraper's regexes compiled already
+    return get_url_router().identify_url_type(scraper_name, url)
 
 
-def download_chapter_by_chapter_num(series_url: str, chapter_num: int, output_path: str, redownload: bool, show_updates_in_terminal: bool = True):
+def download_chapter_by_chapter_num(series_url: str, chapter_num: int, output_path: str, redownload: bool, show_updates_in_terminal: bool = True, image_workers: int = 1, journal: download_journal.DownloadJournal or None = None, store: download_store.ContentStore or None = None, interactive: bool = True):
     '''Donwloads the chapter_numth chapter of a series. If the chapter number does not exist, or is invalid, it will give the user dialog to pick another option
 
     Example Code:
@@ -145,7 +91,11 @@ def download_chapter_by_chapter_num(series_url: str, chapter_num: int, output_pa
     :param series_url: The url of the series
     :param chapter_num: The index of the chapter to be downloaded
     :param output_path: Where the chapter's images will be saved
-    :param redownload: If the chapter should be redownloaded, even if already downloaded'''
+    :param redownload: If the chapter should be redownloaded, even if already downloaded
+    :param image_workers: How many images can be downloaded at the same time
+    :param journal: The journal keeping track of what's been downloaded (see journal.DownloadJournal)
+    :param store: The content store to keep the images in, so images that are the same are only saved once (see store.ContentStore)
+    :param interactive: If the user should be asked to pick another chapter when the chapter number isn't valid. If False, an error saying which chapters there are is raised instead (like in the daemon, where there's nobody to ask)'''
     # first we get the scraper for the url's functions
     scraper_functions = get_scraper_function_mappings_by_url(series_url)
 
@@ -157,37 +107,48 @@ def download_chapter_by_chapter_num(series_url: str, chapter_num: int, output_pa
     # next we make a series object for the series using the scraper's series class we just got
     series_object = scraper_functions.get('series_class_reference')(series_url)
 
-    # next we get all the chapter urls for that series
-    chapter_urls = series_object.get_chapter_urls()
+    # next we get all the chapters for that series
+    # these have the chapters' numbers and titles (if the website's listing does), so they can be shown if the chapter_num isn't valid
+    chapters = series_object.get_chapters()
 
-    # after that we check if the chapter_num is a valid index for the chapter_urls (aka it's not 99999 and there's only 7 chapters)
+    # after that we check if the chapter_num is a valid index for the chapters (aka it's not 99999 and there's only 7 chapters)
     try:
-        # this does two things. First it checks if the chapter_num is valid, then it gets the url to the chapter we're downloading
-        chapter_to_download_url = chapter_urls[chapter_num]
+        # this does two things. First it checks if the chapter_num is valid, then it gets the chapter we're downloading
+        chapter_to_download = chapters[chapter_num]
 
     except:
+        # if we can't ask the user to pick another one, we tell them which chapters there are instead
+        if not interactive:
+            if len(chapters) == 0:
+                raise Exception(f'\'{series_url}\' doesn\'t seem to have any chapters')
+            raise Exception(f'{chapter_num} wasn\'t a valid chapter of \'{series_url}\'. It has {len(chapters)} chapters, so the chapter has to be from 0 to {len(chapters) - 1}')
+
         # checking if there's no chapters just in case
-        if len(chapter_urls) == 0:
+        if len(chapters) == 0:
             print(f'Sorry! \'{series_url}\' doesn\'t seem to have any chapters!')
 
         # now we get the input from the user for what chapter num they want to download
-        new_user_chapter_num = int(input(construct_chapter_not_found_image(chapter_urls, chapter_num)))
+        new_user_chapter_num = int(input(construct_chapter_not_found_image(chapters, chapter_num)))
 
-        # then the last step before downloading is getting the url corresponding to that number
-        chapter_to_download_url = chapter_urls[new_user_chapter_num]
+        # then the last step before downloading is getting the chapter corresponding to that number
+        chapter_to_download = chapters[new_user_chapter_num]
 
     # now we download the chapter
-    # even if the chapter_num wasn't valid, it'll still save the new chapter_url to chapter_to_download_url
-    scraper_functions.get('chapter_class_reference')(chapter_to_download_url).download(output_path, show_updates_in_terminal, redownload=redownload)
+    # even if the chapter_num wasn't valid, it'll still save the new chapter to chapter_to_download
+    series_object.make_chapter_object(chapter_to_download).download(output_path, show_updates_in_terminal, redownload=redownload, max_workers=image_workers, journal=journal, store=store)
 
 
-def download_chapters(series_url : str, starting_chapter_num: int, ending_chapter_num: int or None, output_path: str, redownload: bool, show_updates_in_terminal: bool = True):
+def download_chapters(series_url : str, starting_chapter_num: int, ending_chapter_num: int or None, output_path: str, redownload: bool, show_updates_in_terminal: bool = True, image_workers: int = 1, chapters_in_flight: int = 0, journal: download_journal.DownloadJournal or None = None, store: download_store.ContentStore or None = None):
     '''Downloads multiple chapters from a series via it's series_url
     :param series_url: The url to the series
     :param starting_chapter_num: The starting chapter to be downloaded from
     :param ending_chapter_num: The ending chapter to be downloaded from
     :param output_path: The path where the chapters and the images will be saved
-    :param redownload: If a chapter should be redownloaded, even if already downloaded'''
+    :param redownload: If a chapter should be redownloaded, even if already downloaded
+    :param image_workers: How many images can be downloaded at the same time
+    :param chapters_in_flight: How many upcoming chapters get their image urls fetched while the current chapter's images are downloading
+    :param journal: The journal keeping track of what's been downloaded. Chapters it says are finished are skipped without requesting anything
+    :param store: The content store to keep the images in, so images that are the same are only saved once (see store.ContentStore)'''
     # first we get the scraper were gonna use for the url's functions
     scraper_functions = get_scraper_function_mappings_by_url(series_url)
 
@@ -198,27 +159,38 @@ def download_chapters(series_url : str, starting_chapter_num: int, ending_chapte
     if show_updates_in_terminal:
         print(f'Getting chapter urls for \'{series_url}\'')
 
-    # after that we get the chapter urls
-    chapter_urls = series_object.get_chapter_urls()
+    # after that we get the chapters
+    # these have what the website's chapter listing says about them (see common.ChapterInfo), so making their chapter objects below doesn't need any more requests
+    chapters = series_object.get_chapters()
 
-    # then we get the list of the chapter url's we're gonna download
+    # then we get the list of the chapters we're gonna download
     # if the user passed in something like 1- or 4:, then we download chapters 4-[end_of_list]
-    # the way we do that is if ending_chapter_num is None, we set it to len(chapter_urls) - 1
+    # the way we do that is if ending_chapter_num is None, we set it to len(chapters) - 1
     if ending_chapter_num == None:
-        ending_chapter_num = len(chapter_urls) - 1
+        ending_chapter_num = len(chapters) - 1
 
-    chapter_urls_to_download = chapter_urls[int(starting_chapter_num):int(ending_chapter_num)+1]
+    chapters_in_range = chapters[int(starting_chapter_num):int(ending_chapter_num)+1]
 
     # after that we make a directory (if we're not already in it) for the series
     output_path = get_correct_output_path(output_path, series_object.get_name())
 
-    # finally we just use main.py's download function to download all the chapters
+    # then we make chapter objects for all the chapters we're downloading
+    chapter_objects = [series_object.make_chapter_object(chapter) for chapter in chapters_in_range]
+
+    # next we skip the chapters the journal says are already downloaded, before any of their image urls are requested
+    chapters_to_download = common.get_chapters_to_download(chapter_objects, redownload, journal, show_updates_in_terminal)
+
+    # finally we download all the chapters, getting the image urls for the upcoming ones while the current one downloads
     # we also pass the chapter num we're downloading for progress update reasons (the '(chapter n/len(chapters))' part)
-    for i, chapter_url_to_download in enumerate(chapter_urls_to_download):
-        download_chapter(chapter_url_to_download, output_path, redownload, show_updates_in_terminal, i + 1, len(chapter_url_to_download))
+    for (i, _), (chapter_object, img_urls) in zip(chapters_to_download, common.iterate_chapters_with_img_urls([chapter_object for i, chapter_object in chapters_to_download], chapters_in_flight)):
+        # giving an update for what we're downloading (if enabled)
+        if show_updates_in_terminal:
+            print(f'Downloading {chapter_object.url}')
 
+        chapter_object.download(output_path, show_updates_in_terminal=show_updates_in_terminal, chapter_number=i + 1, chapter_count=len(chapter_objects), redownload=redownload, max_workers=image_workers, img_urls=img_urls, journal=journal, store=store)
 
-def download_series(url: str, output_path: str, redownload: bool, show_updates_in_terminal: bool = True) -> bool:
+
+def download_series(url: str, output_path: str, redownload: bool, show_updates_in_terminal: bool = True, image_workers: int = 1, chapters_in_flight: int = 0, journal: download_journal.DownloadJournal or None = None, store: download_store.ContentStore or None = None) -> bool:
     '''Downloads a series from it's url. Returns True if the url could be downloaded, otherwise returns False
 
     Example Code:
@@ -228,7 +200,11 @@ def download_series(url: str, output_path: str, redownload: bool, show_updates_i
     :param url: The url we are checking if matches, and if so downloading
     :param output_path: The output path to save the downloaded images to
     :param redownload: If a chapter should be redownloaded, even if already downloaded
-    :param show_updates_in_terminal: If we should show updates in the terminal'''
+    :param show_updates_in_terminal: If we should show updates in the terminal
+    :param image_workers: How many images can be downloaded at the same time
+    :param chapters_in_flight: How many upcoming chapters get their image urls fetched while the current chapter's images are downloading
+    :param journal: The journal keeping track of what's been downloaded. Chapters it says are finished are skipped without requesting anything
+    :param store: The content store to keep the images in, so images that are the same are only saved once (see store.ContentStore)'''
     # first we go through all the scrapers, and get the scraper the url works for (if any)
     scraper_name = get_scraper_name_by_url(url)
     # then we get that scraper's functions via it's name
@@ -255,13 +231,13 @@ def download_series(url: str, output_path: str, redownload: bool, show_updates_i
 
     # next we download the images
     # the download function also saves them, so we don't have to worry about that
-    series_object.download(output_path, show_updates_in_terminal=show_updates_in_terminal, redownload=redownload)
+    series_object.download(output_path, show_updates_in_terminal=show_updates_in_terminal, redownload=redownload, max_workers=image_workers, chapters_in_flight=chapters_in_flight, journal=journal, store=store)
 
     # then we return True so whatever is calling this knows it matched
     return True
 
 
-def download_chapter(url: str, output_path: str, redownload: bool, show_updates_in_terminal: bool = True, chapter_number: int = 1, chapter_count = 1) -> bool:
+def download_chapter(url: str, output_path: str, redownload: bool, show_updates_in_terminal: bool = True, chapter_number: int = 1, chapter_count = 1, image_workers: int = 1, journal: download_journal.DownloadJournal or None = None, store: download_store.ContentStore or None = None) -> bool:
     '''Downloads a chapter/episode from it's url. Returns True if the url could be downloaded, otherwise returns False
 
     Example Code:
@@ -291,13 +267,13 @@ def download_chapter(url: str, output_path: str, redownload: bool, show_updates_
     chapter_object = scraper_functions.get('chapter_class_reference')(url)
 
     # next we download the images
-    chapter_object.download(output_path, show_updates_in_terminal=show_updates_in_terminal, chapter_number=chapter_number, chapter_count=chapter_count, redownload=redownload)
+    chapter_object.download(output_path, show_updates_in_terminal=show_updates_in_terminal, chapter_number=chapter_number, chapter_count=chapter_count, redownload=redownload, max_workers=image_workers, journal=journal, store=store)
 
     # then we return True so whatever is calling this knows it matched
     return True
 
 
-def download_generic(url: str, output_path: str, redownload: bool, show_updates_in_terminal: bool = True) -> bool:
+def download_generic(url: str, output_path: str, redownload: bool, show_updates_in_terminal: bool = True, image_workers: int = 1, chapters_in_flight: int = 0, journal: download_journal.DownloadJournal or None = None, store: download_store.ContentStore or None = None) -> bool:
     '''Downloads a url, and identifys if it's a chapter/episode or series. Returns True if the url could be downloaded, otherwise returns False
 
     Example Code:
@@ -308,8 +284,8 @@ def download_generic(url: str, output_path: str, redownload: bool, show_updates_
     :param output_path: The output path to save the downloaded images to
     :param redownload: If a chapter should be redownloaded, even if already downloaded
     :param show_updates_in_terminal: If we should show updates in the terminal'''
-    # getting a scraper that works for the url (this is required for identifying the url type)
-    scraper_name = get_scraper_name_by_url(url)
+    # getting a scraper that works for the url, and if the url is for a chapter or a series
+    scraper_name, url_type = get_url_router().route(url)
 
     # returning False and telling the user (if enabled) that no scraper matched the given url
     if scraper_name == None:
@@ -317,15 +293,12 @@ def download_generic(url: str, output_path: str, redownload: bool, show_updates_
             print(f'No scrapers matched the url \'{url}\'')
         return False
 
-    # identifying the url type
-    url_type = identify_url_type(scraper_name, url)
-
     # downloading the url with it's correct function
     # we return the output of the download function, since those also return True if it was successful, and False if it wasn't.
     if url_type == 'chapter':
-        return download_chapter(url, output_path, redownload, show_updates_in_terminal)
+        return download_chapter(url, output_path, redownload, show_updates_in_terminal, image_workers=image_workers, journal=journal, store=store)
     elif url_type == 'series':
-        return download_series(url, output_path, redownload, show_updates_in_terminal)
+        return download_series(url, output_path, redownload, show_updates_in_terminal, image_workers, chapters_in_flight, journal, store)
     # otherwise we return false, and tell the user that there should've been something downloaded, but wasn't
     # it should've been caught when we got the scraper function, and nothing should've been found
     # since if we were able to get a scraper, that means either the series or chapter regex matched
@@ -338,31 +311,74 @@ def download_generic(url: str, output_path: str, redownload: bool, show_updates_
     
 
 
-def search(query: str, adult: bool or None, results_per_website: int = 1) -> list[SearchResult]:
-    '''Searches the given query on as many sites as possible'''
-    # here we go through every scraper, and call its search function
-    # but first before we do that, we declare a variable to store the search results
-    search_results = []
-
-    # now we actually do all the searching
-    for scraper in get_scraper_mappings().values():
-        # we save the search function to a variable for readability
-        search_function = scraper.get('search_function')
+def search(query: str, adult: bool or None, results_per_website: int = 1, timeout: float or None = 10, show_updates_in_terminal: bool = True) -> list[SearchResult]:
+    '''Searches the given query on every site at the same time, and returns the best results_per_website results from each one, sorted by how well they match the query
+    Every site is only searched once, and each site gets timeout seconds to respond. Sites that don't respond in time are skipped, so one slow site can't hold up the whole search
+    The timeout is applied to the site's own requests (see common.set_request_deadline), so a site that runs out of time stops searching, instead of it's thread being left running in the background
 
-        # we use try here in case we get an error around getting an error code when requesting the website
+    Example Code:
+    from main import search
+
+    search_results = search('One Piece', None, results_per_website=3, timeout=5)
+    :param query: The search query
+    :param adult: If search results should include adult content
+    :param results_per_website: How many results to take from each site
+    :param timeout: How many seconds each site gets to respond. None waits for every site
+    :param show_updates_in_terminal: If results should be printed as they come in, along with sites that failed or didn't respond in time'''
+    # every site is searched in it's own thread, and they put their results in this queue as they finish
+    # the threads are daemon threads so if a site never responds, it doesn't stop the program from exiting
+    finished_searches = queue.Queue()
+
+    def search_website(website_id: str, search_function: callable):
+        # the site's timeout starts when it's search does, and every request it sends has to be done by then
+        deadline = None if timeout is None else time.monotonic() + timeout
+        common.set_request_deadline(deadline)
         try:
-            # now we call the search function, and append it's result to our list of search results
-            # we only take the top result, so that the list of results doesn't become overwhelming
-            search_result = search_function(query, adult)
-            
-            # adding however many results we're supposed to add per website
-            # the min is there so we don't try and add index 17 of a list with a length of 6
-            # that also means we don't have to check if something has a length of 0, since then the for loop will just go in range(0)
-            for i in range(min(results_per_website, len(search_result))):
-                search_results.append(search_function(query, adult)[i])
+            # we pass results_per_website as the limit, so the site only requests and sorts as many results as we need
+            # and if the same search was done recently, the cached results are used without requesting anything
+            finished_searches.put((website_id, common.cached_search(website_id, search_function, query, adult, limit=results_per_website), None, False))
         except Exception as e:
-            print(e)
-            #print(f'Got error with text: \'{e}\' when searching on scraper with the url {scraper.get('url')}')
+            # if the site ran out of time, we say so instead of showing the timeout error
+            finished_searches.put((website_id, None, e, deadline is not None and time.monotonic() >= deadline))
+
+    scraper_mappings = get_scraper_mappings()
+    for website_id, scraper in scraper_mappings.items():
+        # each search runs in a copy of this thread's context, so what it prints goes to the same place (like a daemon job's output, see daemon.ThreadOutputRouter)
+        threading.Thread(target=contextvars.copy_context().run, args=(search_website, website_id, scraper.get('search_function')), daemon=True).start()
+
+    # now we collect the results as the searches finish, until they're all done, or every site's time is up
+    # sites that are still going once their time is up stop on their own, since their requests can't go past their deadline
+    search_results = []
+    timed_out_websites = set()
+    wait_deadline = None if timeout is None else time.monotonic() + timeout
+    waiting_on = set(scraper_mappings.keys())
+    while waiting_on:
+        try:
+            website_id, website_search_results, error, timed_out = finished_searches.get(timeout=None if wait_deadline is None else max(0, wait_deadline - time.monotonic()))
+        except queue.Empty:
+            timed_out_websites.update(waiting_on)
+            break
+        waiting_on.discard(website_id)
+
+        # if the search failed (like from getting an error status code, or running out of time), we just skip that site
+        if timed_out:
+            timed_out_websites.add(website_id)
+            continue
+        elif error is not None:
+            if show_updates_in_terminal:
+                print(f'Got error with text: \'{error}\' when searching on {website_id}')
+            continue
+
+        # we only take the top results from each site, so that the list of results doesn't become overwhelming
+        # they're printed as they come in, so there's something to look at while waiting on slower sites. Whatever called search (like search_from_cli) shows them again once they're all sorted
+        for search_result in website_search_results[:results_per_website]:
+            search_results.append(search_result)
+            if show_updates_in_terminal:
+                print(search_result)
+
+    # telling the user which sites we gave up on (if enabled)
+    if timed_out_websites and show_updates_in_terminal:
+        print(f'{', '.join(sorted(timed_out_websites))} didn\'t respond within {timeout:g} seconds, so {'it was' if len(timed_out_websites) == 1 else 'they were'} skipped')
 
     # next we sort the search results to make sure the best are at the top
     sorted_search_results = sort_search_results(search_results, query)
@@ -370,34 +386,73 @@ def search(query: str, adult: bool or None, results_per_website: int = 1) -> lis
     # finally we return the search_results
     return sorted_search_results
 
+def offline_search(query: str, adult: bool or None, results_per_website: int = 1, website_id: str or None = None, index_path: str or None = None) -> list[SearchResult]:
+    '''Searches the offline index (see index.py) instead of the websites, so no requests are sent. Only websites that have been crawled with mangadl index build are searched
+
+    Example Code:
+    from main import offline_search
+
+    search_results = offline_search('One Piece', None, results_per_website=3)
+    :param query: The search query
+    :param adult: If search results should include adult content
+    :param results_per_website: How many results to take from each site
+    :param website_id: The id of a website to search instead of every website in the index. Every result from it is returned, not just results_per_website
+    :param index_path: The path to the index's database file. Defaults to index.get_default_index_path'''
+    offline_index = title_index.open_index(index_path)
+    try:
+        # if we're only searching one website, we return all of it's results, the same as a live search with --website
+        if website_id is not None:
+            return offline_index.search(query, adult, website_id=website_id)
+
+        # otherwise we take the top results from each website, and sort them all together
+        search_results = []
+        for indexed_website_id in offline_index.get_website_ids():
+            search_results += offline_index.search(query, adult, limit=results_per_website, website_id=indexed_website_id)
+        return sort_search_results(search_results, query)
+    finally:
+        offline_index.close()
+
+
+def build_index(args):
+    '''Crawls the catalogs of every website that has one (or the ones passed with --website) into the offline index'''
+    # first we get the crawl functions for every website that has one
+    crawl_functions = {website_id: scraper.get('crawl_catalog_function') for website_id, scraper in get_scraper_mappings().items() if scraper.get('crawl_catalog_function') is not None}
+
+    # then if only some websites should be crawled, we make sure they all have one
+    if args.website:
+        for website_id in args.website:
+            if website_id not in crawl_functions:
+                print(f'\'{website_id}\' doesn\'t have a catalog that can be crawled. Websites that do are: {', '.join(crawl_functions.keys())}')
+                return
+        crawl_functions = {website_id: crawl_functions[website_id] for website_id in args.website}
+
+    # setting how many times failed requests get retried
+    retry.configure_default_policy(max_attempts=args.retries + 1)
+
+    offline_index = title_index.open_index(args.index_path)
+    try:
+        title_index.build_index(offline_index, crawl_functions, full=args.full)
+    finally:
+        offline_index.close()
+
+
 def format(args):
     '''The function for handling the subcommand format'''
+    # if a daemon was passed, we send the formatting to it instead of doing it here
+    # the paths are made absolute, since the daemon's working directory probably isn't ours
+    if args.daemon:
+        parameters = {name: getattr(args, name) for name in format_job_defaults if name != 'daemon'}
+        parameters['input'] = os.path.abspath(args.input)
+        parameters['output'] = os.path.abspath(args.output) if args.output else os.getcwd()
+        daemon.DaemonClient(args.daemon).run_job('format', parameters)
+        return
+
     # giving a warning that the format type defaulted to manga if none was given (if giving warnings is enabled)
     if args.content_format == None:
         if not args.disable_warnings:
             print('No content type was given for formatting, meaning it will default to formatting the content as manga. To format a webtoon pass \'--content-format webtoon\'')
         args.content_format = 'manga'
 
-    # a dict for the different imports for formatting, to avoid a ton of if statements
-    format_imports = {
-        'pdf': {
-            'manga': { # this section is for chapters vs whole series, as determined by is_series.
-                True: pdf_manga.PDFMangaSeries, # is is_series, is true
-                False: pdf_manga.PDFMangaChapter, # if is_series is false
-            },
-            'webtoon': {
-                True: pdf_webtoon.PDFWebtoonSeries,
-                False: pdf_webtoon.PDFWebtoonChapter,
-            },
-        },
-        'epub': {
-            'manga': {
-                True: epub_manga.EPUBMangaSeries,
-                False: epub_manga.EPUBMangaChapter,
-            },
-        },
-    }
-
     # attempting to infer the file format from -o if none was given (so if -o is ~/output/file.pdf for example)
     # if -o was a directory, then we raise an error
     if args.file_format == None:
@@ -422,16 +477,19 @@ def format(args):
             print(f'--is-series was not passed, so we inferred the content {({True: 'was a series', False: 'was a chapter/episode'}.get(args.is_series))}. To manually set this, pass --is-series (true/false), or to disable this and other warnings pass --disable-warnings')
         
     # raising an error if the file format we ended up with is unrecognized
-    if format_imports.get(args.file_format.lower().lstrip('.')) == None:
-        raise Exception(f'Formatting \'{args.file_format}\' files is unsupported. The supported file types are: \n{', '.join(format_imports.keys())}')
+    if args.file_format.lower().lstrip('.') not in registry.get_file_formats():
+        raise Exception(f'Formatting \'{args.file_format}\' files is unsupported. The supported file types are: \n{', '.join(registry.get_file_formats())}')
 
     # if it's a series, and we're formatting into multiple files, we check if the output path is to a directory
     if not args.chapters_per_file is None and (not os.path.exists(args.output) or not os.path.isdir(args.output)):
         raise Exception(f'The specificed output path \'({args.output})\' is not to a directory, which is required when formatting a set amount of chapters per file. (When --chapters-per-file is passed)')
 
 
-    # now we use that dict to get the class we're using for formatting
-    formatting_class = format_imports.get(args.file_format.lower().lstrip('.')).get(args.content_format).get(args.is_series)
+    # now we get the class we're using for formatting from the registry, which only imports the formatter we're using
+    formatter = registry.get_formatter(args.file_format, args.content_format)
+    if formatter is None:
+        raise Exception(f'Formatting {args.content_format} as \'{args.file_format}\' files is unsupported')
+    formatting_class = formatter.get_formatting_class(args.is_series)
 
     # now we initialize the object
     # if -i wasn't passed, we default to the current directory
@@ -467,35 +525,103 @@ def download(args):
     else:
         output_path = os.getcwd()
 
-    # here we check if we should be downloading a specific chapter
-    if args.chapter:
-        # then we check if there's a dash (if we should dowpnload multiple chapters, but not the whole series
-        if args.chapter.__contains__('-'):
-            download_chapters(args.text, int(args.chapter.split('-')[0]) - 1, int(args.chapter.split('-')[1]) - 1 if args.chapter.split('-')[1] != '' else None, output_path, args.redownload)
-        # just downloading one chapter
-        else:
-            download_chapter_by_chapter_num(args.text, int(args.chapter), output_path, args.redownload)
+    # if a daemon was passed, we send the download to it instead of doing it here
+    # the output path is made absolute, since the daemon's working directory probably isn't ours
+    if args.daemon:
+        daemon.DaemonClient(args.daemon).run_job('download', {'url': args.text, 'chapter': args.chapter, 'output': os.path.abspath(output_path), 'redownload': args.redownload, 'image_workers': args.image_workers, 'chapters_in_flight': args.chapters_in_flight, 'journal': not args.no_journal, 'verify': args.verify, 'store': args.store})
+        return
+
+    # making sure there's enough connections kept alive per host for all the images being downloaded at once
+    # (plus the chapters getting their image urls ahead of time)
+    common.configure_sessions(pool_maxsize=max(common.session_pool_maxsize, args.image_workers + args.chapters_in_flight))
+
+    # setting how many times failed requests get retried
+    retry.configure_default_policy(max_attempts=args.retries + 1)
+
+    # opening the response cache for series and chapter pages (unless disabled), so running the same command again doesn't request them all again
+    if not args.no_cache:
+        cache.configure_default_cache(refresh=args.refresh)
+
+    # opening the journal in the root of the output path, which keeps track of what's been downloaded so it can be skipped next time without requesting anything
+    journal = None if args.no_journal else download_journal.open_journal(output_path, verify_hashes=args.verify)
+
+    # opening the content store in the root of the output path (if enabled), so images that are the same are only saved once
+    store = download_store.open_store(output_path) if args.store else None
 
-    # otherwise we just download as usual
+    download_url(args.text, args.chapter, output_path, args.redownload, image_workers=args.image_workers, chapters_in_flight=args.chapters_in_flight, journal=journal, store=store)
+
+
+def download_url(url: str, chapter: str or None, output_path: str, redownload: bool, show_updates_in_terminal: bool = True, image_workers: int = 1, chapters_in_flight: int = 0, journal: download_journal.DownloadJournal or None = None, store: download_store.ContentStore or None = None, interactive: bool = True) -> bool:
+    '''Downloads a url, or only some of it's chapters if chapter is passed. This is what download and the daemon's download jobs use. Returns True if a scraper matched the url, otherwise returns False
+    :param url: The url to download
+    :param chapter: The chapter (like '4') or chapters (like '1-4' or '4-') to download from a series. If None, the whole url is downloaded
+    :param output_path: The output path to save the downloaded images to
+    :param redownload: If a chapter should be redownloaded, even if already downloaded
+    :param show_updates_in_terminal: If we should show updates in the terminal
+    :param image_workers: How many images can be downloaded at the same time
+    :param chapters_in_flight: How many upcoming chapters get their image urls fetched while the current chapter's images are downloading
+    :param journal: The journal keeping track of what's been downloaded
+    :param store: The content store to keep the images in, so images that are the same are only saved once
+    :param interactive: If the user can be asked things (like picking another chapter if the chapter isn't valid). The daemon passes False, since there's nobody to ask'''
+    # if we're downloading the whole url, download_generic works out if it's a chapter or series
+    if not chapter:
+        return download_generic(url, output_path, redownload, show_updates_in_terminal, image_workers=image_workers, chapters_in_flight=chapters_in_flight, journal=journal, store=store)
+
+    # otherwise we make sure there's a scraper for the series before downloading some of it's chapters
+    if get_scraper_name_by_url(url) is None:
+        if show_updates_in_terminal:
+            print(f'No scrapers matched the url \'{url}\'')
+        return False
+
+    # then we check if there's a dash (if we should dowpnload multiple chapters, but not the whole series
+    if chapter.__contains__('-'):
+        download_chapters(url, int(chapter.split('-')[0]) - 1, int(chapter.split('-')[1]) - 1 if chapter.split('-')[1] != '' else None, output_path, redownload, show_updates_in_terminal, image_workers=image_workers, chapters_in_flight=chapters_in_flight, journal=journal, store=store)
+    # just downloading one chapter
     else:
-        download_generic(args.text, output_path, args.redownload)
+        download_chapter_by_chapter_num(url, int(chapter), output_path, redownload, show_updates_in_terminal, image_workers=image_workers, journal=journal, store=store, interactive=interactive)
+    return True
+
+
+def find_search_results(query: str, adult: bool or None, results_per_website: int = 3, website_id: str or None = None, offline: bool = False, timeout: float or None = 10, show_updates_in_terminal: bool = True) -> list[SearchResult]:
+    '''Searches every website, one website (if website_id is passed), or the offline index (if offline is True). This is what search_from_cli and the daemon's search jobs use
+    :param query: The search query
+    :param adult: If search results should include adult content
+    :param results_per_website: How many results to take from each site when searching every site
+    :param website_id: The ID of a website to search instead of every website. Every result from it is returned
+    :param offline: If the offline index should be searched instead of the websites
+    :param timeout: How many seconds to wait for the sites to respond when searching every site
+    :param show_updates_in_terminal: If results should be printed as they come in when searching every site'''
+    # if it's an offline search, we search the index instead of the websites
+    if offline:
+        return offline_search(query, adult, results_per_website, website_id=website_id)
+    # if it's only one website we just use the scraper's search function directly
+    elif website_id:
+        return common.cached_search(website_id, get_scraper_mappings().get(website_id).get('search_function'), query, adult)
+    # otherwise it's a meta search (searching all websites), so we use the search function
+    return search(query, adult, results_per_website, timeout=timeout, show_updates_in_terminal=show_updates_in_terminal)
+
 
 def search_from_cli(args):
     '''Takes paramter args, and uses those args to search, then download the selected search result
     The reason it's not named like the other cli commands, is because there was already a search function in main, and for now I don't feel like seperating the functions into different files, or thinking of new names'''
     # first we get the search results
-    # if it's a meta search (searching all websites) we use the search function
-    # otherwise we just use the scraper's search function directly
     if args.website:
         # here we check if the given website id is valid
         if get_scraper_mappings().get(args.website) == None:
             # now we tell the user that it wasn't valid, and how to get a list of them
             print(f'\'{args.website}\' wasn\'t a valid website ID. To see all valid website IDs run:\nmangadl list-ids')
             return
-        # we try here in case we get an error
-        search_results = get_scraper_mappings().get(args.website).get('search_function')(args.text, args.adult)
+
+    # if a daemon was passed, it does the search (using it's own search result cache)
+    if args.daemon:
+        search_job = daemon.DaemonClient(args.daemon).run_job('search', {'query': args.text, 'adult': args.adult, 'count': args.count, 'website': args.website, 'offline': args.offline, 'timeout': args.search_timeout})
+        search_results = [SearchResult(search_result['name'], search_result['url'], search_result['website_id']) for search_result in search_job['result']]
     else:
-        search_results = search(args.text, args.adult, args.count)
+        # opening the search result cache (unless disabled), so searching the same thing again doesn't request anything
+        if not args.no_cache:
+            cache.configure_default_search_cache(refresh=args.refresh)
+
+        search_results = find_search_results(args.text, args.adult, args.count, website_id=args.website, offline=args.offline, timeout=args.search_timeout)
 
     # next, we construct the search results stuff we'll print
     search_results_user_prompt = 'Please enter the number of the manga you\'d like to download'
@@ -550,6 +676,51 @@ def search_from_cli(args):
 def list_ids():
     print('\n'.join(get_scraper_mappings().keys()))
 
+
+def run_download_job(job_manager: daemon.JobManager, parameters: dict):
+    '''Runs a download job sent to the daemon. The parameters are the same as download's arguments, with url instead of text
+    :param job_manager: The daemon's job manager, which keeps journals and content stores open between jobs
+    :param parameters: The job's parameters'''
+    output_path = parameters.get('output') or os.getcwd()
+
+    journal = job_manager.get_journal(output_path, parameters.get('verify', False)) if parameters.get('journal', True) else None
+    store = job_manager.get_store(output_path) if parameters.get('store', False) else None
+
+    if not download_url(parameters.get('url'), parameters.get('chapter'), output_path, parameters.get('redownload', False), image_workers=parameters.get('image_workers', 4), chapters_in_flight=parameters.get('chapters_in_flight', 2), journal=journal, store=store, interactive=False):
+        raise Exception(f'No scrapers matched the url \'{parameters.get('url')}\'')
+
+
+def run_search_job(job_manager: daemon.JobManager, parameters: dict) -> list[dict]:
+    '''Runs a search job sent to the daemon, and returns the search results as dicts (with their name, url, and website_id)
+    :param job_manager: The daemon's job manager
+    :param parameters: The job's parameters, which are query, adult, count, website, offline, and timeout (the same as search's arguments)'''
+    if parameters.get('website') and get_scraper_mappings().get(parameters.get('website')) is None:
+        raise Exception(f'\'{parameters.get('website')}\' isn\'t a valid website ID')
+
+    search_results = find_search_results(parameters.get('query'), parameters.get('adult'), parameters.get('count', 3), website_id=parameters.get('website'), offline=parameters.get('offline', False), timeout=parameters.get('timeout', 10))
+    return [{'name': search_result.name, 'url': search_result.url, 'website_id': search_result.website_id} for search_result in search_results]
+
+
+def run_format_job(job_manager: daemon.JobManager, parameters: dict):
+    '''Runs a format job sent to the daemon. The parameters are the same as format's arguments
+    :param job_manager: The daemon's job manager
+    :param parameters: The job's parameters'''
+    format(argparse.Namespace(**{**format_job_defaults, **parameters, 'daemon': None}))
+
+
+def serve(args):
+    '''Runs the daemon (see daemon.py), which downloads, searches, and formats things sent to it by other mangadl commands with --daemon'''
+    # the connection pools, caches, and retries are set up once for every job, which is most of what the daemon saves compared to running mangadl for each one
+    # there's enough connections kept alive per host for every worker to download a few images at once
+    common.configure_sessions(pool_maxsize=max(common.session_pool_maxsize, args.workers * 8))
+    retry.configure_default_policy(max_attempts=args.retries + 1)
+    if not args.no_cache:
+        cache.configure_default_cache()
+        cache.configure_default_search_cache()
+
+    daemon.serve({'download': run_download_job, 'search': run_search_job, 'format': run_format_job}, args.host, args.port, args.workers)
+
+
 def run():
     '''This does all the handling of the arguments when run from the command line'''
     # first we declare a parser to parse the arguments
@@ -564,6 +735,8 @@ def run():
     format_parser = subparsers.add_parser('format', help='Formats downloaded manga into a given file format')
     search_parser = subparsers.add_parser('search', help='Searches all a website(s), and downloads the selected series')
     list_ids_parser = subparsers.add_parser('list-ids', help='Lists all valid website IDs')
+    index_parser = subparsers.add_parser('index', help='Manages the offline index of series titles used by search --offline')
+    serve_parser = subparsers.add_parser('serve', help='Runs a daemon that downloads, searches, and formats things sent to it with --daemon, so every command shares the same connection pools and caches')
 
     # ------------------------------------------------------------------------- DOWNLOAD -------------------------------------------------------------------------
     # add the text argument to the group
@@ -573,6 +746,15 @@ def run():
     download_parser.add_argument('--output', '-o', type=str, help='The output path where the extracted data will be saved')
     download_parser.add_argument('--chapter', '-c', type=str, help='The specific chapter to be downloaded from a series. I.e, if you wanna download chapter four of one piece, you could pass -c 4. It can also be multiple chapters like: --chapter 0-4, or --chapter 0:4')
     download_parser.add_argument('--redownload', action='store_true', default=False, help='If chapters should be redownloaded, even if already downloaded. Defaults to false.')
+    download_parser.add_argument('--image-workers', type=int, default=4, help='How many images of a chapter to download at the same time. Defaults to 4, pass 1 to download them one after another.')
+    download_parser.add_argument('--chapters-in-flight', type=int, default=2, help='How many upcoming chapters to get the image urls for while the current chapter downloads. Defaults to 2, pass 0 to get them one chapter at a time.')
+    download_parser.add_argument('--retries', type=int, default=4, help='How many times a failed request (connection errors, timeouts, and status codes like 429 and 503) is retried, with exponential backoff. Defaults to 4.')
+    download_parser.add_argument('--no-journal', action='store_true', default=False, help='If the download journal shouldn\'t be used. Without it, every chapter\'s page is requested to check if it\'s already been downloaded.')
+    download_parser.add_argument('--verify', action='store_true', default=False, help='If already downloaded images should be hashed to check they weren\'t changed or corrupted, instead of only checking their size. Slower, since every image is read.')
+    download_parser.add_argument('--store', action='store_true', default=False, help='If images should be kept in a content store (.mangadl-store in the output path) and hardlinked into place, so images that are the same (like credit pages, or the same chapter from a mirror) are only saved once.')
+    download_parser.add_argument('--no-cache', action='store_true', default=False, help='If series and chapter pages shouldn\'t be cached. By default they\'re cached (in ~/.cache/mangadl) for as long as each website\'s scraper says they stay the same.')
+    download_parser.add_argument('--daemon', type=str, default=os.environ.get('MANGADL_DAEMON'), help='The url of a daemon started with \'mangadl serve\' (like http://127.0.0.1:8420) to send the download to instead of this process. Defaults to the MANGADL_DAEMON environment variable.')
+    download_parser.add_argument('--refresh', action='store_true', default=False, help='If cached series and chapter pages should be checked with the website again, instead of using the cached ones. Pages that haven\'t changed aren\'t downloaded again if the website supports it (ETag or Last-Modified).')
 
     # ------------------------------------------------------------------------- FORMAT -------------------------------------------------------------------------
     format_parser.add_argument('--output', '-o', type=str, help='The path to where the formatted content will be outputed. Can be a directory (~/output/path), or a path to a file where it will infer the file type format the content as (~/output/file.pdf)')
@@ -584,6 +766,7 @@ def run():
     format_parser.add_argument('--file-format', type=str, help='The file format to formata the content into. Only required if -o isn\'t a path to a file (~/output/file.pdf)')
     format_parser.add_argument('--series-name', type=str, help='The name of the series. Defaults to \'\', only used if using --chapters-per-file')
     format_parser.add_argument('--infer-series-name', type=bool, help='If --series-name should try to be inferred if not passed', default=True)
+    format_parser.add_argument('--daemon', type=str, default=os.environ.get('MANGADL_DAEMON'), help='The url of a daemon started with \'mangadl serve\' (like http://127.0.0.1:8420) to do the formatting in instead of this process. Defaults to the MANGADL_DAEMON environment variable.')
     format_parser.add_argument('--disable-warnings', help='If warnings such as defaulting to manga for formatting should be disabled', action='store_true')
 
     # ------------------------------------------------------------------------- Search -------------------------------------------------------------------------
@@ -595,12 +778,38 @@ def run():
     search_parser.add_argument('--adult', '-a', type=bool, help='If search results should include adult content')
     search_parser.add_argument('--count', type=int, help='How many search results to take from each website when searching all websites. Default is 3', default=3)
     search_parser.add_argument('--website', '-w', type=str, help='The ID of a website to be searched instead of all websites')
+    search_parser.add_argument('--offline', action='store_true', default=False, help='If the offline index should be searched instead of the websites. Only websites crawled with \'mangadl index build\' are searched.')
+    search_parser.add_argument('--search-timeout', type=float, default=10, help='How many seconds each website gets to respond when searching all websites. Websites that take longer are skipped. Defaults to 10.')
 
     # the download args
     search_parser.add_argument('--output', '-o', type=str, help='The output path where the extracted data will be saved')
     search_parser.add_argument('--chapter', '-c', type=str, help='The specific chapter to be downloaded from a series. I.e, if you wanna download chapter four of one piece, you could pass -c 4. It can also be multiple chapters like: --chapter 0-4, or --chapter 0:4')
     search_parser.add_argument('--redownload', action='store_true', default=False, help='If chapters should be redownloaded, even if already downloaded. Defaults to false.')
+    search_parser.add_argument('--image-workers', type=int, default=4, help='How many images of a chapter to download at the same time. Defaults to 4, pass 1 to download them one after another.')
+    search_parser.add_argument('--chapters-in-flight', type=int, default=2, help='How many upcoming chapters to get the image urls for while the current chapter downloads. Defaults to 2, pass 0 to get them one chapter at a time.')
+    search_parser.add_argument('--retries', type=int, default=4, help='How many times a failed request (connection errors, timeouts, and status codes like 429 and 503) is retried, with exponential backoff. Defaults to 4.')
+    search_parser.add_argument('--no-journal', action='store_true', default=False, help='If the download journal shouldn\'t be used. Without it, every chapter\'s page is requested to check if it\'s already been downloaded.')
+    search_parser.add_argument('--verify', action='store_true', default=False, help='If already downloaded images should be hashed to check they weren\'t changed or corrupted, instead of only checking their size. Slower, since every image is read.')
+    search_parser.add_argument('--store', action='store_true', default=False, help='If images should be kept in a content store (.mangadl-store in the output path) and hardlinked into place, so images that are the same (like credit pages, or the same chapter from a mirror) are only saved once.')
+    search_parser.add_argument('--no-cache', action='store_true', default=False, help='If search results, and series and chapter pages shouldn\'t be cached. By default search results are cached (in ~/.cache/mangadl) for a day, and pages for as long as each website\'s scraper says they stay the same.')
+    search_parser.add_argument('--daemon', type=str, default=os.environ.get('MANGADL_DAEMON'), help='The url of a daemon started with \'mangadl serve\' (like http://127.0.0.1:8420) to search and download with instead of this process. Defaults to the MANGADL_DAEMON environment variable.')
+    search_parser.add_argument('--refresh', action='store_true', default=False, help='If every website should be searched again instead of using cached search results, and cached series and chapter pages should be checked with the website again. Pages that haven\'t changed aren\'t downloaded again if the website supports it (ETag or Last-Modified).')
     
+    # ------------------------------------------------------------------------- INDEX -------------------------------------------------------------------------
+    index_subparsers = index_parser.add_subparsers(dest='index_command', required=True)
+    index_build_parser = index_subparsers.add_parser('build', help='Crawls the catalogs of websites that have one into the offline index. After the first time, only series updated since the last crawl are requested')
+    index_build_parser.add_argument('--website', '-w', type=str, nargs='+', help='The IDs of the websites to crawl. Defaults to every website that has a catalog')
+    index_build_parser.add_argument('--full', action='store_true', default=False, help='If every series should be requested again, instead of only the ones updated since the last crawl')
+    index_build_parser.add_argument('--index-path', type=str, help='The path to the index\'s database file. Defaults to index.sqlite3 in ~/.cache/mangadl')
+    index_build_parser.add_argument('--retries', type=int, default=4, help='How many times a failed request (connection errors, timeouts, and status codes like 429 and 503) is retried, with exponential backoff. Defaults to 4.')
+
+    # ------------------------------------------------------------------------- SERVE -------------------------------------------------------------------------
+    serve_parser.add_argument('--host', type=str, default=daemon.default_daemon_host, help=f'The address the daemon listens on. Defaults to {daemon.default_daemon_host}. The daemon has no authentication, so anyone who can reach it can use it.')
+    serve_parser.add_argument('--port', type=int, default=daemon.default_daemon_port, help=f'The port the daemon listens on. Defaults to {daemon.default_daemon_port}.')
+    serve_parser.add_argument('--workers', type=int, default=2, help='How many jobs can run at the same time. Defaults to 2, jobs sent while they\'re all busy wait in a queue.')
+    serve_parser.add_argument('--retries', type=int, default=4, help='How many times a failed request (connection errors, timeouts, and status codes like 429 and 503) is retried, with exponential backoff. Defaults to 4.')
+    serve_parser.add_argument('--no-cache', action='store_true', default=False, help='If search results, and series and chapter pages shouldn\'t be cached.')
+
     # next we parse the arguments
     args = parser.parse_args()
 
@@ -616,4 +825,10 @@ def run():
         search_from_cli(args)
 
     elif args.command == 'list-ids':
-        list_ids()
\ No newline at end of file
+        list_ids()
+
+    elif args.command == 'index' and args.index_command == 'build':
+        build_index(args)
+
+    elif args.command == 'serve':
+        serve(args)
\ No newline at end of file
@@ -0,0 +1,133 @@
+import heapq
+import re
+import unicodedata
+
+# these are how much each part of the similarity score counts for (see get_similarity_score). They add up to 1, so scores are between 0 and 1
+trigram_weight = 0.6
+token_weight = 0.3
+prefix_weight = 0.1
+
+# this matches everything that isn't a letter or number, which are all turned into spaces when normalizing titles
+non_alphanumeric_pattern = re.compile(r'[\W_]+')
+
+# rapidfuzz is an optional dependency (pip install mangadl[fast-search]). If it's installed, it's used to score titles, since it's written in C++
+try:
+    from rapidfuzz import fuzz as rapidfuzz_fuzz
+except ImportError:
+    rapidfuzz_fuzz = None
+
+
+class PreparedQuery:
+    '''Stores a search query after it's been normalized and split into tokens and trigrams, so that's only done once instead of once per search result
+
+    Example Code:
+    from ranking import PreparedQuery, get_similarity_score
+
+    query = PreparedQuery('The Beginning After the End')
+
+    score = get_similarity_score(query, 'Beginning After The End')
+    '''
+
+    def __init__(self, query: str):
+        ''':param query: The string that was searched'''
+        self.query = query
+        self.normalized = normalize_title(query)
+        self.tokens = set(self.normalized.split())
+        self.trigrams = get_trigrams(self.normalized)
+
+
+def normalize_title(title: str) -> str:
+    '''Returns a title in a form that can be compared to other titles. That means it's lowercase, accents are removed, and punctuation is turned into spaces
+    So 'Pokémon: Adventures!' becomes 'pokemon adventures'
+    :param title: The title to normalize'''
+    # first we split accented letters into the letter and the accent (NFKD), and throw away the accents
+    title = ''.join(character for character in unicodedata.normalize('NFKD', title) if not unicodedata.combining(character))
+
+    # then we make it lowercase, and turn punctuation into spaces
+    return ' '.join(non_alphanumeric_pattern.sub(' ', title.casefold()).split())
+
+
+def get_trigrams(normalized_title: str) -> set[str]:
+    '''Returns every group of 3 characters in each word of a normalized title
+    Each word is padded with spaces first, so short words and the starts and ends of words still count
+    :param normalized_title: A title that's been through normalize_title'''
+    trigrams = set()
+    for word in normalized_title.split():
+        padded_word = f'  {word} '
+        for i in range(len(padded_word) - 2):
+            trigrams.add(padded_word[i:i + 3])
+    return trigrams
+
+
+def get_similarity_score(query: PreparedQuery, title: str) -> float:
+    '''Returns how similar a title is to a query, from 0 (nothing in common) to 1 (the same once normalized)
+    If rapidfuzz is installed, it's used for the score. Otherwise the score is a mix of how many trigrams they share (Dice coefficient), how many words they share (Jaccard index), and if the title starts with the query
+    Unlike difflib.SequenceMatcher this is linear in the length of the title, and doesn't care about word order or punctuation
+    :param query: The query, as a PreparedQuery
+    :param title: The title of the search result'''
+    normalized_title = normalize_title(title)
+
+    # exact matches are always the best result
+    if normalized_title == query.normalized:
+        return 1.0
+
+    if rapidfuzz_fuzz is not None:
+        # the score is capped just under 1, so exact matches are still ranked first
+        return min(rapidfuzz_fuzz.WRatio(query.normalized, normalized_title, processor=None) / 100, 0.999)
+
+    # the trigram score, which handles typos and small differences
+    title_trigrams = get_trigrams(normalized_title)
+    if query.trigrams or title_trigrams:
+        trigram_score = 2 * len(query.trigrams & title_trigrams) / (len(query.trigrams) + len(title_trigrams))
+    else:
+        trigram_score = 0
+
+    # the token score, which handles words being in a different order
+    title_tokens = set(normalized_title.split())
+    if query.tokens or title_tokens:
+        token_score = len(query.tokens & title_tokens) / len(query.tokens | title_tokens)
+    else:
+        token_score = 0
+
+    # and a bit extra if the title starts with the query, since that's usually the series being searched for (and not a spin off)
+    prefix_score = 1 if query.normalized and normalized_title.startswith(query.normalized) else 0
+
+    return trigram_weight * trigram_score + token_weight * token_score + prefix_weight * prefix_score
+
+
+def get_top_matches(items: list, query: str, limit: int or None = None, key: callable = lambda item: item.name) -> list:
+    '''Returns the items whose titles are the most similar to the query (see get_similarity_score), best first
+    If there's a limit, only the best limit items are kept with a heap, instead of sorting all of them
+    Items with the same score stay in the order they were passed in
+
+    Example Code:
+    from ranking import get_top_matches
+
+    search_results = search('The Beginning After the End')
+
+    # this keeps the best 3 results
+    best_search_results = get_top_matches(search_results, 'The Beginning After the End', 3)
+    :param items: The items to rank, like a list of SearchResults
+    :param query: The string that was searched
+    :param limit: The most items to return. If None, every item is returned
+    :param key: A function that returns an item's title, or a list of titles (like it's name and alternative names) in which case the best scoring one is used. Defaults to it's name attribute'''
+    prepared_query = PreparedQuery(query)
+
+    # the index is there so items with the same score stay in order, and items never get compared with each other
+    scored_items = ((get_best_similarity_score(prepared_query, key(item)), -i, item) for i, item in enumerate(items))
+
+    if limit is None:
+        top_items = sorted(scored_items, key=lambda x: x[:2], reverse=True)
+    else:
+        top_items = heapq.nlargest(limit, scored_items, key=lambda x: x[:2])
+
+    return [item for score, i, item in top_items]
+
+
+def get_best_similarity_score(query: PreparedQuery, titles: str or list[str]) -> float:
+    '''Returns the best similarity score (see get_similarity_score) out of a list of titles, like a series' name and it's alternative names
+    :param query: The query, as a PreparedQuery
+    :param titles: A title, or a list of titles'''
+    if isinstance(titles, str):
+        return get_similarity_score(query, titles)
+    return max((get_similarity_score(query, title) for title in titles), default=0)
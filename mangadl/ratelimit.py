@@ -0,0 +1,197 @@
+import asyncio
+import math
+import threading
+import time
+import email.utils
+from urllib import parse
+
+# these are the status codes that mean a host wants us to slow down
+slow_down_status_codes = [429, 503]
+
+# this is how long acquire waits before checking again when a host has too many requests in flight
+# (release wakes it up sooner than that in the sync version, this is mainly for async_acquire)
+concurrency_poll_interval = 0.05
+
+# this stores the default limits scrapers declare for their hosts, by domain (see register_host_limits)
+# every scraper has a rate_limit dict next to it's urls, which it registers here when it's imported. They're only the starting limits: if a host returns 429s or 503s they're lowered automatically, then slowly raised back (see HostRateLimiter)
+# so scrapers only need a comment on their rate_limit if there's a reason that site needs different numbers (like being behind cloudflare)
+host_limits: dict[str, dict] = {}
+
+# every hostname gets it's own limiter, these are stored here so they're shared by every scraper and the image downloader
+limiters: dict[str, 'HostRateLimiter'] = {}
+limiters_lock = threading.Lock()
+
+
+class HostRateLimiter:
+    '''Limits how fast, and how many requests at once, are sent to a single host
+    The rate is a token bucket (requests_per_second, with up to burst requests at once after being idle), and the amount of requests at once is adjusted with AIMD (additive increase, multiplicative decrease)
+    Every successful response raises the concurrency limit a little (and the rate, if it was lowered), and every 429/503 halves them. A Retry-After header also pauses the host for that long
+
+    Example Code:
+    from ratelimit import HostRateLimiter
+
+    limiter = HostRateLimiter(requests_per_second=5, max_concurrency=4)
+
+    limiter.acquire()
+    response = requests.get('https://api.mangadex.org/manga')
+    limiter.release(response.status_code, get_retry_after(response.headers))
+    '''
+
+    def __init__(self, requests_per_second: float or None = None, burst: int or None = None, max_concurrency: int or None = None, min_concurrency: int = 1):
+        ''':param requests_per_second: The most requests that will be started per second. None means there's no limit until the host says to slow down
+        :param burst: How many requests can be started at once after being idle. Defaults to requests_per_second (rounded up)
+        :param max_concurrency: The most requests that can be in flight at once. None means there's no limit until the host says to slow down
+        :param min_concurrency: The concurrency limit never gets lowered below this'''
+        # the rate limit stuff (the token bucket)
+        self.max_requests_per_second = requests_per_second
+        self.requests_per_second = requests_per_second
+        self.burst = burst if burst is not None else (max(1, math.ceil(requests_per_second)) if requests_per_second else None)
+        self.tokens = float(self.burst) if self.burst else 0.0
+        self.last_refill = time.monotonic()
+
+        # the concurrency limit stuff (the AIMD part)
+        # concurrency_limit is a float so it can go up by less than 1 per response, it's floored when it's used
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency_limit = float(max_concurrency) if max_concurrency else None
+        self.in_flight = 0
+
+        # this is set from Retry-After, no requests are started until then
+        self.paused_until = 0.0
+
+        self.condition = threading.Condition()
+
+    def try_acquire(self) -> float:
+        '''Tries to take a slot for a request. Returns 0 if it did, otherwise returns how many seconds to wait before trying again
+        If this returns 0, release must be called once the request is done'''
+        with self.condition:
+            now = time.monotonic()
+
+            # first we check if the host told us to wait
+            if now < self.paused_until:
+                return self.paused_until - now
+
+            # then we check if there's already too many requests in flight
+            if self.concurrency_limit is not None and self.in_flight >= max(self.min_concurrency, int(self.concurrency_limit)):
+                return concurrency_poll_interval
+
+            # then we refill the token bucket, and take a token if there is one
+            if self.requests_per_second:
+                self.tokens = min(float(self.burst), self.tokens + (now - self.last_refill) * self.requests_per_second)
+                self.last_refill = now
+                if self.tokens < 1:
+                    return (1 - self.tokens) / self.requests_per_second
+                self.tokens -= 1
+
+            self.in_flight += 1
+            return 0.0
+
+    def acquire(self):
+        '''Waits until a request can be sent to this host, then takes a slot for it. release must be called once the request is done'''
+        while True:
+            wait_time = self.try_acquire()
+            if wait_time <= 0:
+                return
+
+            # waiting until either the wait time is up, or a request finishes (which might free up a slot)
+            with self.condition:
+                self.condition.wait(timeout=wait_time)
+
+    async def async_acquire(self):
+        '''The asyncio version of acquire. It sleeps with asyncio.sleep instead of blocking the thread'''
+        while True:
+            wait_time = self.try_acquire()
+            if wait_time <= 0:
+                return
+            await asyncio.sleep(wait_time)
+
+    def release(self, status_code: int or None = None, retry_after: float or None = None):
+        '''Gives back a slot taken with acquire, and adjusts the limits based on how the request went
+        :param status_code: The response's status code, or None if the request failed without a response
+        :param retry_after: How many seconds the host said to wait (from the Retry-After header), if it did'''
+        with self.condition:
+            self.in_flight -= 1
+
+            if status_code in slow_down_status_codes:
+                # the host wants us to slow down, so we halve everything
+                # if there wasn't a concurrency limit, we start one at half of what was in flight
+                current_concurrency = self.concurrency_limit if self.concurrency_limit is not None else self.in_flight + 1
+                self.concurrency_limit = max(float(self.min_concurrency), current_concurrency / 2)
+                if self.requests_per_second:
+                    self.requests_per_second = max(self.max_requests_per_second / 16, self.requests_per_second / 2)
+
+                # and if it said how long to wait, we stop sending requests until then
+                if retry_after:
+                    self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+            elif status_code is not None and status_code < 400:
+                # the request went through fine, so we slowly go back up towards the limits
+                if self.concurrency_limit is not None:
+                    increased_concurrency_limit = self.concurrency_limit + 1 / max(1.0, self.concurrency_limit)
+                    # if there was no limit to start with, we never stop increasing it, otherwise we stop at max_concurrency
+                    self.concurrency_limit = min(float(self.max_concurrency), increased_concurrency_limit) if self.max_concurrency else increased_concurrency_limit
+                if self.requests_per_second:
+                    self.requests_per_second = min(self.max_requests_per_second, self.requests_per_second + self.max_requests_per_second / 20)
+
+            # waking up anything waiting in acquire, since there's a free slot now
+            self.condition.notify_all()
+
+
+def register_host_limits(urls: list[str], limits: dict):
+    '''Sets the default limits for every host in urls (and their subdomains). This is what scrapers call with their rate_limit next to their urls list
+
+    Example Code:
+    from ratelimit import register_host_limits
+
+    urls = ['mangadex.org']
+    rate_limit = {'requests_per_second': 5, 'max_concurrency': 5}
+    register_host_limits(urls, rate_limit)
+    :param urls: The domains the limits are for (like 'mangadex.org')
+    :param limits: The keyword arguments for HostRateLimiter (requests_per_second, burst, max_concurrency, min_concurrency)'''
+    with limiters_lock:
+        for url in urls:
+            host_limits[url.lower()] = limits
+
+
+def get_host_limits(hostname: str) -> dict:
+    '''Returns the limits registered for a hostname, or for the closest domain it's a subdomain of. So 'api.mangadex.org' gets the limits for 'mangadex.org'
+    If none were registered, it returns {} (no limits until the host says to slow down)'''
+    domain = hostname.lower()
+    while domain:
+        if host_limits.get(domain) is not None:
+            return host_limits[domain]
+        # going up one level ('api.mangadex.org' -> 'mangadex.org')
+        domain = domain.partition('.')[2]
+    return {}
+
+
+def get_rate_limiter(url: str) -> HostRateLimiter:
+    '''Returns the shared HostRateLimiter for a url's hostname, making it with it's registered limits if it doesn't exist yet
+    :param url: The url (or just the hostname) the limiter is for'''
+    hostname = parse.urlparse(url).hostname or url
+
+    with limiters_lock:
+        if limiters.get(hostname) is None:
+            limiters[hostname] = HostRateLimiter(**get_host_limits(hostname))
+        return limiters[hostname]
+
+
+def get_retry_after(headers) -> float or None:
+    '''Returns how many seconds a response's Retry-After header says to wait, or None if it doesn't have one
+    Retry-After can either be a number of seconds, or a date to wait until, so this handles both
+    :param headers: The response's headers'''
+    retry_after = headers.get('Retry-After')
+    if retry_after is None:
+        return None
+
+    # first we try it as seconds
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    # then we try it as a date
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,196 @@
+import importlib
+from importlib import metadata
+
+# third party packages can add scrapers and formatters by declaring entry points in these groups (see discover_plugins)
+scraper_entry_point_group = 'mangadl.scrapers'
+formatter_entry_point_group = 'mangadl.formatters'
+
+# this is what each key of a scraper's mappings (the dicts main.get_scraper_mappings used to return) is called in the scraper's module
+scraper_module_attributes = {
+    'series_class_reference': 'Series',
+    'chapter_class_reference': 'Chapter',
+    'search_function': 'search',
+    'crawl_catalog_function': 'crawl_catalog',
+}
+
+
+class ScraperEntry:
+    '''Describes a scraper without importing it, so the cli can start without importing every scraper (and everything they import, like bs4)
+    The scraper's module is only imported the first time one of it's classes or functions is needed
+    It can be used like the dicts main.get_scraper_mappings used to return, so scraper.get('search_function') still works
+
+    Example Code:
+    from registry import ScraperEntry
+
+    scraper = ScraperEntry('mangadex', 'mangadl.scrapers.mangadex', ['mangadex.org'], has_catalog=True)
+
+    # this doesn't import anything
+    print(scraper.url)
+
+    # this imports mangadl.scrapers.mangadex, then returns it's Series class
+    series_class = scraper.get('series_class_reference')
+    '''
+
+    def __init__(self, website_id: str, module_name: str, urls: list[str], has_catalog: bool = False):
+        ''':param website_id: The scraper's website ID (what's passed to --website, and the website_id of it's SearchResults)
+        :param module_name: The full name of the scraper's module, like 'mangadl.scrapers.mangadex'. It should have a Chapter class, Series class, and search function
+        :param urls: Every domain the scraper supports. The first one is the one shown to users, and the module's own urls should be these (see get_scraper_urls)
+        :param has_catalog: If the module has a crawl_catalog function (see index.py). It's here so finding the websites with catalogs doesn't import every scraper'''
+        self.website_id = website_id
+        self.module_name = module_name
+        self.urls = urls
+        self.url = urls[0]
+        self.has_catalog = has_catalog
+        self.module = None
+
+    def load(self):
+        '''Imports the scraper's module (if it hasn't been already) and returns it'''
+        if self.module is None:
+            self.module = importlib.import_module(self.module_name)
+        return self.module
+
+    def get(self, key: str, default=None):
+        '''Returns one of the scraper's mappings, the same as the dicts main.get_scraper_mappings used to return
+        'url' and 'urls' don't import the scraper, everything else (like 'search_function') does
+        :param key: The name of the mapping, like 'series_class_reference' or 'search_function'
+        :param default: What's returned if the scraper doesn't have it'''
+        if key == 'url':
+            return self.url
+        elif key == 'urls':
+            return self.urls
+        elif key == 'crawl_catalog_function' and not self.has_catalog:
+            return default
+        elif key not in scraper_module_attributes:
+            return default
+        return getattr(self.load(), scraper_module_attributes[key], default)
+
+
+class FormatterEntry:
+    '''Describes a formatter without importing it, since formatters import big libraries (like PIL, PyPDF2, reportlab, and ebooklib)
+    The formatter's module is only imported when one of it's classes is needed
+
+    Example Code:
+    from registry import FormatterEntry
+
+    formatter = FormatterEntry('pdf', 'manga', 'mangadl.formatters.pdf.manga', 'PDFMangaSeries', 'PDFMangaChapter')
+
+    formatting_class = formatter.get_formatting_class(is_series=True)
+    '''
+
+    def __init__(self, file_format: str, content_format: str, module_name: str, series_class_name: str, chapter_class_name: str):
+        ''':param file_format: The file format it makes, without a period (like 'pdf')
+        :param content_format: What kind of content it formats, like 'manga' or 'webtoon'
+        :param module_name: The full name of the formatter's module, like 'mangadl.formatters.pdf.manga'
+        :param series_class_name: The name of the class in the module that formats whole series
+        :param chapter_class_name: The name of the class in the module that formats single chapters'''
+        self.file_format = file_format
+        self.content_format = content_format
+        self.module_name = module_name
+        self.series_class_name = series_class_name
+        self.chapter_class_name = chapter_class_name
+
+    def get_formatting_class(self, is_series: bool) -> type:
+        '''Imports the formatter's module (if it hasn't been already) and returns the class for series or chapters
+        :param is_series: If the class for formatting whole series should be returned, instead of the one for chapters'''
+        return getattr(importlib.import_module(self.module_name), self.series_class_name if is_series else self.chapter_class_name)
+
+
+# these are the scrapers that come with mangadl, in the order they're searched and matched against urls
+builtin_scrapers = [
+    ScraperEntry('mangaread', 'mangadl.scrapers.mangaread', ['mangaread.org']),
+    ScraperEntry('manganato', 'mangadl.scrapers.natomanga', ['natomanga.com', 'mangakakalove.com',
+        'mgkklot.info', 'mgnato.info', 'manganato.my']), # the reason these are on the second line is because they redirect to the above line's urls
+    ScraperEntry('mangabuddy', 'mangadl.scrapers.mangabuddy', ['mangabuddy.com']),
+    ScraperEntry('webtoons', 'mangadl.scrapers.webtoons', ['webtoons.com']),
+    ScraperEntry('mangatown', 'mangadl.scrapers.mangatown', ['mangatown.com']),
+    ScraperEntry('1manga', 'mangadl.scrapers.onemanga', ['1manga.co']),
+    ScraperEntry('bato', 'mangadl.scrapers.bato', ['ato.to', 'dto.to', 'fto.to', 'hto.to', 'jto.to', 'lto.to', 'mto.to', 'nto.to', 'vto.to', 'wto.to', 'xto.to', 'yto.to', 'vba.to', 'wba.to', 'xba.to', 'yba.to', 'zba.to', 'bato.ac', 'bato.bz', 'bato.cc', 'bato.cx', 'bato.id', 'bato.pw', 'bato.sh', 'bato.to', 'bato.vc', 'bato.day', 'bato.red', 'bato.run', 'batoto.in', 'batoto.tv', 'batotoo.com', 'batotwo.com', 'batpub.com', 'batread.com', 'battwo.com', 'bato.to', 'xbato.net', 'xbato.org', 'zbato.com', 'zbato.net', 'zbato.org', 'comiko.net', 'comiko.org', 'mangatoto.com', 'mangatoto.net', 'mangatoto.org', 'batocomic.com', 'batocomic.net', 'batocomic.org', 'readtoto.com', 'readtoto.net', 'readtoto.org', 'kuku.to', 'okok.to', 'ruru.to', 'xdxd.to']),
+    ScraperEntry('tapas', 'mangadl.scrapers.tapas', ['tapas.io']),
+    ScraperEntry('comix', 'mangadl.scrapers.comix', ['comix.to'], has_catalog=True),
+    ScraperEntry('mangadex', 'mangadl.scrapers.mangadex', ['mangadex.org'], has_catalog=True),
+    ScraperEntry('batov4', 'mangadl.scrapers.bato_v4', ['bato.si', 'bato.ing'], has_catalog=True),
+]
+
+# these are the formatters that come with mangadl
+builtin_formatters = [
+    FormatterEntry('pdf', 'manga', 'mangadl.formatters.pdf.manga', 'PDFMangaSeries', 'PDFMangaChapter'),
+    FormatterEntry('pdf', 'webtoon', 'mangadl.formatters.pdf.webtoon', 'PDFWebtoonSeries', 'PDFWebtoonChapter'),
+    FormatterEntry('epub', 'manga', 'mangadl.formatters.epub.manga', 'EPUBMangaSeries', 'EPUBMangaChapter'),
+]
+
+# these store every scraper and formatter (built in and from plugins) once discover_plugins has been called
+scrapers: dict[str, ScraperEntry] or None = None
+formatters: list[FormatterEntry] or None = None
+
+
+def get_scraper_urls(website_id: str) -> list[str]:
+    '''Returns the domains a built in scraper supports. Scrapers use this for their urls, so the domains are only written down once (here), and routing urls doesn't need to import any scrapers
+    :param website_id: The scraper's website ID'''
+    for scraper in builtin_scrapers:
+        if scraper.website_id == website_id:
+            return scraper.urls
+    raise Exception(f'There is no built in scraper with the website ID \'{website_id}\'')
+
+
+def get_scrapers() -> dict[str, ScraperEntry]:
+    '''Returns every scraper (built in and from plugins) by website ID, without importing any of them'''
+    if scrapers is None:
+        discover_plugins()
+    return scrapers
+
+
+def get_formatters() -> list[FormatterEntry]:
+    '''Returns every formatter (built in and from plugins), without importing any of them'''
+    if formatters is None:
+        discover_plugins()
+    return formatters
+
+
+def get_formatter(file_format: str, content_format: str) -> FormatterEntry or None:
+    '''Returns the formatter for a file format and content format, or None if there isn't one
+    :param file_format: The file format, with or without a period (like 'pdf' or '.pdf')
+    :param content_format: What kind of content is being formatted (like manga or webtoon)'''
+    for formatter in get_formatters():
+        if formatter.file_format == file_format.lower().lstrip('.') and formatter.content_format == content_format:
+            return formatter
+    return None
+
+
+def get_file_formats() -> list[str]:
+    '''Returns every file format that can be formatted into, in the order they were registered'''
+    return list(dict.fromkeys(formatter.file_format for formatter in get_formatters()))
+
+
+def discover_plugins():
+    '''Adds the scrapers and formatters from every installed plugin to the built in ones
+    Plugins are packages that declare entry points in the 'mangadl.scrapers' or 'mangadl.formatters' groups, which point at a ScraperEntry or FormatterEntry, like this in a plugin's pyproject.toml:
+
+    [project.entry-points.'mangadl.scrapers']
+    examplesite = 'mangadl_examplesite.registration:scraper_entry'
+
+    The entry point's module should be small (only making the entry), so the plugin's scraper isn't imported until it's used
+    Plugins that can't be loaded are skipped with a warning, so a broken plugin doesn't break mangadl'''
+    global scrapers, formatters
+    discovered_scrapers = {scraper.website_id: scraper for scraper in builtin_scrapers}
+    discovered_formatters = list(builtin_formatters)
+
+    for entry_point in metadata.entry_points(group=scraper_entry_point_group):
+        try:
+            scraper = entry_point.load()
+        except Exception as e:
+            print(f'Warning: Couldn\'t load the scraper plugin \'{entry_point.name}\' ({e}), so it was skipped')
+            continue
+        # built in scrapers can't be replaced, so a plugin can't change what an existing website ID does
+        if scraper.website_id in discovered_scrapers:
+            print(f'Warning: The scraper plugin \'{entry_point.name}\' uses the website ID \'{scraper.website_id}\', which is already used, so it was skipped')
+            continue
+        discovered_scrapers[scraper.website_id] = scraper
+
+    for entry_point in metadata.entry_points(group=formatter_entry_point_group):
+        try:
+            discovered_formatters.append(entry_point.load())
+        except Exception as e:
+            print(f'Warning: Couldn\'t load the formatter plugin \'{entry_point.name}\' ({e}), so it was skipped')
+
+    scrapers = discovered_scrapers
+    formatters = discovered_formatters
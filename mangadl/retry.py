@@ -0,0 +1,144 @@
+import asyncio
+import random
+import sys
+import threading
+from urllib import parse
+import requests
+
+# these are the status codes that are worth trying again, since they're usually temporary (timeouts, rate limits, and server/CDN errors)
+retryable_status_codes = [408, 425, 429, 500, 502, 503, 504]
+
+
+class RetryPolicy:
+    '''Decides if a failed request should be tried again, and how long to wait before doing so
+    The wait time is exponential backoff (backoff_base * 2^attempt, up to backoff_max) with full jitter, so lots of workers retrying at once don't all hit the host at the same time
+    If the host sent a Retry-After header, we wait at least that long (up to max_retry_after)
+
+    Example Code:
+    from retry import RetryPolicy
+
+    policy = RetryPolicy(max_attempts=3)
+
+    # waiting before the second attempt
+    time.sleep(policy.get_backoff(0))
+    '''
+
+    def __init__(self, max_attempts: int = 5, backoff_base: float = 0.5, backoff_max: float = 30.0, jitter: bool = True, retryable_status_codes: list[int] = retryable_status_codes, max_retry_after: float = 300.0):
+        ''':param max_attempts: The most times a request is sent, including the first time
+        :param backoff_base: How many seconds to wait before the first retry (before jitter)
+        :param backoff_max: The most seconds to wait between attempts (before Retry-After)
+        :param jitter: If the wait time should be randomized between 0 and the backoff
+        :param retryable_status_codes: The status codes that get retried
+        :param max_retry_after: The most seconds to wait because of a Retry-After header. If a host asks for longer than that, we just wait this long'''
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retryable_status_codes = retryable_status_codes
+        self.max_retry_after = max_retry_after
+
+    def get_backoff(self, attempt: int, retry_after: float or None = None) -> float:
+        '''Returns how many seconds to wait before trying again
+        :param attempt: How many attempts have failed already, minus one (so 0 after the first attempt failed)
+        :param retry_after: How many seconds the host said to wait, if it did'''
+        backoff = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        if self.jitter:
+            backoff = random.uniform(0, backoff)
+
+        # the host knows better than we do, so if it told us how long to wait, we wait at least that long
+        if retry_after is not None:
+            backoff = max(backoff, min(retry_after, self.max_retry_after))
+
+        return backoff
+
+    def is_retryable_status(self, status_code: int) -> bool:
+        '''Returns True if a response with this status code should be tried again'''
+        return status_code in self.retryable_status_codes
+
+    def is_retryable_exception(self, exception: BaseException) -> bool:
+        '''Returns True if a request that raised this exception should be tried again
+        That's connection errors, timeouts, and the connection dropping while reading the body, for both requests and aiohttp'''
+        if isinstance(exception, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError, ConnectionError, TimeoutError, asyncio.TimeoutError)):
+            return True
+
+        # aiohttp is optional, so we only check it's exceptions if it's been imported
+        aiohttp = sys.modules.get('aiohttp')
+        if aiohttp is not None and isinstance(exception, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)):
+            return True
+
+        return False
+
+    def can_retry(self, attempt: int, budget: 'RetryBudget' or None = None) -> bool:
+        '''Returns True if there's attempts left, and the host's retry budget (if given) has room for another retry. This takes a retry out of the budget if it returns True
+        :param attempt: How many attempts have failed already, minus one (so 0 after the first attempt failed)
+        :param budget: The host's retry budget'''
+        if attempt + 1 >= self.max_attempts:
+            return False
+        return budget is None or budget.try_spend()
+
+
+class RetryBudget:
+    '''Limits how many retries are sent to one host compared to how many requests are sent to it
+    Every request adds ratio retries to the budget (up to max_retries), and every retry takes one out. This means when a host is down, we stop retrying everything after a while, instead of multiplying the load on it by max_attempts
+
+    Example Code:
+    from retry import RetryBudget
+
+    budget = RetryBudget(ratio=0.2)
+    budget.record_request()
+    if budget.try_spend():
+        # retry the request here
+    '''
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10, max_retries: int = 100):
+        ''':param ratio: How many retries each request adds to the budget
+        :param min_retries: How many retries the budget starts with, so the first few failures can always be retried
+        :param max_retries: The most retries the budget can hold'''
+        self.ratio = ratio
+        self.max_retries = max_retries
+        self.balance = float(min_retries)
+        self.lock = threading.Lock()
+
+    def record_request(self):
+        '''Adds a request to the budget (which adds ratio retries)'''
+        with self.lock:
+            self.balance = min(float(self.max_retries), self.balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        '''Takes one retry out of the budget. Returns False (and takes nothing) if there isn't one'''
+        with self.lock:
+            if self.balance < 1:
+                return False
+            self.balance -= 1
+            return True
+
+
+# this is the policy used for every request unless another one is passed (see configure_default_policy)
+default_retry_policy = RetryPolicy()
+
+# every hostname gets it's own budget, these are stored here so they're shared by every scraper and the image downloader
+retry_budgets: dict[str, RetryBudget] = {}
+retry_budgets_lock = threading.Lock()
+
+
+def configure_default_policy(**kwargs):
+    '''Replaces the default retry policy with one made with the given keyword arguments (the same as RetryPolicy's)
+
+    Example Code:
+    from retry import configure_default_policy
+
+    # only trying everything twice
+    configure_default_policy(max_attempts=2)'''
+    global default_retry_policy
+    default_retry_policy = RetryPolicy(**kwargs)
+
+
+def get_retry_budget(url: str) -> RetryBudget:
+    '''Returns the shared RetryBudget for a url's hostname, making it if it doesn't exist yet
+    :param url: The url (or just the hostname) the budget is for'''
+    hostname = parse.urlparse(url).hostname or url
+
+    with retry_budgets_lock:
+        if retry_budgets.get(hostname) is None:
+            retry_budgets[hostname] = RetryBudget()
+        return retry_budgets[hostname]
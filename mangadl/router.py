@@ -0,0 +1,70 @@
+import re
+
+# this gets the hostname out of a url, with or without https://, so it can be looked up without running any scraper's regex
+hostname_pattern = re.compile(r'(?:[a-zA-Z][a-zA-Z0-9+.-]*://)?([^/?#:]+)')
+
+
+class UrlRouter:
+    '''Finds which scraper a url is for, and if it's a chapter or a series
+    Every scraper's regexes are only compiled once, and urls are looked up by hostname first, so only the scrapers for that hostname have their regexes run (instead of every scraper's)
+
+    Example Code:
+    from router import UrlRouter
+    from main import get_scraper_mappings
+
+    url_router = UrlRouter(get_scraper_mappings())
+
+    # this prints ('webtoons', 'chapter')
+    print(url_router.route('https://www.webtoons.com/en/action/hero-killer/episode-1/viewer?title_no=2745&episode_no=1'))
+    '''
+
+    def __init__(self, scraper_mappings: dict[str, dict]):
+        ''':param scraper_mappings: The scrapers to route urls to, like main.get_scraper_mappings(). Each one needs a chapter_class_reference and series_class_reference with a regex, and the urls (domains) it supports'''
+        self.scraper_mappings = scraper_mappings
+        # every scraper's chapter and series regexes, compiled the first time they're needed (so only the scrapers that are used get imported), by scraper name
+        self.patterns: dict[str, tuple[re.Pattern, re.Pattern]] = {}
+        # the names of the scrapers for each hostname, in the same order as scraper_mappings (so if two scrapers match, the same one wins as before)
+        self.scrapers_by_hostname: dict[str, list[str]] = {}
+
+        for scraper_name, scraper in scraper_mappings.items():
+            for hostname in scraper.get('urls', []):
+                hostname_scraper_names = self.scrapers_by_hostname.setdefault(hostname.lower(), [])
+                if scraper_name not in hostname_scraper_names:
+                    hostname_scraper_names.append(scraper_name)
+
+    def route(self, url: str) -> tuple[str, str] or tuple[None, None]:
+        '''Returns the name of the scraper for a url, and if it's a 'chapter' or 'series'. If no scraper matches, it returns (None, None)
+        :param url: The url to route'''
+        scraper_names = self.scrapers_by_hostname.get(get_hostname(url))
+
+        # if we don't know the hostname, we check every scraper, in case one of their regexes matches it anyway
+        if scraper_names is None:
+            scraper_names = self.scraper_mappings.keys()
+
+        for scraper_name in scraper_names:
+            url_type = self.identify_url_type(scraper_name, url)
+            if url_type is not None:
+                return scraper_name, url_type
+        return None, None
+
+    def identify_url_type(self, scraper_name: str, url: str) -> str or None:
+        '''Returns 'chapter' or 'series' if the url matches the given scraper's chapter or series regex, otherwise None
+        :param scraper_name: The name of the scraper
+        :param url: The url to be identified'''
+        if scraper_name not in self.patterns:
+            scraper = self.scraper_mappings.get(scraper_name)
+            self.patterns[scraper_name] = (re.compile(scraper.get('chapter_class_reference').regex), re.compile(scraper.get('series_class_reference').regex))
+        chapter_pattern, series_pattern = self.patterns[scraper_name]
+        if chapter_pattern.fullmatch(url):
+            return 'chapter'
+        elif series_pattern.fullmatch(url):
+            return 'series'
+        return None
+
+
+def get_hostname(url: str) -> str:
+    '''Returns a url's hostname in lowercase, without www. at the start. The url doesn't need to have https:// at the start
+    :param url: The url to get the hostname of'''
+    match = hostname_pattern.match(url)
+    hostname = match.group(1).lower() if match else ''
+    return hostname[4:] if hostname.startswith('www.') else hostname
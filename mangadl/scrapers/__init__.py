@@ -1,6 +1,6 @@
 __all__ = [
     'bato',
-    'bato_v4'
+    'bato_v4',
     'comix',
     'mangabuddy',
     'mangadex',
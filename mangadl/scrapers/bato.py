@@ -1,13 +1,21 @@
 import bs4
-import requests
 from bs4 import BeautifulSoup
 from mangadl.common import SearchResult, sort_search_results
 from mangadl.common import SharedChapterClass, SharedSeriesClass
+from mangadl import common
+from mangadl import ratelimit
+from mangadl import registry
 from urllib import parse
 
 # these are grabbed from https://batomirrors.pages.dev/
 # bato.si bato.ing are not included due to them being "v4" meaning different url structure, and website structure
-urls = ['ato.to', 'dto.to', 'fto.to', 'hto.to', 'jto.to', 'lto.to', 'mto.to', 'nto.to', 'vto.to', 'wto.to', 'xto.to', 'yto.to', 'vba.to', 'wba.to', 'xba.to', 'yba.to', 'zba.to', 'bato.ac', 'bato.bz', 'bato.cc', 'bato.cx', 'bato.id', 'bato.pw', 'bato.sh', 'bato.to', 'bato.vc', 'bato.day', 'bato.red', 'bato.run', 'batoto.in', 'batoto.tv', 'batotoo.com', 'batotwo.com', 'batpub.com', 'batread.com', 'battwo.com', 'bato.to', 'xbato.net', 'xbato.org', 'zbato.com', 'zbato.net', 'zbato.org', 'comiko.net', 'comiko.org', 'mangatoto.com', 'mangatoto.net', 'mangatoto.org', 'batocomic.com', 'batocomic.net', 'batocomic.org', 'readtoto.com', 'readtoto.net', 'readtoto.org', 'kuku.to', 'okok.to', 'ruru.to', 'xdxd.to']
+# the domains this scraper supports are listed in registry.py, so urls can be routed without importing every scraper
+urls = registry.get_scraper_urls('bato')
+
+rate_limit = {'requests_per_second': 3, 'max_concurrency': 4}
+ratelimit.register_host_limits(urls, rate_limit)
+
+cache_ttls = {'series': 60 * 60, 'chapter': 24 * 60 * 60}
 
 
 class Chapter(SharedChapterClass):
@@ -31,7 +39,7 @@ class Chapter(SharedChapterClass):
         img_urls = chapter.get_img_urls()
         print(img_urls)'''
         # first we request the series page
-        response = requests.get(self.url)
+        response = common.get(self.url, cache_ttl=cache_ttls['chapter'])
 
         # making sure we got an ok response
         if not response.ok:
@@ -65,7 +73,7 @@ class Series(SharedSeriesClass):
         chapter_urls = series.get_chapter_urls()
         print(chapter_urls)'''
         # first we request the series page
-        response = requests.get(self.url)
+        response = common.get(self.url, cache_ttl=cache_ttls['series'])
 
         # making sure we got an ok response
         if not response.ok:
@@ -102,15 +110,17 @@ class Series(SharedSeriesClass):
 
 
 # all the functions here are for main.py
-def search(query: str, adult: bool or None = None):
+def search(query: str, adult: bool or None = None, limit: int or None = None, page: int = 1):
     '''Uses bato.to's search function and returns the top results as a list of SearchResult objects sorted with common.sort_search_results
     :param query: The string to search
-    :param adult: If it should include only adult (True), only non-adult (False), or both (None).'''
+    :param adult: If it should include only adult (True), only non-adult (False), or both (None).
+    :param limit: The most results to return. If None, every result on the page is returned
+    :param page: Which page of results to get, starting at 1'''
     # first we turn the query into a url safe query we can later put into a url
     url_safe_query = parse.quote(query)
 
     # next we put the url safe query into a url
-    search_url = f'https://{urls[0]}/search?word={url_safe_query}'
+    search_url = f'https://{urls[0]}/search?word={url_safe_query}&page={page}'
 
     # these are the headers
     headers = {
@@ -118,7 +128,7 @@ def search(query: str, adult: bool or None = None):
     }
 
     # then after that we request the search page
-    query_response = requests.get(search_url, headers=headers)
+    query_response = common.get(search_url, headers=headers)
 
     # making sure we got an ok response
     if not query_response.ok:
@@ -146,7 +156,7 @@ def search(query: str, adult: bool or None = None):
         search_results.append(SearchResult(name, url, 'bato'))
 
     # the second to last step is sorting the search results
-    sorted_search_results = sort_search_results(search_results, query)
+    sorted_search_results = sort_search_results(search_results, query, limit)
 
     # finally we return the sorted search results
     return sorted_search_results
@@ -1,13 +1,24 @@
 import bs4
-import requests
 from bs4 import BeautifulSoup
-from mangadl.common import SearchResult, sort_search_results
+from mangadl.common import SearchResult, CatalogEntry, sort_search_results
 from mangadl.common import SharedChapterClass, SharedSeriesClass
+from mangadl import common
+from mangadl import ratelimit
+from mangadl import registry
 from urllib import parse
 
 # these are grabbed from https://batomirrors.pages.dev/
 # the other mirrors from the above domain are into bato.py, this file is just for the v4 sites
-urls = ['bato.si', 'bato.ing']
+# the domains this scraper supports are listed in registry.py, so urls can be routed without importing every scraper
+urls = registry.get_scraper_urls('batov4')
+
+rate_limit = {'requests_per_second': 3, 'max_concurrency': 4}
+ratelimit.register_host_limits(urls, rate_limit)
+
+cache_ttls = {'series': 60 * 60, 'chapter': 24 * 60 * 60}
+
+# how many series are requested at once when crawling the catalog (see crawl_catalog)
+catalog_page_size = 100
 
 
 class Chapter(SharedChapterClass):
@@ -33,7 +44,7 @@ class Chapter(SharedChapterClass):
             "Cookie": 'tfv=1766448708679; wd=1860x448',
         }
 
-        response = requests.get(self.url, headers=headers)
+        response = common.get(self.url, headers=headers, cache_ttl=cache_ttls['chapter'])
 
         # making sure we got an ok response
         if not response.ok:
@@ -100,7 +111,7 @@ class Series(SharedSeriesClass):
         }
 
         # first we request the series page
-        response = requests.post(api_url, json=request_data, headers=headers)
+        response = common.post(api_url, json=request_data, headers=headers, cache_ttl=cache_ttls['series'])
 
         # making sure we got an ok response
         if not response.ok:
@@ -120,10 +131,12 @@ class Series(SharedSeriesClass):
 
 
 # all the functions here are for main.py
-def search(query: str, adult: bool or None = None):
+def search(query: str, adult: bool or None = None, limit: int or None = None, page: int = 1):
     '''Uses bato.si's search function and returns the top results as a list of SearchResult objects sorted with common.sort_search_results
     :param query: The string to search
-    :param adult: If it should include only adult (True), only non-adult (False), or both (None).'''
+    :param adult: If it should include only adult (True), only non-adult (False), or both (None).
+    :param limit: The most results to return. If None, every result on the page is returned
+    :param page: Which page of results to get, starting at 1. Pages are the size of what's requested (see common.get_search_candidate_count)'''
     # here we use the (not publicly exposed) api at /ap2
     # so first we make the request data
     request_data = {
@@ -139,8 +152,9 @@ def search(query: str, adult: bool or None = None):
         }''',
         'variables': {
             'select': {
-                'page': 1,
-                'size': 10000,
+                'page': page,
+                # if there's a limit, we ask for a few times as many results as we need, so sort_search_results has more than just the api's first few to pick from
+                'size': common.get_search_candidate_count(limit) if limit is not None else 10000,
                 'sortby': None,
                 'word': query
             }
@@ -156,7 +170,7 @@ def search(query: str, adult: bool or None = None):
     }
 
     # then after that we request the api
-    query_response = requests.post(api_url, json=request_data, headers=headers)
+    query_response = common.post(api_url, json=request_data, headers=headers)
 
     # making sure we got an ok response
     if not query_response.ok:
@@ -177,7 +191,78 @@ def search(query: str, adult: bool or None = None):
         search_results.append(SearchResult(name, url, 'batov4'))
 
     # the second to last step is sorting the search results
-    sorted_search_results = sort_search_results(search_results, query)
+    sorted_search_results = sort_search_results(search_results, query, limit)
 
     # finally we return the sorted search results
-    return sorted_search_results
\ No newline at end of file
+    return sorted_search_results
+
+
+def crawl_catalog(updated_since: float or None = None):
+    '''Requests every series on bato.si (or every one updated since updated_since), and yields them a page at a time as lists of CatalogEntry objects. This is used to build the offline index (see index.py)
+    It uses the same api as search, with an empty query sorted by when series were last updated
+    :param updated_since: A unix timestamp. If passed, only series updated since then are requested'''
+    api_url = f'https://{urls[0]}/ap2/'
+
+    page = 1
+    while True:
+        request_data = {
+            'query': '''query get_search_comic($select: Search_Comic_Select) {
+                get_search_comic(select: $select) {
+                    items {
+                        data {
+                            urlPath
+                            name
+                            altNames
+                            dateUpdate
+                        }
+                    }
+                }
+            }''',
+            'variables': {
+                'select': {
+                    'page': page,
+                    'size': catalog_page_size,
+                    'sortby': 'field_update',
+                    'word': ''
+                }
+            }
+        }
+
+        response = common.post(api_url, json=request_data)
+
+        # making sure we got an ok response
+        if not response.ok:
+            raise Exception(f'Recieved status code {response.status_code} when crawling the catalog on {urls[0]}')
+
+        response_json: dict = response.json()
+        if response_json.get('errors'):
+            raise Exception(f'Got errors when crawling the catalog on {urls[0]}: {response_json.get('errors')}')
+
+        items: list[dict] = response_json.get('data').get('get_search_comic').get('items')
+
+        # turning every series into a CatalogEntry
+        # the series are newest update first, so once we get to one that's older than updated_since, we've got everything we need
+        catalog_entries = []
+        reached_updated_since = False
+        for item in items:
+            series_data: dict = item.get('data')
+            # dateUpdate is in milliseconds
+            updated_at = series_data.get('dateUpdate') / 1000 if series_data.get('dateUpdate') else None
+            if updated_since is not None and updated_at is not None and updated_at < updated_since:
+                reached_updated_since = True
+                break
+
+            catalog_entries.append(CatalogEntry(series_data.get('name'),
+                                                f'https://{urls[0]}{series_data.get('urlPath')}',
+                                                'batov4',
+                                                alt_names=series_data.get('altNames'),
+                                                updated_at=updated_at))
+
+        if catalog_entries:
+            yield catalog_entries
+
+        # if that was the last page, we're done
+        if reached_updated_since or len(items) < catalog_page_size:
+            return
+        page += 1
+
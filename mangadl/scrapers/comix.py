@@ -1,13 +1,29 @@
 import bs4
-import requests
 from bs4 import BeautifulSoup
-from mangadl.common import SearchResult, sort_search_results
-from mangadl.common import SharedChapterClass, SharedSeriesClass
+from mangadl.common import SearchResult, CatalogEntry, sort_search_results
+from mangadl.common import SharedChapterClass, SharedSeriesClass, ChapterInfo
 from mangadl import common
+from mangadl import ratelimit
+from mangadl import registry
 from urllib import parse
 import json
+import re
+import threading
 
-urls = ['comix.to']
+# the domains this scraper supports are listed in registry.py, so urls can be routed without importing every scraper
+urls = registry.get_scraper_urls('comix')
+
+rate_limit = {'requests_per_second': 5, 'max_concurrency': 6}
+ratelimit.register_host_limits(urls, rate_limit)
+
+# comix's chapter listings don't change much, so they're cached for a few hours
+cache_ttls = {'series': 6 * 60 * 60, 'chapter': 24 * 60 * 60}
+
+# how many series are requested at once when crawling the catalog (see crawl_catalog)
+catalog_page_size = 100
+
+# this gets the chapter number from the end of chapter urls that have it (like https://comix.to/title/pvry-one-piece/7217327-chapter-1169)
+chapter_number_pattern = re.compile(r'/\d+-chapter-(\d+(?:\.\d+)?)/?$')
 
 class Chapter(SharedChapterClass):
     regex = r'(https://)?(www\.)?' + f'({'|'.join([url.replace('.', r'\.') for url in urls])})' + r'/title/[^/]+/[^/]+/?'
@@ -16,8 +32,32 @@ class Chapter(SharedChapterClass):
     add_host_to_image_headers = False
     replace_image_failed_error_with_warning = False
     add_host_but_call_it_something_else = None # this should be a string of what it should be if used
-    def __init__(self, url: str):
+    def __init__(self, url: str, chapter_number: float or None = None, title: str or None = None):
+        ''':param url: The chapter's url
+        :param chapter_number: The chapter's number, if it's already known (like from Series.get_chapters). If None, it's found from the url, or the page the url redirects to
+        :param title: The chapter's title, if it's already known'''
         super().__init__(url)
+        self.chapter_number = chapter_number
+        self.title = title
+        # the chapter's page is only requested once, and shared by get_img_urls and get_name (see get_chapter_page)
+        # the url it redirected to is kept after get_img_urls is done with the page, since that's all get_name needs
+        self.response = None
+        self.redirected_url = None
+        self.response_lock = threading.Lock()
+
+    def get_chapter_page(self):
+        '''Requests the chapter's page the first time it's called, then returns the same response every time after, so get_img_urls and get_name share one request'''
+        with self.response_lock:
+            if self.response is None:
+                response = common.get(self.url, cache_ttl=cache_ttls['chapter'])
+
+                # making sure we got an ok response
+                if not response.ok:
+                    raise Exception(
+                        f'Recieved status code {response.status_code} when requesting the chapter at \'{self.url}\'')
+                self.response = response
+                self.redirected_url = response.url
+            return self.response
 
     def get_img_urls(self) -> list[str]:
         '''Returns a list of all the image urls for a given chapter
@@ -28,13 +68,8 @@ class Chapter(SharedChapterClass):
         chapter = Chapter('https://comix.to/title/pvry-one-piece/7217327-chapter-1169')
         img_urls = chapter.get_img_urls()
         print(img_urls)'''
-        # first we request the series page
-        response = requests.get(self.url)
-
-        # making sure we got an ok response
-        if not response.ok:
-            raise Exception(
-                f'Recieved status code {response.status_code} when requesting the chapter at \'{self.url}\'')
+        # first we request the chapter page (or use the one get_name already requested)
+        response = self.get_chapter_page()
 
         # now we turn that into a string, which we then parse
         # the images are in a script tag, so we find that first then parse it
@@ -64,18 +99,31 @@ class Chapter(SharedChapterClass):
             for url_hashmap_stuff in script_tags_with_links_text[0].split('\\"prev\\"')[0].split('\\"url\\":')[1:] # this line gets the (I believe) hashmap with the images
             ]
 
+        # we don't need the page anymore, so we let go of it instead of keeping every chapter's page in memory while the series downloads
+        self.response = None
+
         # then we return it
         return img_urls
     
-    def get_name(self) -> str:
-        # we request the url here, and if it's a redirect, we parse that url and return it, otherwise we just parse self.url
-        # but since if we don't get redirected, the url will be the same, we just use response.url for everything
-        response = requests.get(self.url)
+    def get_chapter_number(self) -> float:
+        '''Returns the chapter's number. It's only requested if it wasn't passed when making the chapter, and isn't in the url'''
+        if self.chapter_number is None:
+            # if the url ends with the chapter number we just use that
+            match = chapter_number_pattern.search(self.url)
+            if match:
+                self.chapter_number = float(match.group(1))
+
+            # otherwise we request the url (unless get_img_urls already did), since it redirects to a url that does end with the chapter number
+            else:
+                redirected_url = self.redirected_url or self.get_chapter_page().url
+                self.chapter_number = float(redirected_url.rstrip('/').split('-')[-1])
+        return float(self.chapter_number)
 
-        # now we construct the name
+    def get_name(self) -> str:
+        # we construct the name from the chapter number
         # we have a whole section for this, since otherwise it gets pretty unreadable fast
-        # first we turn the number in the url into a float
-        chapter_number_float = float(response.url.rstrip('/').split('-')[-1])
+        # first we get the number as a float, which usually doesn't need any requests (see get_chapter_number)
+        chapter_number_float = self.get_chapter_number()
 
         # now we make a variable for the output name
         output = f'{chapter_number_float.__floor__():04d}'
@@ -95,6 +143,8 @@ class Series(SharedSeriesClass):
     chapter_object_reference = Chapter
     def __init__(self, url: str):
         super().__init__(url)
+        # this stores every chapter from the chapter listing by url, so make_chapter_object can pass their numbers and titles on when it's only given a url
+        self.chapters_by_url: dict[str, ChapterInfo] = {}
 
     def get_chapter_urls(self) -> list[str]:
         '''Returns a list of all the chapter urls for a given series
@@ -105,6 +155,17 @@ class Series(SharedSeriesClass):
         series = Series('https://comix.to/title/pvry-one-piece')
         chapter_urls = series.get_chapter_urls()
         print(chapter_urls)'''
+        return [chapter.url for chapter in self.get_chapters()]
+
+    def get_chapters(self) -> list[ChapterInfo]:
+        '''Returns a list of all the chapters for a given series as ChapterInfo objects, with their numbers, titles, and if they're official from comix's chapter listing
+
+        Example Code:
+        from scrapers.comix import Series
+
+        series = Series('https://comix.to/title/pvry-one-piece')
+        for chapter in series.get_chapters():
+            print(chapter)'''
         # what we do here is somewhat different from the other scrapers
         # instead of requesting the page, we use their api endpoint
         # it just needs an id, which is the first part of the url (the pvry part of https://comix.to/title/pvry-one-piece)
@@ -112,85 +173,70 @@ class Series(SharedSeriesClass):
         # then that'll tell us how many more pages to request
         series_id = self.url.split('title/')[1].split('-')[0]
 
-        # we use a wierd for loop, since I don't wanna have to write the logic for getting the url twice
-        # so instead we just start with 1 page total, and then update that every time
-        # so from the response, we see there's 14 pages to request total, cool
-        # then for the next request, we still change the variable
-
-        # we also make a variable to store the chapter AND DATA
-        # the data part is used in the next bit
-        chapter_data: list[dict] = []
-
-        page_count = 1
-        i = 0
-        while i < page_count:
-            # increasing i
-            i += 1
-
-            # requesting the url
-            response = requests.get(f'https://{urls[0]}/api/v2/manga/{series_id}/chapters?limit=100&page={i}&order[number]=asc')
-
-            # making sure we got an ok response
-            if not response.ok:
-                raise Exception(
-                    f'Recieved status code {response.status_code} when requesting the series at \'{self.url}\'')
-                        
-            # parsing the response's json
-            # we can just get result, since the only other thing is status, which should be 200
-            response_json: dict = json.loads(response.content.decode()).get('result')
-            
-            # adding the chapter data to our list of chapter data
-            chapter_data = chapter_data + response_json.get('items')
-
-            # updating the page count
-            page_count = int(response_json.get('pagination').get('last_page'))
+        # first we request page 1, which also tells us how many pages there are
+        first_page = self.get_chapter_page(series_id, 1)
+        page_count = int(first_page.get('pagination').get('last_page'))
+
+        # then we request the rest of the pages at the same time (up to the rate limit's max_concurrency at once)
+        # executor.map gives them back in order, so the chapters stay in order
+        chapter_data: list[dict] = list(first_page.get('items'))
+        if page_count > 1:
+            with common.ContextThreadPoolExecutor(max_workers=rate_limit['max_concurrency']) as executor:
+                for page in executor.map(lambda page_number: self.get_chapter_page(series_id, page_number), range(2, page_count + 1)):
+                    chapter_data += page.get('items')
 
         # now the reason we haven't just extracted the urls is a few reasons
         # A, there's multiple different scans/sources for one chapter (like mangadex)
         # B, we can also prioritize getting the official translation over unofficial scanlations/scans
-        # we can sort for official entries, because there's a variable for the chapter, and a variable for if it's official
-        # even more specifically, we go through the list, and we keep a list of the chapters we've scanned
-        # if we hit a chapter that we haven't gotten a url for, then we get every chapter for the chapter number, and prioritize using the official url
-        # if there is no url, we just use index 0
-        # this is (I believe) O(n^2), but it should be fine since it's a pretty small number, and python is pretty fast
-        scanned_chapter_numbers = []
-        chapter_urls = []
+        # so we group the chapters by their number in one pass, keeping the first one for each number unless there's an official one, in which case we keep the first official one
+        # the dict keeps the chapter numbers in the order they first showed up in
+        chosen_chapters: dict = {}
         for specific_chapter_data in chapter_data:
-            # getting the chapter number
-            chapter_number = specific_chapter_data.get('number')
+            if type(specific_chapter_data) != dict:
+                continue
 
-            # checking if we haven't already looked at this chapter
-            if not scanned_chapter_numbers.__contains__(chapter_number):
-                # adding it to the list of scanned chapter numbers
-                scanned_chapter_numbers.append(chapter_number)
-
-                # getting every chapter's data for this chapter number, and taking the best one from those
-                chapters_with_that_chapter_number = []
-                for chapter in chapter_data:
-                    if type(chapter) == dict and chapter.get('number') == chapter_number:
-                        chapters_with_that_chapter_number.append(chapter)
-
-                # going through and adding a chapter to the urls if it's offical
-                # we also have a variable to store if we found an official one for this chapter
-                found_official = False
-                for this_specific_chapter_data in chapters_with_that_chapter_number:
-                    if this_specific_chapter_data.get('is_official') == 1:
-                        # adding the url
-                        chapter_urls.append(f'{self.url.rstrip('/')}/{this_specific_chapter_data.get('chapter_id')}')
-
-                        # setting that we found an official one to true
-                        found_official = True
-
-                        # breaking out of the loop
-                        break
-                
-                if not found_official:
-                    # otherwise, if ther was no official one, we just add index 0
-                    chapter_urls.append(f'{self.url.rstrip('/')}/{specific_chapter_data.get('chapter_id')}')
-
-        return chapter_urls
+            chapter_number = specific_chapter_data.get('number')
+            chosen_chapter = chosen_chapters.get(chapter_number)
+            if chosen_chapter is None or (chosen_chapter.get('is_official') != 1 and specific_chapter_data.get('is_official') == 1):
+                chosen_chapters[chapter_number] = specific_chapter_data
+
+        # finally we make the urls for the chapters we chose
+        # we also keep their numbers and titles, so their chapter objects don't have to request them (see make_chapter_object)
+        chapters = []
+        for chosen_chapter in chosen_chapters.values():
+            chapter = ChapterInfo(f'{self.url.rstrip('/')}/{chosen_chapter.get('chapter_id')}',
+                                  number=common.parse_chapter_number(chosen_chapter.get('number')),
+                                  title=chosen_chapter.get('name') or None,
+                                  is_official=chosen_chapter.get('is_official') == 1)
+            chapters.append(chapter)
+            self.chapters_by_url[chapter.url] = chapter
+
+        return chapters
     
 
+    def make_chapter_object(self, chapter: str or ChapterInfo) -> Chapter:
+        # we give the chapter it's number and title from the chapter listing, so naming it doesn't need a request
+        # if we only got a url, we use what get_chapters found out about it (if it came from there)
+        if not isinstance(chapter, ChapterInfo):
+            chapter = self.chapters_by_url.get(chapter, ChapterInfo(chapter))
+        return Chapter(chapter.url, chapter.number, chapter.title)
+
+    def get_chapter_page(self, series_id: str, page_number: int) -> dict:
+        '''Requests one page (100 chapters) of the series' chapters from comix's api, and returns the result (which has the chapters under items, and the page count under pagination)
+        :param series_id: The series' id (the pvry part of https://comix.to/title/pvry-one-piece)
+        :param page_number: The page to request, starting at 1'''
+        # requesting the url
+        response = common.get(f'https://{urls[0]}/api/v2/manga/{series_id}/chapters?limit=100&page={page_number}&order[number]=asc', cache_ttl=cache_ttls['series'])
+
+        # making sure we got an ok response
+        if not response.ok:
+            raise Exception(
+                f'Recieved status code {response.status_code} when requesting the series at \'{self.url}\'')
+
+        # parsing the response's json
+        # we can just get result, since the only other thing is status, which should be 200
+        return json.loads(response.content.decode()).get('result')
+
     def get_name(self) -> str:
         # this basically gets the part after title/, then removes the bit before the first -
         # that's because it goes [id]-name-of-thing, so we're just removing the id
@@ -198,15 +244,21 @@ class Series(SharedSeriesClass):
 
 
 # all the functions here are for main.py
-def search(query: str, adult: bool or None = None):
+def search(query: str, adult: bool or None = None, limit: int or None = None, page: int = 1):
     '''Uses comix.to's search function and returns the top results as a list of SearchResult objects sorted with common.sort_search_results
     :param query: The string to search
-    :param adult: If it should include only adult (True), only non-adult (False), or both (None).'''
+    :param adult: If it should include only adult (True), only non-adult (False), or both (None).
+    :param limit: The most results to return. If None, every result on the page is returned
+    :param page: Which page of results to get, starting at 1'''
     # first we turn the query into a url safe query we can later put into a url
     url_safe_query = parse.quote(query)
 
     # next we put the url safe query into a url
-    search_url = f'https://www.{urls[0]}/api/v2/manga?keyword={url_safe_query}&order[relevance]=desc'
+    search_url = f'https://www.{urls[0]}/api/v2/manga?keyword={url_safe_query}&order[relevance]=desc&page={page}'
+
+    # if there's a limit, we ask for a few times as many results as we need, so sort_search_results has more than just the api's first few to pick from
+    if limit is not None:
+        search_url += f'&limit={common.get_search_candidate_count(limit)}'
 
     # these are the headers
     headers = {
@@ -214,7 +266,7 @@ def search(query: str, adult: bool or None = None):
     }
 
     # then after that we request the search page
-    query_response = requests.get(search_url, headers=headers)
+    query_response = common.get(search_url, headers=headers)
 
     # making sure we got an ok response
     if not query_response.ok:
@@ -233,7 +285,52 @@ def search(query: str, adult: bool or None = None):
                                            )
 
     # the second to last step is sorting the search results
-    sorted_search_results = sort_search_results(search_results, query)
+    sorted_search_results = sort_search_results(search_results, query, limit)
 
     # finally we return the sorted search results
-    return sorted_search_results
\ No newline at end of file
+    return sorted_search_results
+
+
+def crawl_catalog(updated_since: float or None = None):
+    '''Requests every series on comix.to (or every one updated since updated_since), and yields them a page at a time as lists of CatalogEntry objects. This is used to build the offline index (see index.py)
+    It uses the same api as search, without a keyword and sorted by when series were last updated
+    :param updated_since: A unix timestamp. If passed, only series updated since then are requested'''
+    page_count = 1
+    page = 0
+    while page < page_count:
+        page += 1
+
+        response = common.get(f'https://www.{urls[0]}/api/v2/manga?order[updated_at]=desc&limit={catalog_page_size}&page={page}')
+
+        # making sure we got an ok response
+        if not response.ok:
+            raise Exception(f'Recieved status code {response.status_code} when crawling the catalog on {urls[0]}')
+
+        # we can just get result, since the only other thing is status, which should be 200
+        response_json: dict = json.loads(response.content.decode()).get('result')
+
+        # turning every series into a CatalogEntry
+        # the series are newest update first, so once we get to one that's older than updated_since, we've got everything we need
+        catalog_entries = []
+        reached_updated_since = False
+        for series_json in response_json.get('items'):
+            updated_at = series_json.get('updated_at')
+            if updated_since is not None and isinstance(updated_at, (int, float)) and updated_at < updated_since:
+                reached_updated_since = True
+                break
+
+            catalog_entries.append(CatalogEntry(series_json.get('title'),
+                                                f'https://{urls[0]}/title/{series_json.get('hash_id')}-{series_json.get('slug')}',
+                                                'comix',
+                                                alt_names=series_json.get('alt_titles'),
+                                                updated_at=updated_at if isinstance(updated_at, (int, float)) else None))
+
+        if catalog_entries:
+            yield catalog_entries
+
+        if reached_updated_since:
+            return
+
+        # updating the page count
+        page_count = int(response_json.get('pagination').get('last_page'))
+
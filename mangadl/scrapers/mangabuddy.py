@@ -1,11 +1,19 @@
 import bs4
-import requests
 from bs4 import BeautifulSoup
 from mangadl.common import SearchResult, sort_search_results
 from mangadl.common import SharedChapterClass, SharedSeriesClass
+from mangadl import common
+from mangadl import ratelimit
+from mangadl import registry
 from urllib import parse
 
-urls = ['mangabuddy.com']
+# the domains this scraper supports are listed in registry.py, so urls can be routed without importing every scraper
+urls = registry.get_scraper_urls('mangabuddy')
+
+rate_limit = {'requests_per_second': 5, 'max_concurrency': 6}
+ratelimit.register_host_limits(urls, rate_limit)
+
+cache_ttls = {'series': 60 * 60, 'chapter': 24 * 60 * 60}
 
 class Chapter(SharedChapterClass):
     regex = r'(https://)?(www\.)?' + f'({'|'.join([url.replace('.', r'\.') for url in urls])})' + r'/[^/]*/chapter-[^/]+/?'
@@ -28,7 +36,7 @@ class Chapter(SharedChapterClass):
         img_urls = chapter.get_img_urls()
         print(img_urls)'''
         # first we request the series page
-        response = requests.get(self.url)
+        response = common.get(self.url, cache_ttl=cache_ttls['chapter'])
 
         # making sure we got an ok response
         if not response.ok:
@@ -66,7 +74,7 @@ class Series(SharedSeriesClass):
         chapter_urls = series.get_chapter_urls()
         print(chapter_urls)'''
         # first we request the series page
-        response = requests.get(self.url)
+        response = common.get(self.url, cache_ttl=cache_ttls['series'])
 
         # making sure we got an ok response
         if not response.ok:
@@ -83,7 +91,7 @@ class Series(SharedSeriesClass):
         book_id = script_with_book_id.string.strip().split('\n')[0].split('= ')[1].replace(';', '')
 
         # now that we have the book ID, we can request the full chapter list (but it'll be html, so we'll have to parse it)
-        html_full_chapter_list_response = requests.get(f'https://mangabuddy.com/api/manga/{book_id}/chapters?source=detail')
+        html_full_chapter_list_response = common.get(f'https://mangabuddy.com/api/manga/{book_id}/chapters?source=detail', cache_ttl=cache_ttls['series'])
 
         # then we make sure that request went through
         if html_full_chapter_list_response.status_code != 200:
@@ -105,15 +113,17 @@ class Series(SharedSeriesClass):
 
 
 # all the functions here are for main.py
-def search(query: str, adult: bool or None = None):
+def search(query: str, adult: bool or None = None, limit: int or None = None, page: int = 1):
     '''Uses mangabuddy.com's search function and returns the top results as a list of SearchResult objects sorted with common.sort_search_results
     :param query: The string to search
-    :param adult: If it should include only adult (True), only non-adult (False), or both (None).'''
+    :param adult: If it should include only adult (True), only non-adult (False), or both (None).
+    :param limit: The most results to return. If None, every result on the page is returned
+    :param page: Which page of results to get, starting at 1'''
     # first we turn the query into a url safe query we can later put into a url
     url_safe_query = parse.quote(query)
 
     # next we put the url safe query into a url
-    search_url = f'https://mangabuddy.com/search?q={url_safe_query}&page=1'
+    search_url = f'https://mangabuddy.com/search?q={url_safe_query}&page={page}'
 
     # we add a thing to make it show adult content if enabled
     if adult:
@@ -125,7 +135,7 @@ def search(query: str, adult: bool or None = None):
     }
 
     # then after that we request the search page
-    query_response = requests.get(search_url, headers=headers)
+    query_response = common.get(search_url, headers=headers)
 
     # making sure we got an ok response
     if not query_response.ok:
@@ -153,7 +163,7 @@ def search(query: str, adult: bool or None = None):
         search_results.append(SearchResult(name, url, 'mangabuddy'))
 
     # the second to last step is sorting the search results
-    sorted_search_results = sort_search_results(search_results, query)
+    sorted_search_results = sort_search_results(search_results, query, limit)
 
     # finally we return the sorted search results
     return sorted_search_results
\ No newline at end of file
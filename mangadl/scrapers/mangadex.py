@@ -1,11 +1,26 @@
 import bs4
-import requests
 from bs4 import BeautifulSoup
-from mangadl.common import SearchResult, sort_search_results
-from mangadl.common import SharedChapterClass, SharedSeriesClass
+from mangadl.common import SearchResult, CatalogEntry, sort_search_results
+from mangadl.common import SharedChapterClass, SharedSeriesClass, ChapterInfo
+from mangadl import common
+from mangadl import ratelimit
+from mangadl import registry
 from urllib import parse
+import datetime
 
-urls = ['mangadex.org']
+# the domains this scraper supports are listed in registry.py, so urls can be routed without importing every scraper
+urls = registry.get_scraper_urls('mangadex')
+
+# mangadex's api allows about 5 requests per second per ip (https://api.mangadex.org/docs/2-limitations/)
+rate_limit = {'requests_per_second': 5, 'max_concurrency': 5}
+ratelimit.register_host_limits(urls, rate_limit)
+
+# chapters are only cached for a few minutes, since the image urls from the at-home server stop working after about 15 minutes
+cache_ttls = {'series': 60 * 60, 'chapter': 5 * 60}
+
+# mangadex's api won't return results past an offset of 10000, so when crawling the catalog we start over from the last series we got once we get close
+catalog_max_offset = 10000
+catalog_page_size = 100
 
 class Chapter(SharedChapterClass):
     regex = r'(https://)?(www\.)?' + f'({'|'.join([url.replace('.', r'\.') for url in urls])})' + r'/chapter/[^/]+/?'
@@ -36,7 +51,7 @@ class Chapter(SharedChapterClass):
         headers = {
             'User-Agent': 'https://github.com/Rufis72/mangadl'
         }
-        response = requests.get(api_url_request, headers=headers)
+        response = common.get(api_url_request, headers=headers, cache_ttl=cache_ttls['chapter'])
 
         # making sure we got an ok response
         if not response.ok:
@@ -70,6 +85,17 @@ class Series(SharedSeriesClass):
         series = Series('https://mangadex.org/title/a1c7c817-4e59-43b7-9365-09675a149a6f/one-piece')
         chapter_urls = series.get_chapter_urls()
         print(chapter_urls)'''
+        return [chapter.url for chapter in self.get_chapters()]
+
+    def get_chapters(self) -> list[ChapterInfo]:
+        '''Returns a list of all the chapters for a given series as ChapterInfo objects, with their numbers, titles, languages, and publish dates from mangadex's chapter feed
+
+        Example Code:
+        from scrapers.mangadex import Series
+
+        series = Series('https://mangadex.org/title/a1c7c817-4e59-43b7-9365-09675a149a6f/one-piece')
+        for chapter in series.get_chapters():
+            print(chapter)'''
         # first we construct get the data we're gonna use to request the api
         manga_id = self.url.split('title/')[1].split('/')[0]
 
@@ -80,18 +106,24 @@ class Series(SharedSeriesClass):
         headers = {
             'User-Agent': 'https://github.com/Rufis72/mangadl'
         }
-        response = requests.get(api_url_request, headers=headers, params={'translatedLanguage[]': ['en']})
+        response = common.get(api_url_request, headers=headers, params={'translatedLanguage[]': ['en']}, cache_ttl=cache_ttls['series'])
 
         # now we get the json from the reseponse
         response_json: dict = response.json()
 
-        # then we format all the urls
+        # then we format all the urls, and keep what the feed says about each chapter
         # we have a variable to store if we skipped availible chapters because they were on a seperate site
         skipped_chapters = False
-        chapter_urls = []
+        chapters = []
         for chapter_data in response_json.get('data'):
-            if chapter_data.get('attributes').get('externalUrl') is None:
-                chapter_urls.append(f'https://{urls[0]}/chapter/{chapter_data.get('id')}')
+            attributes = chapter_data.get('attributes')
+            if attributes.get('externalUrl') is None:
+                # the chapter number is a string (and None for oneshots), and the publish date is an iso 8601 date
+                chapters.append(ChapterInfo(f'https://{urls[0]}/chapter/{chapter_data.get('id')}',
+                                            number=common.parse_chapter_number(attributes.get('chapter')),
+                                            title=attributes.get('title') or None,
+                                            language=attributes.get('translatedLanguage'),
+                                            published_at=datetime.datetime.fromisoformat(attributes.get('publishAt')).timestamp() if attributes.get('publishAt') else None))
             else:
                 skipped_chapters = True
 
@@ -99,17 +131,25 @@ class Series(SharedSeriesClass):
         if skipped_chapters:
             print('Some chapters were skipped when grabbing chapter urls because the chapter(s) were on a seperate (unsupoorted) site')
 
-        # the final step is just returning the urls
-        return chapter_urls
+        # the final step is just returning the chapters
+        return chapters
 
 
 # all the functions here are for main.py
-def search(query: str, adult: bool or None = None):
+def search(query: str, adult: bool or None = None, limit: int or None = None, page: int = 1):
     '''Uses mangadex.org's search function and returns the top results as a list of SearchResult objects sorted with common.sort_search_results
     :param query: The string to search
-    :param adult: If it should include only adult (True), only non-adult (False), or both (None).'''
-    # first we request mangadex's api
-    response = requests.get(f'https://api.{urls[0]}/manga', params={'title': query})
+    :param adult: If it should include only adult (True), only non-adult (False), or both (None).
+    :param limit: The most results to return. If None, every result on the page is returned
+    :param page: Which page of results to get, starting at 1'''
+    # first we make the parameters for the request
+    # if there's a limit, we ask for a few times as many results as we need, so sort_search_results has more than just the api's first few to pick from
+    # mangadex's api returns 10 by default, and allows up to 100
+    results_per_page = min(common.get_search_candidate_count(limit), 100) if limit is not None else 10
+    params = {'title': query, 'limit': results_per_page, 'offset': (page - 1) * results_per_page}
+
+    # then we request mangadex's api
+    response = common.get(f'https://api.{urls[0]}/manga', params=params)
 
     # then we get the response's json
     response_json: dict = response.json().get('data')
@@ -126,7 +166,73 @@ def search(query: str, adult: bool or None = None):
         search_results.append(SearchResult(name, url, 'mangadex'))
 
     # the second to last step is sorting the search results
-    sorted_search_results = sort_search_results(search_results, query)
+    sorted_search_results = sort_search_results(search_results, query, limit)
 
     # finally we return the sorted search results
-    return sorted_search_results
\ No newline at end of file
+    return sorted_search_results
+
+
+def crawl_catalog(updated_since: float or None = None):
+    '''Requests every series on mangadex.org (or every one updated since updated_since), and yields them a page at a time as lists of CatalogEntry objects. This is used to build the offline index (see index.py)
+    The series are requested oldest update first, so when we hit the api's offset limit we can continue from the last one's update time
+    :param updated_since: A unix timestamp. If passed, only series updated since then are requested'''
+    headers = {
+        'User-Agent': 'https://github.com/Rufis72/mangadl'
+    }
+
+    # the api's timestamps don't have a timezone, and are in UTC
+    cursor = None if updated_since is None else datetime.datetime.fromtimestamp(updated_since, datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+    offset = 0
+    while True:
+        # every content rating is included, since by default the api leaves out erotica and pornographic series
+        params = {
+            'limit': catalog_page_size,
+            'offset': offset,
+            'order[updatedAt]': 'asc',
+            'contentRating[]': ['safe', 'suggestive', 'erotica', 'pornographic'],
+        }
+        if cursor is not None:
+            params['updatedAtSince'] = cursor
+
+        response = common.get(f'https://api.{urls[0]}/manga', params=params, headers=headers)
+
+        # making sure we got an ok response
+        if not response.ok:
+            raise Exception(f'Recieved status code {response.status_code} when crawling the catalog on {urls[0]}')
+
+        response_json: dict = response.json()
+        series_data: list[dict] = response_json.get('data')
+
+        # turning every series into a CatalogEntry
+        catalog_entries = []
+        for specific_series_data in series_data:
+            attributes: dict = specific_series_data.get('attributes')
+            # the title could be {'en': '[TITLE]'} or {'ja-ro': '[TITLE]'}, or a gajillion other things, so we just get the first thing in the dict
+            name = next(iter(attributes.get('title').values()), '')
+            # the alternative titles are a list of dicts like the title
+            alt_names = [alt_name for alt_title in attributes.get('altTitles') for alt_name in alt_title.values()]
+
+            catalog_entries.append(CatalogEntry(name,
+                                                f'https://{urls[0]}/title/{specific_series_data.get('id')}',
+                                                'mangadex',
+                                                alt_names=alt_names,
+                                                adult=attributes.get('contentRating') in ['erotica', 'pornographic'],
+                                                updated_at=datetime.datetime.fromisoformat(attributes.get('updatedAt')).timestamp()))
+
+        if catalog_entries:
+            yield catalog_entries
+
+        # if that was the last page, we're done
+        offset += len(series_data)
+        if not series_data or offset >= response_json.get('total'):
+            return
+
+        # if the next page would be past the offset limit, we start over from the last series' update time
+        if offset + catalog_page_size > catalog_max_offset:
+            next_cursor = series_data[-1].get('attributes').get('updatedAt')[:19]
+            # this would only happen if more than 10000 series were updated in the same second, in which case we can't get any further
+            if next_cursor == cursor:
+                return
+            cursor = next_cursor
+            offset = 0
+
@@ -1,10 +1,18 @@
 import bs4
-import requests
 from mangadl.common import SearchResult, sort_search_results
 from mangadl.common import SharedChapterClass, SharedSeriesClass
+from mangadl import common
+from mangadl import ratelimit
+from mangadl import registry
 import urllib.parse
 
-urls = ['mangaread.org']
+# the domains this scraper supports are listed in registry.py, so urls can be routed without importing every scraper
+urls = registry.get_scraper_urls('mangaread')
+
+rate_limit = {'requests_per_second': 5, 'max_concurrency': 6}
+ratelimit.register_host_limits(urls, rate_limit)
+
+cache_ttls = {'series': 60 * 60, 'chapter': 24 * 60 * 60}
 
 class Chapter(SharedChapterClass):
     regex = r'(https://)?(www\.)?' + f'({'|'.join([url.replace('.', r'\.') for url in urls])})' + r'/manga/[^/]*/chapter-[^/]+/?'
@@ -26,7 +34,7 @@ class Chapter(SharedChapterClass):
         img_urls = chapter.get_img_urls()
         print(img_urls)'''
         # first we request the chapter
-        response = requests.get(self.url)
+        response = common.get(self.url, cache_ttl=cache_ttls['chapter'])
 
         # next we make sure we make sure we got a status code 200
         if response.status_code != 200:
@@ -66,7 +74,7 @@ class Series(SharedSeriesClass):
         urls = s.get_chapter_urls()
         print(urls)'''
         # first we request the page url
-        response = requests.get(self.url)
+        response = common.get(self.url, cache_ttl=cache_ttls['series'])
 
         # next we make sure we got a status code 200
         if response.status_code != 200:
@@ -91,16 +99,22 @@ class Series(SharedSeriesClass):
         return chapter_urls
 
 # all the functions here are for main.py
-def search(query: str, adult:  bool or None = None) -> list[SearchResult]:
+def search(query: str, adult: bool or None = None, limit: int or None = None, page: int = 1) -> list[SearchResult]:
     '''Uses mangaread.org's search function and returns the top results as a list of SearchResult objects sorted with common.sort_search_results
     :param query: The string to search
-    :param adult: If it should include only adult (True), only non-adult (False), or both (None).'''
+    :param adult: If it should include only adult (True), only non-adult (False), or both (None).
+    :param limit: The most results to return. If None, every result on the page is returned
+    :param page: Which page of results to get, starting at 1'''
     # first we turn the query into a query we can later put into a url
     url_safe_query = urllib.parse.quote(query)
 
     # next we get the url we'll be requesting
     query_url = f'https://mangaread.org/?s={url_safe_query}&post_type=wp-manga'
 
+    # the pages after the first one are at /page/[page_number]/
+    if page > 1:
+        query_url = f'https://mangaread.org/page/{page}/?s={url_safe_query}&post_type=wp-manga'
+
     # adding the filter for adult content if specified
     if adult == True:
         # if adult is true, it shows only adult content
@@ -113,7 +127,7 @@ def search(query: str, adult:  bool or None = None) -> list[SearchResult]:
         query_url+='&adult='
 
     # after that we actually request the url
-    query_response = requests.get(query_url)
+    query_response = common.get(query_url)
 
     # here we make sure we got a status code 200
     if query_response.status_code != 200:
@@ -146,7 +160,7 @@ def search(query: str, adult:  bool or None = None) -> list[SearchResult]:
     # then the second to last step is feeding the search results through our own searching function
     # that function basically just sorts them all by how similar their names are to the query
 
-    sorted_search_results = sort_search_results(search_results, query)
+    sorted_search_results = sort_search_results(search_results, query, limit)
 
     # finally we return the search results
     return sorted_search_results
\ No newline at end of file
@@ -1,11 +1,26 @@
 import bs4
-import requests
 from bs4 import BeautifulSoup
 from mangadl.common import SearchResult, sort_search_results
 from mangadl.common import SharedChapterClass, SharedSeriesClass
+from mangadl import common
+from mangadl import ratelimit
+from mangadl import registry
 from urllib import parse
+from concurrent.futures import as_completed
 
-urls = ['mangatown.com']
+# the domains this scraper supports are listed in registry.py, so urls can be routed without importing every scraper
+urls = registry.get_scraper_urls('mangatown')
+
+rate_limit = {'requests_per_second': 8, 'max_concurrency': 8}
+ratelimit.register_host_limits(urls, rate_limit)
+
+cache_ttls = {'series': 60 * 60, 'chapter': 24 * 60 * 60}
+
+# mangatown has one image per page, so this is how many of a chapter's image pages are requested at the same time. It's the same as the rate limit's max_concurrency, since more than that would just wait
+page_workers = rate_limit['max_concurrency']
+
+# this makes BeautifulSoup only parse the image on image pages, instead of the whole page
+image_strainer = bs4.SoupStrainer('img', {'id': 'image'})
 
 class Chapter(SharedChapterClass):
     regex = r'(https://)?(www.)?' + f'({'|'.join([url.replace('.', r'\.') for url in urls])})' + r'/manga/[^/]*/(v\d*/)?c\d\d\d+(/\d+\.html)?/?'
@@ -18,11 +33,13 @@ class Chapter(SharedChapterClass):
         super().__init__(url)
 
     def get_img_urls(self) -> list[str]:
-        # giving an update that we're getting image urls, since it can take a while
-        print(f'Getting the image urls for {self.url}')
+        # getting every image url with iter_img_urls, and putting them back in order (since iter_img_urls gives them in the order they're found)
+        # nothing's printed here, since this can run in the background while another chapter's download progress is being shown
+        return common.collect_img_urls(self)
 
+    def iter_img_urls(self):
         # first we request the series page
-        response = requests.get(self.url)
+        response = common.get(self.url, cache_ttl=cache_ttls['chapter'])
 
         # making sure we got an ok response
         if not response.ok:
@@ -49,37 +66,36 @@ class Chapter(SharedChapterClass):
             except:
                 break
 
-        # here we give an update for every image downloaded
-        print(f'{self.url}: Image page 0/{image_count}', end='')
-
-        img_urls = []
-
-        # now that we have the image count, we get every page and get it's image
-        for image_number in range(1, image_count + 1):
-            url = f'{self.url.strip('/')}/{image_number}.html'
-
-            # requesting the url
-            response = requests.get(url)
+        # now that we have the image count, we request every image page at the same time (up to page_workers at once)
+        # each image url is yielded as soon as it's page is done, so download can start downloading it while the other pages are still being requested
+        executor = common.ContextThreadPoolExecutor(max_workers=page_workers)
+        try:
+            futures = {executor.submit(self.get_img_url_from_page, image_number): image_number for image_number in range(1, image_count + 1)}
+            for future in as_completed(futures):
+                yield futures[future] - 1, future.result(), image_count
+        finally:
+            # if we stopped early (like if an image failed to download) we don't request the pages that haven't started yet
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def get_img_url_from_page(self, image_number: int) -> str:
+        '''Requests one of the chapter's image pages, and returns the url to it's image
+        :param image_number: The number of the image page, starting at 1'''
+        url = f'{self.url.strip('/')}/{image_number}.html'
+
+        # requesting the url
+        response = common.get(url, cache_ttl=cache_ttls['chapter'])
 
-            # making sure we got an ok response
-            if not response.ok:
-                raise Exception(
-                    f'Recieved status code {response.status_code} when requesting the page at \'{url}\'')
-
-            # now that we know the request went through, we parse the webpage
-            soup = bs4.BeautifulSoup(response.content, 'html.parser')
-
-            # then we get the img and add it to the list of imgs
-            img_urls.append('https://' + soup.find('img', {'id': 'image'}).get('src').strip('/'))
-
-            # we also give an update that we finished getting that image page
-            print(f'\r{self.url}: Image page {image_number}/{image_count}', end='')
+        # making sure we got an ok response
+        if not response.ok:
+            raise Exception(
+                f'Recieved status code {response.status_code} when requesting the page at \'{url}\'')
 
-        # now we print something to finish off the image page updates
-        print(f'\r{self.url}: Image page {image_count}/{image_count}')
+        # now that we know the request went through, we parse the webpage
+        # we only parse the image, since that's all we need and it's a lot faster than parsing the whole page
+        soup = bs4.BeautifulSoup(response.content, 'html.parser', parse_only=image_strainer)
 
-        # finally we return the imgs we got
-        return img_urls
+        # then we return the img's url
+        return 'https://' + soup.find('img', {'id': 'image'}).get('src').strip('/')
 
     def get_name(self) -> str:
         return self.url.strip('/').split('/')[-1]
@@ -95,7 +111,7 @@ class Series(SharedSeriesClass):
 
     def get_chapter_urls(self) -> list[str]:
         # first we request the series page
-        response = requests.get(self.url)
+        response = common.get(self.url, cache_ttl=cache_ttls['series'])
 
         # making sure we got an ok response
         if not response.ok:
@@ -125,15 +141,17 @@ class Series(SharedSeriesClass):
         return chapter_urls
 
 
-def search(query: str, adult: bool or None = None) -> list[SearchResult]:
+def search(query: str, adult: bool or None = None, limit: int or None = None, page: int = 1) -> list[SearchResult]:
     '''Uses mangatown.com's search function and returns the top results as a list of SearchResult objects sorted with common.sort_search_results
     :param query: The string to search
-    :param adult: If it should include only adult (True), only non-adult (False), or both (None).'''
+    :param adult: If it should include only adult (True), only non-adult (False), or both (None).
+    :param limit: The most results to return. If None, every result on the page is returned
+    :param page: Which page of results to get, starting at 1'''
     # first we turn the query into a url safe query we can later put into a url
     url_safe_query = parse.quote(query)
 
     # next we put the url safe query into a url
-    search_url = f'https://www.mangatown.com/search?name={url_safe_query}&page=1'
+    search_url = f'https://www.mangatown.com/search?name={url_safe_query}&page={page}'
 
     # these are the headers
     headers = {
@@ -141,7 +159,7 @@ def search(query: str, adult: bool or None = None) -> list[SearchResult]:
     }
 
     # then after that we request the search page
-    query_response = requests.get(search_url, headers=headers)
+    query_response = common.get(search_url, headers=headers)
 
     # making sure we got an ok response
     if not query_response.ok:
@@ -169,7 +187,7 @@ def search(query: str, adult: bool or None = None) -> list[SearchResult]:
         search_results.append(SearchResult(a_tag.get('title'), 'https://mangatown.com' + a_tag.get('href'), 'mangatown'))
 
     # finally we just sort the search results with our own sorting function
-    sorted_search_results = sort_search_results(search_results, query)
+    sorted_search_results = sort_search_results(search_results, query, limit)
 
     # then we just return the list of search results we made!
     return sorted_search_results
\ No newline at end of file
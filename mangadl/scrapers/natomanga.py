@@ -1,12 +1,20 @@
 import bs4
-import requests
 from bs4 import BeautifulSoup
 from mangadl.common import SearchResult, sort_search_results
 from mangadl.common import SharedChapterClass, SharedSeriesClass
+from mangadl import common
+from mangadl import ratelimit
+from mangadl import registry
 from urllib import parse
 
-urls = ['natomanga.com', 'mangakakalove.com'
-        'mgkklot.info', 'mgnato.info', 'manganato.my'] # the reason these are on the second line is because they redirect to the above line's urls
+# the domains this scraper supports are listed in registry.py, so urls can be routed without importing every scraper
+urls = registry.get_scraper_urls('manganato')
+
+# natomanga is behind cloudflare, so we go easy on it
+rate_limit = {'requests_per_second': 2, 'max_concurrency': 2}
+ratelimit.register_host_limits(urls, rate_limit)
+
+cache_ttls = {'series': 60 * 60, 'chapter': 24 * 60 * 60}
 
 class Chapter(SharedChapterClass):
     regex = r'(https://)?(www\.)?' + f'({'|'.join([url.replace('.', r'\.') for url in urls])})' + r'/manga/[^/]*/chapter-[^/]+/?'
@@ -39,7 +47,7 @@ class Chapter(SharedChapterClass):
         img_urls = chapter.get_img_urls()
         print(img_urls)'''
         # first we request the series page
-        response = requests.get(self.url)
+        response = common.get(self.url, cache_ttl=cache_ttls['chapter'])
 
         # making sure we got an ok response
         if not response.ok:
@@ -78,7 +86,7 @@ class Series(SharedSeriesClass):
         chapter_urls = series.get_chapter_urls()
         print(chapter_urls)'''
         # first we request the series page
-        response = requests.get(self.url)
+        response = common.get(self.url, cache_ttl=cache_ttls['series'])
 
         # making sure we got an ok response
         if not response.ok:
@@ -108,15 +116,17 @@ class Series(SharedSeriesClass):
 
 
 # all the functions here are for main.py
-def search(query: str, adult: bool or None = None):
+def search(query: str, adult: bool or None = None, limit: int or None = None, page: int = 1):
     '''Uses natomanga.com's search function and returns the top results as a list of SearchResult objects sorted with common.sort_search_results
     :param query: The string to search
-    :param adult: If it should include only adult (True), only non-adult (False), or both (None).'''
+    :param adult: If it should include only adult (True), only non-adult (False), or both (None).
+    :param limit: The most results to return. If None, every result on the page is returned
+    :param page: Which page of results to get, starting at 1'''
     # first we turn the query into a url safe query we can later put into a url
     url_safe_query = parse.quote(query)
 
     # next we put the url safe query into a url
-    search_url = f'https://www.natomanga.com/search/story/{url_safe_query}?page=1'
+    search_url = f'https://www.natomanga.com/search/story/{url_safe_query}?page={page}'
 
     # these are the headers
     headers = {
@@ -125,7 +135,7 @@ def search(query: str, adult: bool or None = None):
     }
 
     # then after that we request the search page
-    query_response = requests.get(search_url, headers=headers)
+    query_response = common.get(search_url, headers=headers)
 
     # making sure we got an ok response
     if not query_response.ok:
@@ -149,7 +159,7 @@ def search(query: str, adult: bool or None = None):
             search_results.append(SearchResult(name, url, 'manganato'))
 
     # the second to last step is sorting the search results
-    sorted_search_results = sort_search_results(search_results, query)
+    sorted_search_results = sort_search_results(search_results, query, limit)
 
     # finally we return the sorted search results
     return sorted_search_results
\ No newline at end of file
@@ -1,11 +1,28 @@
 import bs4
-import requests
 from bs4 import BeautifulSoup
 from mangadl.common import SearchResult, sort_search_results
 from mangadl.common import SharedChapterClass, SharedSeriesClass
+from mangadl import common
+from mangadl import ratelimit
+from mangadl import registry
 from urllib import parse
 
-urls = ['1manga.co']
+# the domains this scraper supports are listed in registry.py, so urls can be routed without importing every scraper
+urls = registry.get_scraper_urls('1manga')
+
+rate_limit = {'requests_per_second': 5, 'max_concurrency': 6}
+ratelimit.register_host_limits(urls, rate_limit)
+
+cache_ttls = {'series': 60 * 60, 'chapter': 24 * 60 * 60}
+
+# this is how many image urls are checked at the same time in each round of find_image_count
+probes_per_round = 4
+
+# find_image_count gives up if a chapter seems to have more images than this
+max_image_count = 10000
+
+# these are the headers used when checking if an image exists
+image_headers = {'Referer': 'https://1manga.co/'}
 
 class Chapter(SharedChapterClass):
     regex = r'(https://)?(www\.)?' + f'({'|'.join([url.replace('.', r'\.') for url in urls])})' + r'/chapter/[^/]*/chapter-\d*(\.\d)?/?'
@@ -20,7 +37,7 @@ class Chapter(SharedChapterClass):
 
     def get_img_urls(self) -> list[str]:
         # first we request the series page
-        response = requests.get(self.url)
+        response = common.get(self.url, cache_ttl=cache_ttls['chapter'])
 
         # making sure we got an ok response
         if not response.ok:
@@ -41,57 +58,20 @@ class Chapter(SharedChapterClass):
         # we do this because the layout of where every image is is wierd, so we just manipulate the url since it's <first_bit_of_url>/1.<filename>, <first_bit_of_url>/2.<filename>, etc
         first_img_src = image_div.find('img').get('src')
 
-        image_headers = {
-            'Referer': 'https://1manga.co/'
-        }
-
-        # after that we go by 10s and go until a url doesn't exist
-        i = 10
-        while True:
-            # the first step is constructing the url
-            # so we extract the filetype and filename
-            filetype = first_img_src.split('.')[-1]
-
-            # then we also get the rest of the url
-            filename = '.'.join(first_img_src.split('.')[:-1])
-
-            # now we change the filename to be for the image we're looking to find
-            # (aka we just change the last character to i
-            # we also add the filetype so we have our full url
-            full_url = f'{filename[:-1]}{str(i)}.{filetype}'
-
-            # now we request the url, if it exists, we continue, if it doesn't we break out of the loop
-            if requests.head(full_url, headers=image_headers).status_code != 404:
-                i += 10
-            else:
-                break
-
-        # now we just try going down from i, and seeing if that image exists, until one exists
-        # once we find that image that exists, we know that's our image count
-        for subtracting_from_i in range(11):
-            # constructing the url
-            filetype = first_img_src.split('.')[-1]
-            filename = '.'.join(first_img_src.split('.')[:-1])
-            full_url = f'{filename[:-1]}{str(i - subtracting_from_i)}.{filetype}'
-
-            # now we request the url
-            if requests.head(full_url, headers=image_headers).status_code != 404:
-                # since it existed, we save the image count and break out of the loop
-                image_count = i - subtracting_from_i
-                break
-            # otherwise we just let the loop continue
+        # the image urls are <first_bit_of_url>/1.<filetype>, <first_bit_of_url>/2.<filetype>, etc, so we split the first one up to make the rest
+        filetype = first_img_src.split('.')[-1]
+        filename = '.'.join(first_img_src.split('.')[:-1])
 
-        # finally we just construct all the image urls we need
-        image_urls = []
-        for i in range(1, image_count + 1):
-            # constructing the url
-            filetype = first_img_src.split('.')[-1]
-            filename = '.'.join(first_img_src.split('.')[:-1])
-            full_url = f'{filename[:-1]}{str(i)}.{filetype}'
+        def get_img_url(image_number: int) -> str:
+            # we change the last character of the filename to the image number, and add the filetype back
+            return f'{filename[:-1]}{str(image_number)}.{filetype}'
 
-            # now we add the url we constructed to image_urls
-            image_urls.append(full_url)
+        # the chapter page doesn't say how many images there are, so we have to find the last image that exists (see find_image_count)
+        # the count is cached, so downloading the chapter again doesn't have to find it again
+        image_count = common.cached_value(f'1manga image count {self.url}', cache_ttls['chapter'], lambda: find_image_count(get_img_url))
 
+        # finally we just construct all the image urls we need
+        image_urls = [get_img_url(i) for i in range(1, image_count + 1)]
 
         return image_urls
 
@@ -104,7 +84,7 @@ class Series(SharedSeriesClass):
     chapter_object_reference = Chapter
     def get_chapter_urls(self) -> list[str]:
         # first we request the series page
-        response = requests.get(self.url)
+        response = common.get(self.url, cache_ttl=cache_ttls['series'])
 
         # making sure we got an ok response
         if not response.ok:
@@ -152,16 +132,58 @@ class Series(SharedSeriesClass):
         return chapter_urls
     
 
+def find_image_count(get_img_url: callable) -> int:
+    '''Finds how many images a chapter has, by checking which image urls exist (with HEAD requests) until the last one is found
+    First the image number is doubled until one doesn't exist (2, 4, 8, 16, etc), then the range between the last one that did and the first one that didn't is split up until there's nothing left between them
+    Every round checks probes_per_round image urls at the same time, so a chapter with 50 images only takes about 4 rounds of requests
+    :param get_img_url: A function that returns the url to an image by it's number (starting at 1)'''
+    def image_exists(image_number: int) -> bool:
+        return common.head(get_img_url(image_number), headers=image_headers).status_code != 404
+
+    executor = common.ContextThreadPoolExecutor(max_workers=probes_per_round)
+    try:
+        def probe(image_numbers: list[int]) -> dict[int, bool]:
+            # checks every image number at the same time, and returns if each one exists
+            return dict(zip(image_numbers, executor.map(image_exists, image_numbers)))
+
+        # the first image always exists (it's on the chapter's page), so we start from there
+        # last_existing is the highest image we know exists, and first_missing is the lowest one we know doesn't
+        last_existing = 1
+        first_missing = None
+
+        # first we keep doubling until we find an image that doesn't exist
+        while first_missing is None:
+            # if every image seems to exist, the website is probably answering every url, so we stop instead of doubling forever
+            if last_existing >= max_image_count:
+                raise Exception(f'Found more than {max_image_count} images when finding the image count, which probably means 1manga.co is responding to image urls that don\'t exist')
+            probed = probe([last_existing * 2 ** i for i in range(1, probes_per_round + 1)])
+            last_existing = max([last_existing] + [image_number for image_number, exists in probed.items() if exists])
+            first_missing = min([image_number for image_number, exists in probed.items() if not exists and image_number > last_existing], default=None)
+
+        # then we split the range between them into probes_per_round + 1 parts each round, until there's nothing between them
+        while first_missing - last_existing > 1:
+            step = (first_missing - last_existing) / (probes_per_round + 1)
+            probed = probe(sorted({last_existing + max(1, round(step * i)) for i in range(1, probes_per_round + 1)} - {first_missing}))
+            last_existing = max([last_existing] + [image_number for image_number, exists in probed.items() if exists])
+            first_missing = min([first_missing] + [image_number for image_number, exists in probed.items() if not exists and image_number > last_existing])
+    finally:
+        executor.shutdown(wait=True)
+
+    return last_existing
+
+
 # all the functions here are for main.py
-def search(query: str, adult: bool or None = None):
+def search(query: str, adult: bool or None = None, limit: int or None = None, page: int = 1):
     '''Uses 1manga.co's search function and returns the top results as a list of SearchResult objects sorted with common.sort_search_results
     :param query: The string to search
-    :param adult: If it should include only adult (True), only non-adult (False), or both (None).'''
+    :param adult: If it should include only adult (True), only non-adult (False), or both (None).
+    :param limit: The most results to return. If None, every result on the page is returned
+    :param page: Which page of results to get, starting at 1'''
     # first we turn the query into a url safe query we can later put into a url
     url_safe_query = parse.quote(query)
 
     # next we put the url safe query into a url
-    search_url = f'https://www.1manga.co/search?q={url_safe_query}&page=1&order=POPULAR'
+    search_url = f'https://www.1manga.co/search?q={url_safe_query}&page={page}&order=POPULAR'
 
     # we add a thing to make it show adult content if enabled
     if adult:
@@ -173,7 +195,7 @@ def search(query: str, adult: bool or None = None):
     }
 
     # then after that we request the search page
-    query_response = requests.get(search_url, headers=headers)
+    query_response = common.get(search_url, headers=headers)
 
     # making sure we got an ok response
     if not query_response.ok:
@@ -205,5 +227,5 @@ def search(query: str, adult: bool or None = None):
         )
 
     # then we sort the search results and return them!
-    sorted_search_results = sort_search_results(search_results, query)
+    sorted_search_results = sort_search_results(search_results, query, limit)
     return sorted_search_results
\ No newline at end of file
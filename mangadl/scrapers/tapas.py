@@ -1,12 +1,21 @@
 import bs4
-import requests
 from bs4 import BeautifulSoup
 from mangadl.common import SearchResult, sort_search_results
-from mangadl.common import SharedChapterClass, SharedSeriesClass
+from mangadl.common import SharedChapterClass, SharedSeriesClass, ChapterInfo
+from mangadl import common
+from mangadl import ratelimit
+from mangadl import registry
 from urllib import parse
 import json
+import datetime
 
-urls = ['tapas.io']
+# the domains this scraper supports are listed in registry.py, so urls can be routed without importing every scraper
+urls = registry.get_scraper_urls('tapas')
+
+rate_limit = {'requests_per_second': 5, 'max_concurrency': 6}
+ratelimit.register_host_limits(urls, rate_limit)
+
+cache_ttls = {'series': 60 * 60, 'chapter': 24 * 60 * 60}
 
 class Chapter(SharedChapterClass):
     regex = r'(https://)?(www\.)?' + f'({'|'.join([url.replace('.', r'\.') for url in urls])})' + r'/episode/[\d]+/?'
@@ -32,7 +41,7 @@ class Chapter(SharedChapterClass):
         headers = {
             'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64; rv:143.0) Gecko/20100101 Firefox/143.0'
         }
-        response = requests.get(self.url, headers=headers)
+        response = common.get(self.url, headers=headers, cache_ttl=cache_ttls['chapter'])
 
         # making sure we got an ok response
         if not response.ok:
@@ -75,12 +84,24 @@ class Series(SharedSeriesClass):
         series = Series('https://tapas.io/series/tbate-comic/')
         chapter_urls = series.get_chapter_urls()
         print(chapter_urls)'''
+        return [chapter.url for chapter in self.get_chapters()]
+
+    def get_chapters(self) -> list[ChapterInfo]:
+        '''Returns a list of all the chapters (episodes) for a given series as ChapterInfo objects, with their numbers, titles, and publish dates from tapas' episode listing
+        Every episode on tapas is posted by the series' creators, so they're all official
+
+        Example Code:
+        from scrapers.tapas import Series
+
+        series = Series('https://tapas.io/series/tbate-comic/')
+        for chapter in series.get_chapters():
+            print(chapter)'''
         # first we ge the series id and first episode's id
         # we use that for the enxt section
         headers = {
             'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64; rv:143.0) Gecko/20100101 Firefox/143.0'
         }
-        response = requests.get(self.url, headers=headers)
+        response = common.get(self.url, headers=headers, cache_ttl=cache_ttls['series'])
 
         # making sure we got an ok response
         if not response.ok:
@@ -109,7 +130,7 @@ class Series(SharedSeriesClass):
         # and if it's a multiple of 20, then the last one will just be 0
         response_episode_count = 20
         page = 0
-        episode_urls = []
+        episodes = []
         while response_episode_count == 20:
             # incrementing the count of the page we're requesting
             page += 1
@@ -122,7 +143,7 @@ class Series(SharedSeriesClass):
                 'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64; rv:143.0) Gecko/20100101 Firefox/143.0',
                 'Referer': self.url
             }
-            response = requests.get(url, headers=headers)
+            response = common.get(url, headers=headers, cache_ttl=cache_ttls['series'])
 
             # making sure we got an ok response
             if not response.ok:
@@ -132,30 +153,38 @@ class Series(SharedSeriesClass):
             # parsing the response
             response_dict = json.loads(response.content.decode('utf-8'))
 
-            # getting the episodes' urls and adding them to the list
+            # getting the episodes and adding them to the list
             for episode_data in response_dict.get('data').get('episodes'):
-                # all we get is the id, so we have to construct the url
+                # we don't get the url, just the id, so we have to construct the url
                 # for reference, the id is the episode id
                 # we format it so it's https://tapas.io/episode/[ID here]
-                episode_urls.append('https://tapas.io/episode/' + str(episode_data.get('id')))
+                # the episode's number is called it's scene, and the publish date is an iso 8601 date
+                publish_date = episode_data.get('publish_date')
+                episodes.append(ChapterInfo('https://tapas.io/episode/' + str(episode_data.get('id')),
+                                            number=common.parse_chapter_number(episode_data.get('scene')),
+                                            title=episode_data.get('title') or None,
+                                            published_at=datetime.datetime.fromisoformat(publish_date).timestamp() if isinstance(publish_date, str) else None,
+                                            is_official=True))
 
             # setting the response episode count
             response_episode_count = len(response_dict.get('data').get('episodes'))
 
-        # returning the urls
-        return episode_urls
+        # returning the episodes
+        return episodes
 
 
 # all the functions here are for main.py
-def search(query: str, adult: bool or None = None):
+def search(query: str, adult: bool or None = None, limit: int or None = None, page: int = 1):
     '''Uses tapas.io's search function and returns the top results as a list of SearchResult objects sorted with common.sort_search_results
     :param query: The string to search
-    :param adult: If it should include only adult (True), only non-adult (False), or both (None).'''
+    :param adult: If it should include only adult (True), only non-adult (False), or both (None).
+    :param limit: The most results to return. If None, every result on the page is returned
+    :param page: Which page of results to get, starting at 1'''
     # first we turn the query into a url safe query we can later put into a url
     url_safe_query = parse.quote(query)
 
     # next we put the url safe query into a url
-    search_url = f'https://tapas.io/search?q={url_safe_query}'
+    search_url = f'https://tapas.io/search?q={url_safe_query}&pageNumber={page}'
 
     # these are the headers
     headers = {
@@ -163,7 +192,7 @@ def search(query: str, adult: bool or None = None):
     }
 
     # then after that we request the search page
-    query_response = requests.get(search_url, headers=headers)
+    query_response = common.get(search_url, headers=headers)
 
     # making sure we got an ok response
     if not query_response.ok:
@@ -187,7 +216,7 @@ def search(query: str, adult: bool or None = None):
         search_results.append(SearchResult(name, url, 'tapas'))
 
     # the second to last step is sorting the search results
-    sorted_search_results = sort_search_results(search_results, query)
+    sorted_search_results = sort_search_results(search_results, query, limit)
 
     # finally we return the sorted search results
     return sorted_search_results
@@ -0,0 +1,116 @@
+import os
+import shutil
+import threading
+from mangadl.journal import get_file_size_and_hash
+
+# this is the name of the store's directory that's made in the root of the output path (see open_store)
+store_directory_name = '.mangadl-store'
+
+# these are the ways an image can be put into place from the store, in the order they're tried (see ContentStore.link)
+link_methods = ['hardlink', 'symlink', 'copy']
+
+
+class ContentStore:
+    '''Stores every image once, by it's sha256 hash, and links it into the series/chapter/NNN.png layout the formatters expect
+    Lots of chapters have the same credit/recruitment pages, and mirrors (like bato and bato_v4) serve the same images, so those are only kept on disk once
+    Images are hardlinked into place if possible (so they look like normal files to everything else), otherwise symlinked, otherwise copied
+
+    Example Code:
+    from store import ContentStore
+
+    store = ContentStore('/put/your/path/here/.mangadl-store')
+
+    # after an image's been downloaded, we move it into the store and link it back to where it was
+    sha256 = store.add('/put/your/path/here/chapter-1/000.png')
+
+    # now the same image can be put somewhere else without downloading it again
+    store.link(sha256, '/put/your/path/here/chapter-2/000.png')
+    '''
+
+    def __init__(self, root: str):
+        ''':param root: The directory the images are stored in. It's made if it doesn't exist yet'''
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+        # this is the link method that worked last time, so we don't keep trying ones that don't work on this filesystem
+        self.link_method_index = 0
+        # adding an image is a check then a move, so this makes sure two workers with the same image don't both do it at once
+        self.lock = threading.Lock()
+
+    def get_path(self, sha256: str) -> str:
+        '''Returns the path an image with this hash is stored at. The first 4 characters are used as subdirectories so no directory ends up with too many files
+        :param sha256: The image's sha256 hash as a hex string'''
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def has(self, sha256: str) -> bool:
+        '''Returns True if an image with this hash is in the store
+        :param sha256: The image's sha256 hash as a hex string'''
+        return os.path.isfile(self.get_path(sha256))
+
+    def add(self, path: str, sha256: str or None = None) -> str:
+        '''Moves the file at path into the store (or throws it away if the store already has it), then links it back to path. Returns the file's sha256 hash
+        :param path: The path to the file, like a freshly downloaded image
+        :param sha256: The file's sha256 hash, if it's already known. If None, the file is hashed'''
+        if sha256 is None:
+            sha256 = get_file_size_and_hash(path)[1]
+        stored_path = self.get_path(sha256)
+
+        # if the file's already linked to the stored one, there's nothing to do
+        if os.path.exists(stored_path) and os.path.samefile(path, stored_path):
+            return sha256
+
+        with self.lock:
+            if os.path.isfile(stored_path):
+                # we already have this image, so the new copy isn't needed
+                os.remove(path)
+            else:
+                # renaming is atomic, so the store never has a half written image in it
+                os.makedirs(os.path.dirname(stored_path), exist_ok=True)
+                os.replace(path, stored_path)
+
+        self.link(sha256, path)
+        return sha256
+
+    def link(self, sha256: str, path: str):
+        '''Puts the stored image with this hash at path, replacing anything that's already there
+        It tries a hardlink first, then a symlink, then a copy, since hardlinks don't work across filesystems and symlinks don't work on some systems
+        :param sha256: The image's sha256 hash as a hex string
+        :param path: Where the image should be put'''
+        stored_path = self.get_path(sha256)
+
+        # the link is made next to path then renamed over it, so path is never missing or half written
+        temp_path = path + '.link'
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+
+        while True:
+            link_method = link_methods[self.link_method_index]
+            try:
+                if link_method == 'hardlink':
+                    os.link(stored_path, temp_path)
+                elif link_method == 'symlink':
+                    os.symlink(os.path.abspath(stored_path), temp_path)
+                else:
+                    shutil.copyfile(stored_path, temp_path)
+                break
+            except OSError:
+                # copying should always work, so if that failed it's a real error
+                if link_method == link_methods[-1]:
+                    raise
+                if os.path.lexists(temp_path):
+                    os.remove(temp_path)
+                self.link_method_index += 1
+
+        os.replace(temp_path, path)
+
+
+def open_store(output_path: str) -> ContentStore:
+    '''Opens (or makes) the store in the root of an output path. It's kept in the output path so hardlinks to it work (hardlinks have to be on the same filesystem)
+
+    Example Code:
+    from store import open_store
+
+    store = open_store('/put/your/path/here')
+    :param output_path: The directory everything is being downloaded to'''
+    return ContentStore(os.path.join(output_path, store_directory_name))
+
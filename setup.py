@@ -15,6 +15,10 @@ setup(
         'reportlab>=4.4.4',
         'ebooklib>=0.20'
     ],
+    extras_require={
+        'async': ['aiohttp>=3.9'],
+        'fast-search': ['rapidfuzz>=3.0'],
+    },
     packages=find_packages(),
     entry_points={
         'console_scripts': [